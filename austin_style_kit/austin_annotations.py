@@ -12,10 +12,16 @@ USAGE:
     
     # Access colors directly
     ax.plot(x, y, color=PALETTE['primary'])
+    
+    # Same preset scaled for slides (or 'poster', 'thumbnail')
+    annotate(ax, 'Key insight!', xy=(3, 5), xytext=(5, 7), profile='presentation')
 
 """
 
-import matplotlib.pyplot as plt
+from matplotlib.patches import Rectangle
+
+from austin_instrument import enable_from_env, trace_module
+from austin_styles import new_figure
 
 
 # ============================================================
@@ -193,149 +199,89 @@ PRESETS = {
 
 
 # ============================================================
-# PRESENTATION PRESETS (larger for slides)
+# SCALE PROFILES
 # ============================================================
+# Presets are defined once (above) and scaled per target size.
+# font: fontsize | line: arrow/box line widths | shrink: arrow gaps | pad: box padding
+# dpi: export resolution (a thumbnail is fewer pixels, a poster more)
 
-PRESETS_PRESENTATION = {
-    'callout': {
-        'fontsize': 14,
-        'fontweight': 'bold',
-        'color': PALETTE['primary'],
-        'arrowprops': dict(
-            arrowstyle='->',
-            color=PALETTE['primary'],
-            lw=3,
-            connectionstyle='arc3,rad=0.2',
-            shrinkB=8,
-        ),
-    },
-    
-    'callout_box': {
-        'fontsize': 14,
-        'fontweight': 'bold',
-        'color': 'white',
-        'arrowprops': dict(
-            arrowstyle='-|>',
-            color=PALETTE['primary'],
-            lw=3,
-            shrinkB=8,
-        ),
-        'bbox': dict(
-            boxstyle='round,pad=0.5',
-            facecolor=PALETTE['primary'],
-            edgecolor='none',
-        ),
-    },
-    
-    'subtle': {
-        'fontsize': 12,
-        'color': PALETTE['neutral'],
-        'style': 'italic',
-        'arrowprops': dict(
-            arrowstyle='->',
-            color='#888888',
-            lw=1.5,
-            connectionstyle='arc3,rad=0.15',
-            shrinkB=5,
-        ),
-    },
-    
-    'label': {
-        'fontsize': 13,
-        'fontweight': 'bold',
-        'color': '#333333',
-        'arrowprops': dict(
-            arrowstyle='-',
-            color='#333333',
-            lw=1.5,
-            shrinkB=5,
-        ),
-    },
-    
-    'highlight': {
-        'fontsize': 16,
-        'fontweight': 'bold',
-        'color': PALETTE['primary'],
-        'arrowprops': dict(
-            arrowstyle='->',
-            color=PALETTE['primary'],
-            lw=3,
-            shrinkB=8,
-        ),
-        'bbox': dict(
-            boxstyle='round,pad=0.4',
-            facecolor='#EDE7F3',
-            edgecolor=PALETTE['primary'],
-            linewidth=2,
-        ),
-    },
-    
-    'trend': {
-        'fontsize': 13,
-        'fontweight': 'bold',
-        'color': PALETTE['secondary'],
-        'arrowprops': dict(
-            arrowstyle='<->',
-            color=PALETTE['secondary'],
-            lw=3,
-            connectionstyle='arc3,rad=0',
-        ),
-    },
-    
-    'positive': {
-        'fontsize': 14,
-        'fontweight': 'bold',
-        'color': PALETTE['positive'],
-        'arrowprops': dict(
-            arrowstyle='->',
-            color=PALETTE['positive'],
-            lw=3,
-            shrinkB=8,
-        ),
-    },
-    
-    'negative': {
-        'fontsize': 14,
-        'fontweight': 'bold',
-        'color': PALETTE['negative'],
-        'arrowprops': dict(
-            arrowstyle='->',
-            color=PALETTE['negative'],
-            lw=3,
-            shrinkB=8,
-        ),
-    },
-    
-    'neutral': {
-        'fontsize': 13,
-        'color': PALETTE['neutral'],
-        'arrowprops': dict(
-            arrowstyle='->',
-            color='#777777',
-            lw=2,
-            shrinkB=6,
-        ),
-    },
-    
-    'accent': {
-        'fontsize': 14,
-        'fontweight': 'bold',
-        'color': PALETTE['accent'],
-        'arrowprops': dict(
-            arrowstyle='->',
-            color=PALETTE['accent'],
-            lw=3,
-            shrinkB=8,
-        ),
-    },
+SCALE_PROFILES = {
+    'notebook': dict(font=1.0, line=1.0, shrink=1.0, pad=1.0, dpi=1.0),
+    'presentation': dict(font=1.3, line=1.5, shrink=1.6, pad=1.25, dpi=1.0),
+    'poster': dict(font=1.8, line=2.0, shrink=2.0, pad=1.5, dpi=2.0),
+    'thumbnail': dict(font=0.75, line=0.75, shrink=0.6, pad=0.8, dpi=0.25),
 }
 
 
+def profile_dpi(profile, dpi=300):
+    """Export resolution for a profile: dpi times its SCALE_PROFILES factor."""
+    if profile not in SCALE_PROFILES:
+        raise ValueError(f"Unknown profile '{profile}'. Choose from: {list(SCALE_PROFILES.keys())}")
+    return dpi * SCALE_PROFILES[profile]['dpi']
+
+
+def _scale_pad(boxstyle, factor):
+    """Scale the pad in a boxstyle string like 'round,pad=0.4'."""
+    parts = []
+    for part in boxstyle.split(','):
+        if part.startswith('pad='):
+            part = f"pad={round(float(part[4:]) * factor, 1):g}"
+        parts.append(part)
+    return ','.join(parts)
+
+
+def _scale_preset(preset, scale):
+    """One preset resized by a SCALE_PROFILES entry (input is not modified)."""
+    style = dict(preset)
+    if 'fontsize' in style:
+        style['fontsize'] = round(style['fontsize'] * scale['font'])
+    if 'arrowprops' in style:
+        arrow = dict(style['arrowprops'])
+        if 'lw' in arrow:
+            # Nearest half point keeps line widths on a clean grid
+            arrow['lw'] = round(arrow['lw'] * scale['line'] * 2) / 2
+        for key in ('shrinkA', 'shrinkB'):
+            if key in arrow:
+                arrow[key] = round(arrow[key] * scale['shrink'])
+        style['arrowprops'] = arrow
+    if 'bbox' in style:
+        box = dict(style['bbox'])
+        if 'boxstyle' in box:
+            box['boxstyle'] = _scale_pad(box['boxstyle'], scale['pad'])
+        if 'linewidth' in box:
+            box['linewidth'] = round(box['linewidth'] * scale['line'] * 2) / 2
+        style['bbox'] = box
+    return style
+
+
+_resolved_presets = {}
+
+
+def get_presets(profile='notebook'):
+    """
+    All presets scaled for a profile. Resolved once per profile, then cached.
+
+    Treat the result as read-only; annotate() copies what it changes.
+    """
+    if profile not in _resolved_presets:
+        if profile not in SCALE_PROFILES:
+            raise ValueError(f"Unknown profile '{profile}'. Choose from: {list(SCALE_PROFILES.keys())}")
+        scale = SCALE_PROFILES[profile]
+        _resolved_presets[profile] = {
+            name: _scale_preset(preset, scale) for name, preset in PRESETS.items()
+        }
+    return _resolved_presets[profile]
+
+
+# Kept for existing code that reads the table directly
+PRESETS_PRESENTATION = get_presets('presentation')
+
+
 # ============================================================
 # HELPER FUNCTION
 # ============================================================
 
-def annotate(ax, text, xy, xytext, preset='callout', presentation=False, **kwargs):
+def annotate(ax, text, xy, xytext, preset='callout', presentation=False, profile=None, **kwargs):
     """
     Add annotation with consistent styling.
     
@@ -354,6 +300,10 @@ def annotate(ax, text, xy, xytext, preset='callout', presentation=False, **kwarg
                 'highlight', 'trend', 'positive', 'negative', 'neutral', 'accent'
     presentation : bool
         If True, use larger presentation-sized presets
+        (same as profile='presentation')
+    profile : str
+        One of: 'notebook', 'presentation', 'poster', 'thumbnail'.
+        Overrides presentation when given.
     **kwargs : dict
         Override any preset parameters
     
@@ -362,20 +312,18 @@ def annotate(ax, text, xy, xytext, preset='callout', presentation=False, **kwarg
     annotation : matplotlib.text.Annotation
     """
     
-    presets = PRESETS_PRESENTATION if presentation else PRESETS
+    if profile is None:
+        profile = 'presentation' if presentation else 'notebook'
+    presets = get_presets(profile)
     
     if preset not in presets:
         raise ValueError(f"Unknown preset '{preset}'. Choose from: {list(presets.keys())}")
     
-    # Deep copy to avoid modifying original
-    import copy
-    style = copy.deepcopy(presets[preset])
-    
-    # Handle nested dicts (arrowprops, bbox)
-    if 'arrowprops' in kwargs:
-        style['arrowprops'] = {**style.get('arrowprops', {}), **kwargs.pop('arrowprops')}
-    if 'bbox' in kwargs:
-        style['bbox'] = {**style.get('bbox', {}), **kwargs.pop('bbox')}
+    # Shallow copies are enough: only the nested dicts are ever merged into
+    style = dict(presets[preset])
+    for key in ('arrowprops', 'bbox'):
+        if key in style or key in kwargs:
+            style[key] = {**style.get(key, {}), **kwargs.pop(key, {})}
     
     style.update(kwargs)
     
@@ -425,24 +373,34 @@ def get_color(name):
     return PALETTE[name]
 
 
-def show_palette():
-    """Display the palette visually."""
-    fig, ax = plt.subplots(figsize=(12, 2))
+def _figure(fig, figsize):
+    """The given (e.g. pyplot) figure resized, or a new one on an Agg canvas."""
+    if fig is None:
+        return new_figure(figsize=figsize)
+    fig.set_size_inches(figsize)
+    return fig
+
+
+def palette_figure(fig=None):
+    """Swatch of every palette colour. Built without pyplot unless fig is given."""
+    fig = _figure(fig, (12, 2))
+    ax = fig.add_subplot()
     for i, (name, color) in enumerate(PALETTE.items()):
-        ax.add_patch(plt.Rectangle((i, 0), 0.9, 1, facecolor=color))
+        ax.add_patch(Rectangle((i, 0), 0.9, 1, facecolor=color))
         ax.text(i + 0.45, -0.25, f'{name}\n{color}', ha='center', fontsize=9)
     ax.set_xlim(-0.1, len(PALETTE))
     ax.set_ylim(-0.6, 1.1)
     ax.set_title('Austin Palette - High Contrast (Colorblind Safe)', fontweight='bold')
     ax.axis('off')
-    plt.tight_layout()
-    plt.show()
+    fig.tight_layout()
+    return fig
 
 
-def show_presets():
-    """Display all available presets visually."""
+def presets_figure(fig=None):
+    """One panel per annotation preset. Built without pyplot unless fig is given."""
     import numpy as np
-    fig, axes = plt.subplots(2, 5, figsize=(16, 6))
+    fig = _figure(fig, (16, 6))
+    axes = fig.subplots(2, 5)
     fig.suptitle('Available Annotation Presets', fontsize=14, fontweight='bold')
     x = np.linspace(0, 10, 50)
     y = np.sin(x) * 2 + 5
@@ -458,10 +416,29 @@ def show_presets():
         annotate(ax, f'{name}', xy=(3, y[15]), xytext=(6, 7.5), preset=name)
     for ax in axes.flat[len(preset_names):]:
         ax.axis('off')
-    plt.tight_layout()
+    fig.tight_layout()
+    return fig
+
+
+def show_palette():
+    """Display the palette visually."""
+    import matplotlib.pyplot as plt
+    palette_figure(plt.figure())
+    plt.show()
+
+
+def show_presets():
+    """Display all available presets visually."""
+    import matplotlib.pyplot as plt
+    presets_figure(plt.figure())
     plt.show()
 
 
+# Call counts and timings when AUSTIN_PROFILE is set (see austin_instrument)
+trace_module(globals(), 'austin_annotations')
+enable_from_env()
+
+
 if __name__ == '__main__':
     show_palette()
     show_presets()
@@ -0,0 +1,406 @@
+"""
+AUSTIN AUDIT: Colour-vision and contrast checks on rendered charts
+===================================================================
+
+The kit promises "colorblind safe", but nothing checked the rendered
+output. This audit loads PNGs as NumPy arrays and, fully vectorized:
+
+  1. finds which kit colours actually appear (palette + the grays the
+     scripts use), any other prominent hues, and what the background is,
+  2. computes the WCAG contrast ratio of each one against the background
+     (e.g. the '#E0E0E0' "Other" label in 08 is 1.3:1),
+  3. simulates protanopia, deuteranopia and tritanopia (Machado et al.
+     2009, full severity) and flags story colours, including hues from
+     outside the kit such as matplotlib's default red and green, that
+     become hard to tell apart.
+
+USAGE:
+    from austin_audit import audit_image, audit_gallery, simulate_cvd
+
+    report = audit_image('graphs/08_stacked_bar_electricity_mix.png')
+    for issue in report['issues']:
+        print(issue['level'], issue['message'])
+
+    # Whole gallery in parallel; returns one report per file
+    reports = audit_gallery('graphs', workers=8)
+
+    # Command line (exit status 1 if anything fails, so it can gate a build)
+    python austin_audit.py graphs graphs/ugly --workers 8
+
+"""
+
+import argparse
+import glob
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import matplotlib.colors as mcolors
+import matplotlib.image as mimage
+
+from austin_annotations import PALETTE
+
+
+# ============================================================
+# COLOURS TO LOOK FOR
+# ============================================================
+
+# Palette plus the grays and tints used across graphs/ and the presets
+AUDIT_COLORS = dict(PALETTE, **{
+    'text dark': '#333333',
+    'text gray': '#555555',
+    'tick gray': '#666666',
+    'arrow gray': '#777777',
+    'subtitle gray': '#888888',
+    'note gray': '#999999',
+    'marker gray': '#AAAAAA',
+    'baseline gray': '#CCCCCC',
+    'guide gray': '#DDDDDD',
+    'other gray': '#E0E0E0',
+    'band tint': '#E8E0F0',
+    'box tint': '#EDE7F3',
+})
+
+# Fills and tints that are meant to sit quietly behind data
+BACKGROUND_TINTS = {'band tint', 'box tint', 'guide gray', 'baseline gray'}
+
+# WCAG 2.1: 4.5:1 for body text, 3:1 for large text and graphics
+CONTRAST_TEXT = 4.5
+CONTRAST_GRAPHICS = 3.0
+
+# CIE76 distance below which two story colours are considered confusable
+CONFUSION_DELTA_E = 12.0
+
+# A colour must cover this share of the pixels to count as present
+MIN_SHARE = 2e-5
+
+# Colours outside AUDIT_COLORS join the colour-vision check when they
+# cover this share of the pixels and are this saturated (CIELAB chroma),
+# so grays, tints and anti-aliasing are left out. At most MAX_UNLISTED,
+# largest first.
+UNLISTED_SHARE = 2e-3
+UNLISTED_CHROMA = 20.0
+MAX_UNLISTED = 12
+
+# Unlisted colours are only compared when normal vision sees them as
+# clearly different (CIE76), so the neighbouring shades of a colormap in
+# a heatmap are not reported as a confusion.
+UNLISTED_DISTINCT_E = 30.0
+
+# Machado, Oliveira & Fernandes (2009), severity 1.0, applied in linear RGB
+CVD_MATRICES = {
+    'protanopia': np.array([
+        [0.152286, 1.052583, -0.204868],
+        [0.114503, 0.786281, 0.099216],
+        [-0.003882, -0.048116, 1.051998],
+    ]),
+    'deuteranopia': np.array([
+        [0.367322, 0.860646, -0.227968],
+        [0.280085, 0.672501, 0.047413],
+        [-0.011820, 0.042940, 0.968881],
+    ]),
+    'tritanopia': np.array([
+        [1.255528, -0.076749, -0.178779],
+        [-0.078411, 0.930809, 0.147602],
+        [0.004733, 0.691367, 0.303900],
+    ]),
+}
+
+
+# ============================================================
+# COLOUR MATH (vectorized over trailing RGB axis)
+# ============================================================
+
+def srgb_to_linear(rgb):
+    rgb = np.asarray(rgb, dtype=float)
+    return np.where(rgb <= 0.04045, rgb / 12.92, ((rgb + 0.055) / 1.055) ** 2.4)
+
+
+def linear_to_srgb(lin):
+    lin = np.clip(lin, 0, 1)
+    return np.where(lin <= 0.0031308, lin * 12.92, 1.055 * lin ** (1 / 2.4) - 0.055)
+
+
+def relative_luminance(rgb):
+    """WCAG relative luminance of sRGB colours in [0, 1]."""
+    return srgb_to_linear(rgb) @ np.array([0.2126, 0.7152, 0.0722])
+
+
+def contrast_ratio(rgb_a, rgb_b):
+    """WCAG contrast ratio (1 to 21) between colours; broadcasts."""
+    la = relative_luminance(rgb_a)
+    lb = relative_luminance(rgb_b)
+    return (np.maximum(la, lb) + 0.05) / (np.minimum(la, lb) + 0.05)
+
+
+_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+])
+_WHITE = np.array([0.95047, 1.0, 1.08883])
+
+
+def srgb_to_lab(rgb):
+    """CIELAB (D65) of sRGB colours in [0, 1]."""
+    xyz = srgb_to_linear(rgb) @ _XYZ.T / _WHITE
+    f = np.where(xyz > 216 / 24389, np.cbrt(xyz), (24389 / 27 * xyz + 16) / 116)
+    return np.stack([116 * f[..., 1] - 16,
+                     500 * (f[..., 0] - f[..., 1]),
+                     200 * (f[..., 1] - f[..., 2])], axis=-1)
+
+
+def simulate_cvd(rgb, kind):
+    """
+    Simulate colour-vision deficiency on sRGB data in [0, 1].
+
+    Works on single colours (..., 3) and whole images (H, W, 3) alike.
+    kind is one of CVD_MATRICES.
+    """
+    if kind not in CVD_MATRICES:
+        raise ValueError(f"Unknown deficiency '{kind}'. Choose from: {list(CVD_MATRICES)}")
+    return linear_to_srgb(srgb_to_linear(rgb) @ CVD_MATRICES[kind].T)
+
+
+# ============================================================
+# IMAGE SCAN
+# ============================================================
+
+def load_rgb(path, stride=1):
+    """RGB float image in [0, 1] (alpha composited on white), every stride-th pixel."""
+    img = mimage.imread(path)
+    if img.dtype == np.uint8:
+        img = img.astype(np.float32) / 255
+    if img.ndim == 2:
+        img = np.stack([img] * 3, axis=-1)
+    if img.shape[-1] == 4:
+        alpha = img[..., 3:]
+        img = img[..., :3] * alpha + (1 - alpha)
+    return img[::stride, ::stride, :3]
+
+
+def _pack(rgb):
+    q = np.rint(rgb * 255).astype(np.uint32)
+    return (q[..., 0] << 16) | (q[..., 1] << 8) | q[..., 2]
+
+
+def color_histogram(rgb, solid=False):
+    """
+    Unique 8-bit colours in an image and their pixel counts.
+
+    solid=True counts only pixels whose right, lower and diagonal
+    neighbours have the same colour. Anti-aliased edges are one or two
+    pixels wide and blend through every intermediate gray, so this keeps
+    the interiors of lines, bars and glyph stems and drops the blends.
+    """
+    packed = _pack(rgb)
+    if solid:
+        core = packed[:-1, :-1]
+        same = (core == packed[1:, :-1]) & (core == packed[:-1, 1:]) & (core == packed[1:, 1:])
+        packed = core[same]
+    codes, counts = np.unique(packed.ravel(), return_counts=True)
+    colors = np.stack([(codes >> 16) & 255, (codes >> 8) & 255, codes & 255], axis=1) / 255
+    return colors, counts
+
+
+def _match(rgb, candidates, tolerance):
+    """Solid colours, their pixel shares and nearest candidate index (-1 if none is close)."""
+    targets = np.array([mcolors.to_rgb(c) for c in candidates.values()])
+    colors, counts = color_histogram(rgb, solid=True)
+    shares = counts / (rgb.shape[0] * rgb.shape[1])
+    # (unique colours x candidates) distance table; unique colours are few
+    dist = np.abs(colors[:, None, :] - targets[None, :, :]).max(axis=2)
+    nearest = dist.argmin(axis=1)
+    nearest[dist[np.arange(len(colors)), nearest] > tolerance] = -1
+    return colors, shares, nearest
+
+
+def present_colors(rgb, candidates=None, tolerance=3 / 255, min_share=MIN_SHARE):
+    """
+    Which candidate colours cover at least min_share of the image.
+
+    Only solid pixels are counted (see color_histogram), so blends along
+    anti-aliased edges do not register as grays the chart never used.
+    Each pixel counts towards its nearest candidate only, so '#DDDDDD'
+    is not also reported as '#E0E0E0'.
+
+    Returns
+    -------
+    found : dict
+        name -> share of pixels.
+    """
+    candidates = candidates or AUDIT_COLORS
+    _, shares, nearest = _match(rgb, candidates, tolerance)
+    share = np.bincount(nearest[nearest >= 0], weights=shares[nearest >= 0],
+                        minlength=len(candidates))
+    return {name: float(s) for name, s in zip(candidates, share) if s >= min_share}
+
+
+def unlisted_colors(rgb, candidates=None, tolerance=3 / 255, min_share=UNLISTED_SHARE,
+                    min_chroma=UNLISTED_CHROMA, limit=MAX_UNLISTED):
+    """
+    Prominent saturated colours that match none of the candidates.
+
+    Catches charts drawn outside the kit (e.g. matplotlib's default
+    '#D62728' red next to '#2CA02C' green) so they still get a
+    colour-vision check.
+
+    Returns
+    -------
+    found : dict
+        hex -> share of pixels, largest first, at most limit entries.
+    """
+    candidates = candidates or AUDIT_COLORS
+    colors, shares, nearest = _match(rgb, candidates, tolerance)
+    lab = srgb_to_lab(colors)
+    chroma = np.hypot(lab[:, 1], lab[:, 2])
+    keep = np.flatnonzero((nearest < 0) & (shares >= min_share) & (chroma >= min_chroma))
+    keep = keep[np.argsort(-shares[keep], kind='stable')][:limit]
+    return {mcolors.to_hex(colors[i]).upper(): float(shares[i]) for i in keep}
+
+
+def background_color(rgb):
+    """Most common colour in the image."""
+    colors, counts = color_histogram(rgb)
+    return colors[np.argmax(counts)]
+
+
+# ============================================================
+# AUDIT
+# ============================================================
+
+def audit_image(path, candidates=None, stride=1):
+    """
+    Audit one rendered chart.
+
+    Parameters
+    ----------
+    path : str
+        PNG file.
+    candidates : dict, optional
+        name -> colour to look for (default: AUDIT_COLORS).
+    stride : int
+        Sample every stride-th pixel in each direction. 2 quarters the work
+        but can drop thin strokes entirely (the #AAAAAA annotation text in
+        07 is only found at 1).
+
+    Returns
+    -------
+    report : dict
+        'path', 'background', 'colors' (name -> share, contrast and
+        per-deficiency contrast), 'unlisted' (hex -> share of prominent
+        colours outside candidates, checked for colour vision only) and
+        'issues' (list of dicts with 'level' = 'fail' | 'warn', 'kind'
+        and 'message').
+    """
+    candidates = candidates or AUDIT_COLORS
+    rgb = load_rgb(path, stride=stride)
+    bg = background_color(rgb)
+    found = present_colors(rgb, candidates)
+    unlisted = unlisted_colors(rgb, candidates)
+    names = [n for n in found if not np.allclose(mcolors.to_rgb(candidates[n]), bg, atol=3 / 255)]
+    listed = len(names)
+    names += list(unlisted)
+    rgbs = np.array([mcolors.to_rgb(candidates.get(n, n)) for n in names]).reshape(-1, 3)
+
+    contrast = contrast_ratio(rgbs, bg)
+    sims = {kind: simulate_cvd(rgbs, kind) for kind in CVD_MATRICES}
+    sim_bg = {kind: simulate_cvd(bg, kind) for kind in CVD_MATRICES}
+
+    colors = {}
+    issues = []
+    for i, name in enumerate(names[:listed]):
+        colors[name] = {
+            'hex': candidates[name],
+            'share': found[name],
+            'contrast': round(float(contrast[i]), 2),
+            'cvd_contrast': {k: round(float(contrast_ratio(sims[k][i], sim_bg[k])), 2)
+                             for k in CVD_MATRICES},
+        }
+        if name in BACKGROUND_TINTS:
+            continue
+        if contrast[i] < CONTRAST_GRAPHICS:
+            issues.append(dict(level='fail', kind='contrast', colors=[name], message=(
+                f"{name} {candidates[name]} has {contrast[i]:.2f}:1 contrast against the "
+                f"background (needs {CONTRAST_GRAPHICS}:1 for graphics and large text)")))
+        elif contrast[i] < CONTRAST_TEXT:
+            issues.append(dict(level='warn', kind='contrast', colors=[name], message=(
+                f"{name} {candidates[name]} has {contrast[i]:.2f}:1 contrast; "
+                f"too low for body text (needs {CONTRAST_TEXT}:1)")))
+
+    # Story colours that collapse together under a simulated deficiency
+    story = [i for i, n in enumerate(names) if n in PALETTE or n in unlisted]
+    if len(story) > 1:
+        outside = np.array([names[i] in unlisted for i in story])
+        distinct = np.where(outside[:, None] | outside[None, :], UNLISTED_DISTINCT_E, CONFUSION_DELTA_E)
+        normal = srgb_to_lab(rgbs[story])
+        base = np.linalg.norm(normal[:, None] - normal[None, :], axis=2)
+        for kind, sim in sims.items():
+            lab = srgb_to_lab(sim[story])
+            dist = np.linalg.norm(lab[:, None] - lab[None, :], axis=2)
+            a, b = np.nonzero(np.triu((dist < CONFUSION_DELTA_E) & (base >= distinct), 1))
+            for i, j in zip(a, b):
+                n1, n2 = names[story[i]], names[story[j]]
+                issues.append(dict(level='fail', kind=kind, colors=[n1, n2], message=(
+                    f"{n1} and {n2} are nearly identical under {kind} "
+                    f"(dE {dist[i, j]:.1f} < {CONFUSION_DELTA_E})")))
+
+    return {
+        'path': path,
+        'background': mcolors.to_hex(bg),
+        'colors': colors,
+        'unlisted': unlisted,
+        'issues': issues,
+    }
+
+
+def gallery_paths(*folders):
+    """Every PNG directly inside the given folders (default: graphs/ and graphs/ugly/)."""
+    if not folders:
+        root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        folders = (os.path.join(root, 'graphs'), os.path.join(root, 'graphs', 'ugly'))
+    paths = []
+    for folder in folders:
+        if os.path.isfile(folder):
+            paths.append(folder)
+        else:
+            paths += sorted(glob.glob(os.path.join(folder, '*.png')))
+    return paths
+
+
+def audit_gallery(*folders, workers=None, stride=1):
+    """Audit every PNG in folders, in parallel when workers > 1."""
+    paths = gallery_paths(*folders)
+    strides = [stride] * len(paths)
+    if not workers or workers <= 1:
+        return [audit_image(p, stride=stride) for p in paths]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(audit_image, paths, [None] * len(paths), strides))
+
+
+def format_report(report):
+    """Human-readable lines for one report."""
+    lines = [f"{os.path.basename(report['path'])}  (background {report['background']})"]
+    for issue in report['issues']:
+        lines.append(f"  [{issue['level'].upper()}] {issue['message']}")
+    if not report['issues']:
+        lines.append('  ok')
+    return lines
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Colour-vision and contrast audit of rendered charts.')
+    parser.add_argument('paths', nargs='*', help='PNG files or folders (default: graphs/ and graphs/ugly/)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--stride', type=int, default=1)
+    parser.add_argument('--strict', action='store_true', help='also fail on warnings')
+    args = parser.parse_args()
+
+    reports = audit_gallery(*args.paths, workers=args.workers, stride=args.stride)
+    failed = False
+    for report in reports:
+        print('\n'.join(format_report(report)))
+        levels = {issue['level'] for issue in report['issues']}
+        failed |= 'fail' in levels or (args.strict and 'warn' in levels)
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,317 @@
+"""
+AUSTIN BATCH: Small multiples from one styled template figure
+==============================================================
+
+Re-running a graphs/ script per country redoes imports, style loading,
+spine and tick setup, title layout and the tight bbox every time. A
+SmallMultiples deck builds the styled figure ONCE, then for each entity
+swaps the data into the existing artists (set_data / set_offsets /
+set_text) and re-exports. Layout is computed once on the template, so
+each export is a single draw. Axes that autoscale (the default) are
+rescaled to each entity's data after update(); fix the limits in build
+(ax.set_xlim / set_ylim) to keep one scale across the deck.
+
+USAGE:
+    from austin_batch import SmallMultiples, render_deck, update_fill_between
+
+    def build(fig, ax):
+        # Style the axes once; return the artists that change per entity
+        gap = ax.fill_between([0, 1], [0, 0], [0, 0], color=PALETTE['primary'], alpha=0.08)
+        women, = ax.plot([], [], color=PALETTE['neutral'])
+        men, = ax.plot([], [], color=PALETTE['primary'], linewidth=3)
+        title = ax.text(0, 1.08, '', transform=ax.transAxes, fontsize=14, fontweight='bold')
+        return dict(gap=gap, women=women, men=men, title=title)
+
+    def update(h, ax, key, frame):
+        # Called per entity with whatever you passed as its data
+        h['women'].set_data(frame['Year'], frame['Life expectancy of women'])
+        h['men'].set_data(frame['Year'], frame['Life expectancy of men'])
+        update_fill_between(h['gap'], frame['Year'],
+                            frame['Life expectancy of men'],
+                            frame['Life expectancy of women'])
+        h['title'].set_text(f'Life expectancy gap, {key}')
+
+    items = {country: g for country, g in df.groupby('Entity')}
+    render_deck(build, update, items, 'deck/07_{key}.png',
+                figsize=(12, 6), style=NOTEBOOK_STYLE, workers=4)
+
+build and update must be module-level functions when workers > 1 so
+they can be sent to the worker processes.
+
+Notebook and slide versions of one story from a single data pass:
+
+    def prepare():
+        df = load_dataset('life_expectancy_gender')
+        return df[df['Entity'] == 'Russia'].sort_values('Year')
+
+    def build(russia, profile):
+        fig = Figure(figsize=(12, 6))
+        ax = fig.add_subplot()
+        ...
+        annotate(ax, ..., profile=profile)
+        return fig
+
+    render_variants(prepare, build, ['notebook', 'presentation'], '07_{profile}.png')
+
+"""
+
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from austin_annotations import profile_dpi
+from austin_figures import release_figure
+from austin_layout import full_bbox
+from austin_styles import load_style, profile_style, style_context, NOTEBOOK_STYLE, PRESENTATION_STYLE
+
+
+# ============================================================
+# ARTIST UPDATE HELPERS
+# ============================================================
+
+def update_fill_between(collection, x, y1, y2):
+    """
+    Swap new data into a fill_between collection without recreating it.
+
+    Uses FillBetweenPolyCollection.set_data on Matplotlib >= 3.10 and
+    rebuilds the polygon vertices on older versions.
+    """
+    x = np.asarray(x, dtype=float)
+    y1 = np.broadcast_to(np.asarray(y1, dtype=float), x.shape)
+    y2 = np.broadcast_to(np.asarray(y2, dtype=float), x.shape)
+    if hasattr(collection, 'set_data'):
+        collection.set_data(x, y1, y2)
+        return collection
+    verts = np.concatenate([
+        np.column_stack([x, y1]),
+        np.column_stack([x[::-1], y2[::-1]]),
+    ])
+    collection.set_verts([verts])
+    return collection
+
+
+def slugify(key):
+    """Make an entity name safe for use in a filename."""
+    return re.sub(r'[^A-Za-z0-9]+', '_', str(key)).strip('_') or 'item'
+
+
+# ============================================================
+# TEMPLATE FIGURE
+# ============================================================
+
+class SmallMultiples:
+    """
+    One styled figure reused for every entity in a deck.
+
+    Parameters
+    ----------
+    build : callable
+        build(fig, ax) -> handles. Creates and styles everything once and
+        returns the artists that change per entity (usually a dict).
+    update : callable
+        update(handles, ax, key, data). Swaps one entity's data in.
+    figsize : tuple
+        Figure size in inches. Fixed for the whole deck.
+    style : str or dict, optional
+        'notebook', 'presentation', .mplstyle path, or rcParams dict.
+        See austin_styles.load_style.
+    tight : bool
+        Run tight_layout once on the template instead of
+        bbox_inches='tight' on every export.
+    **savefig_kw : dict
+        Passed to every savefig (defaults: dpi=300, facecolor='white' and
+        the full figure, whatever savefig.bbox the style sets).
+    """
+
+    def __init__(self, build, update, figsize=(12, 6), style=None,
+                 tight=True, **savefig_kw):
+        self.update = update
+        self.rc = load_style(style)
+        self.savefig_kw = dict(dpi=300, facecolor='white')
+        self.savefig_kw.update(savefig_kw)
+
+        with style_context(self.rc):
+            self.fig = Figure(figsize=figsize)
+            FigureCanvasAgg(self.fig)
+            self.ax = self.fig.add_subplot()
+            self.handles = build(self.fig, self.ax)
+            if tight:
+                _tight_once(self.fig)
+        # bbox_inches=None would fall back to the style's savefig.bbox
+        # ('tight' in the kit): a second draw and a size per entity
+        if self.savefig_kw.get('bbox_inches') is None:
+            self.savefig_kw['bbox_inches'] = full_bbox(self.fig)
+
+    def render(self, key, data, path):
+        """Swap in one entity and export it to path. Returns path."""
+        with style_context(self.rc):
+            self.update(self.handles, self.ax, key, data)
+            # set_data does not touch the limits, which still fit the
+            # template's empty artists
+            if self.ax.get_autoscale_on():
+                self.ax.relim()
+                self.ax.autoscale_view()
+            self.fig.savefig(path, **self.savefig_kw)
+        return path
+
+    def render_all(self, items, out):
+        """
+        Render every (key, data) pair in order.
+
+        items can be a dict or an iterable of pairs. out is a path pattern
+        containing '{key}', filled with slugify(key). Raises ValueError if
+        two keys would write the same file.
+        """
+        pairs = list(items.items() if isinstance(items, dict) else items)
+        paths = _out_paths(out, [key for key, _ in pairs])
+        return [self.render(key, data, path) for (key, data), path in zip(pairs, paths)]
+
+    def close(self):
+        """Drop the figure so its renderer buffers can be freed."""
+        release_figure(self.fig)
+        self.handles = None
+
+
+def _tight_once(fig):
+    """tight_layout() without leaving a layout engine that reruns at every save."""
+    try:
+        from matplotlib.layout_engine import TightLayoutEngine
+    except ImportError:
+        # matplotlib < 3.6 keeps no engine after tight_layout()
+        fig.tight_layout()
+    else:
+        TightLayoutEngine().execute(fig)
+
+
+def _out_paths(out, keys):
+    """Output path per key; distinct keys that slugify alike are an error."""
+    paths, seen = [], {}
+    for key in keys:
+        path = out.format(key=slugify(key))
+        if path in seen and seen[path] != key:
+            raise ValueError(f"Keys {seen[path]!r} and {key!r} both write '{path}'; "
+                             f"rename one or put a unique id in the key")
+        seen[path] = key
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        paths.append(path)
+    return paths
+
+
+# ============================================================
+# PARALLEL DECKS
+# ============================================================
+
+# One template per worker process, built by the pool initializer
+_worker_deck = None
+
+
+def _init_worker(build, update, figsize, style, tight, savefig_kw):
+    global _worker_deck
+    _worker_deck = SmallMultiples(build, update, figsize=figsize, style=style,
+                                  tight=tight, **savefig_kw)
+
+
+def _render_chunk(chunk, out):
+    return _worker_deck.render_all(chunk, out)
+
+
+def _chunks(pairs, n):
+    size = max(1, -(-len(pairs) // n))
+    return [pairs[i:i + size] for i in range(0, len(pairs), size)]
+
+
+def render_deck(build, update, items, out, figsize=(12, 6), style=None,
+                tight=True, workers=None, **savefig_kw):
+    """
+    Render one chart per entity from a single template figure.
+
+    Parameters
+    ----------
+    build, update : callable
+        See SmallMultiples.
+    items : dict or iterable of (key, data)
+        One entry per chart.
+    out : str
+        Output path pattern with '{key}', e.g. 'deck/07_{key}.png'.
+    workers : int, optional
+        None or 1 renders in this process. More than 1 splits the deck
+        across that many processes, each building its own template once.
+
+    Returns
+    -------
+    paths : list of str
+        Written files, in item order.
+    """
+    pairs = list(items.items() if isinstance(items, dict) else items)
+    if not workers or workers <= 1 or len(pairs) <= 1:
+        deck = SmallMultiples(build, update, figsize=figsize, style=style,
+                              tight=tight, **savefig_kw)
+        try:
+            return deck.render_all(pairs, out)
+        finally:
+            deck.close()
+
+    # Check every name here: each worker only sees its own chunk
+    _out_paths(out, [key for key, _ in pairs])
+    chunks = _chunks(pairs, workers)
+    with ProcessPoolExecutor(
+        max_workers=min(workers, len(chunks)),
+        initializer=_init_worker,
+        initargs=(build, update, figsize, style, tight, savefig_kw),
+    ) as pool:
+        results = pool.map(_render_chunk, chunks, [out] * len(chunks))
+        return [path for chunk_paths in results for path in chunk_paths]
+
+
+# ============================================================
+# MULTI-TARGET RENDERING
+# ============================================================
+
+def render_variants(prepare, build, profiles=('notebook', 'presentation'),
+                    out='chart_{profile}.png', **savefig_kw):
+    """
+    Load and transform the data once, then export one figure per profile.
+
+    Parameters
+    ----------
+    prepare : callable
+        prepare() -> data. Runs exactly once.
+    build : callable
+        build(data, profile) -> Figure. Runs once per profile inside that
+        profile's style, so rcParams-driven sizes follow the target. Pass
+        profile on to annotate(..., profile=profile) for matching presets.
+    profiles : list of str
+        Any of austin_annotations.SCALE_PROFILES.
+    out : str
+        Output path pattern with '{profile}'.
+    **savefig_kw : dict
+        Passed to savefig (defaults: dpi=300, facecolor='white'). dpi is
+        the notebook resolution; each profile multiplies it by its
+        SCALE_PROFILES 'dpi' factor, so a thumbnail has fewer pixels.
+
+    Returns
+    -------
+    paths : dict
+        profile -> written path.
+    """
+    data = prepare()
+    kwargs = dict(dpi=300, facecolor='white')
+    kwargs.update(savefig_kw)
+    paths = {}
+    for profile in profiles:
+        path = out.format(profile=profile)
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with style_context(profile_style(profile)):
+            fig = build(data, profile)
+            fig.savefig(path, **dict(kwargs, dpi=profile_dpi(profile, kwargs['dpi'])))
+        release_figure(fig)
+        paths[profile] = path
+    return paths
@@ -0,0 +1,481 @@
+"""
+AUSTIN BENCH: Per-phase timings for every chart, against a stored baseline
+===========================================================================
+
+Each chart runs in a fresh interpreter (so imports and peak memory are
+real) with the Agg backend, and its wall time is split into phases:
+
+    imports     numpy / pandas / matplotlib / style kit
+    load        pd.read_csv and austin_data.load_dataset
+    transform   everything between the first load and the first Figure
+    artists     plotting calls after the figure exists
+    layout      tight_layout, story_header, the tight-bbox pre-draw
+    draw        the final Agg draw
+    encode      PNG compression and file write
+
+Targets are graphs/ scripts (run unmodified, saves redirected to a temp
+folder) and chart specs ('graphs/specs/examples.json#0'). The baseline
+lives in graphs/benchmarks/baseline.json; a run compares against it and
+flags phases that got slower than the threshold.
+
+USAGE:
+    python austin_bench.py                      # run all, compare to baseline
+    python austin_bench.py --save               # record a new baseline
+    python austin_bench.py ../graphs/06_heatmap_life_expectancy.py --repeat 5
+    python austin_bench.py --scale 1 10 100     # how each phase grows with data
+
+    from austin_bench import run_benchmarks, compare
+    results = run_benchmarks(repeat=3)
+    for row in compare(results, load_baseline()):
+        print(row['target'], row['phase'], row['change'])
+
+"""
+
+import argparse
+import functools
+import glob
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GRAPHS_DIR = os.path.join(ROOT_DIR, 'graphs')
+SPEC_TABLE = os.path.join(GRAPHS_DIR, 'specs', 'examples.json')
+BASELINE_PATH = os.path.join(GRAPHS_DIR, 'benchmarks', 'baseline.json')
+
+PHASES = ('imports', 'load', 'transform', 'artists', 'layout', 'draw', 'encode')
+
+# A phase is a regression when it is this much slower than the baseline...
+THRESHOLD = 0.25
+# ...and at least this many seconds slower (timer noise on tiny phases)
+NOISE_FLOOR = 0.02
+
+# Environment keys that make timings incomparable when they differ
+ENVIRONMENT_KEYS = ('system', 'machine', 'processor', 'cpus', 'python',
+                    'matplotlib', 'numpy', 'pandas')
+
+
+# ============================================================
+# PHASE TIMER
+# ============================================================
+
+class PhaseTimer:
+    """
+    Exclusive wall time per phase.
+
+    Wrapped calls charge their own time to their phase (nested wrapped
+    calls take theirs out). Time outside any wrapped call goes to the
+    background phase, which only moves forward: imports -> transform
+    after the first load -> artists once a Figure exists. Time in the
+    'setup' phase (generating synthetic data) is left out of the totals.
+    """
+
+    def __init__(self):
+        self.totals = dict.fromkeys(PHASES + ('setup',), 0.0)
+        self.background = 'imports'
+        self._stack = []
+        self._mark = time.perf_counter()
+
+    def _charge(self):
+        now = time.perf_counter()
+        self.totals[self._stack[-1] if self._stack else self.background] += now - self._mark
+        self._mark = now
+
+    def enter(self, phase):
+        self._charge()
+        self._stack.append(phase)
+
+    def exit(self):
+        self._charge()
+        self._stack.pop()
+
+    def advance(self, phase):
+        if PHASES.index(phase) > PHASES.index(self.background):
+            self._charge()
+            self.background = phase
+
+    def finish(self):
+        self._charge()
+        return {p: self.totals[p] for p in PHASES}
+
+    def wrap(self, owner, name, phase, then=None):
+        """Replace owner.name with a timed version; then= advances the background."""
+        original = getattr(owner, name)
+
+        @functools.wraps(original)
+        def timed(*args, **kwargs):
+            # A draw inside layout (the tight-bbox pre-draw) is layout work
+            current = 'layout' if phase == 'draw' and self._stack[-1:] == ['layout'] else phase
+            self.enter(current)
+            try:
+                return original(*args, **kwargs)
+            finally:
+                self.exit()
+                if then:
+                    self.advance(then)
+
+        setattr(owner, name, timed)
+
+
+def _instrument(timer, scale=1):
+    import pandas as pd
+    from matplotlib.backend_bases import FigureCanvasBase
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    if scale > 1:
+        import austin_synth
+        timer.wrap(austin_synth, 'synthesize_panel', 'setup')
+        read_csv = pd.read_csv
+
+        @functools.wraps(read_csv)
+        def scaled_read_csv(*args, **kwargs):
+            return austin_synth.synthesize_panel(read_csv(*args, **kwargs), scale, steps_per_year=scale)
+
+        pd.read_csv = scaled_read_csv
+
+    timer.wrap(pd, 'read_csv', 'load', then='transform')
+    timer.wrap(Figure, '__init__', 'artists', then='artists')
+    timer.wrap(Figure, 'tight_layout', 'layout')
+    timer.wrap(Figure, 'draw', 'draw')
+    timer.wrap(Figure, 'savefig', 'encode')
+    timer.wrap(FigureCanvasBase, 'print_figure', 'layout')
+    timer.wrap(FigureCanvasAgg, 'print_png', 'encode')
+
+    import austin_data
+    import austin_layout
+    timer.wrap(austin_data, 'load_dataset', 'load', then='transform')
+    timer.wrap(austin_layout, 'story_header', 'layout')
+
+    # Points per drawn figure, counted under 'setup' so no phase pays for it
+    # (counted at draw time: spec renders clear their figure right after)
+    drawn = {}
+    draw = Figure.draw
+
+    @functools.wraps(draw)
+    def recorded_draw(self, *args, **kwargs):
+        result = draw(self, *args, **kwargs)
+        timer.enter('setup')
+        try:
+            drawn[id(self)] = _data_points(self)
+        finally:
+            timer.exit()
+        return result
+
+    Figure.draw = recorded_draw
+    return drawn
+
+
+def _data_points(fig):
+    """Data points a figure draws: line vertices, markers, image cells, patches."""
+    from matplotlib.collections import Collection
+    from matplotlib.image import AxesImage
+    from matplotlib.lines import Line2D
+    from matplotlib.patches import Patch
+
+    points = 0
+    for ax in fig.axes:
+        for artist in ax.get_children():
+            if isinstance(artist, Line2D):
+                points += len(artist.get_xydata())
+            elif isinstance(artist, Collection):
+                points += max(len(artist.get_offsets()),
+                              sum(len(path.vertices) for path in artist.get_paths()))
+            elif isinstance(artist, AxesImage):
+                points += artist.get_array().size
+            elif isinstance(artist, Patch) and artist is not ax.patch:
+                points += 1
+    return points
+
+
+def _run_child(target, scale, result_path):
+    """Benchmark one target in this (fresh) process and write JSON."""
+    timer = PhaseTimer()
+    import numpy  # noqa: F401
+    import pandas  # noqa: F401
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    import warnings
+    warnings.filterwarnings('ignore')
+    drawn = _instrument(timer, scale)
+
+    out_dir = tempfile.mkdtemp(prefix='austin_bench_')
+    error = None
+    try:
+        if '#' in target:
+            import austin_specs
+            timer.wrap(austin_specs, 'load_dataset', 'load', then='transform')
+            table, index = target.rsplit('#', 1)
+            spec = austin_specs.load_specs(os.path.join(ROOT_DIR, table))[int(index)]
+            austin_specs.render_spec(spec, path=os.path.join(out_dir, 'spec.png'))
+        else:
+            import contextlib
+            import io
+            import runpy
+            from austin_regression import redirected_saves
+            with redirected_saves(out_dir, full_figure=False), contextlib.redirect_stdout(io.StringIO()):
+                runpy.run_path(os.path.join(ROOT_DIR, target), run_name='__main__')
+    except Exception as exc:
+        error = _relative(f'{type(exc).__name__}: {exc}')
+    phases = timer.finish()
+    points = sum(drawn.values())
+    plt.close('all')
+
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    rss_mb = rss / 2**20 if sys.platform == 'darwin' else rss / 2**10
+    with open(result_path, 'w', encoding='utf-8') as f:
+        json.dump(dict(phases=phases, total=sum(phases.values()),
+                       rss_mb=rss_mb, points=points, error=error), f)
+
+
+# ============================================================
+# RUNNING
+# ============================================================
+
+def bench_targets(*paths, specs=True):
+    """
+    Targets relative to the repo root.
+
+    Default: graphs/*.py, graphs/ugly/*.py and every spec in
+    graphs/specs/examples.json.
+    """
+    if not paths:
+        paths = (GRAPHS_DIR, os.path.join(GRAPHS_DIR, 'ugly'))
+        if specs and os.path.isfile(SPEC_TABLE):
+            paths += (SPEC_TABLE,)
+    targets = []
+    for path in paths:
+        if '#' in path:
+            targets.append(path)
+        elif path.endswith(('.json', '.jsonl', '.yaml', '.yml')):
+            from austin_specs import load_specs
+            rel = os.path.relpath(os.path.abspath(path), ROOT_DIR)
+            targets += [f'{rel}#{i}' for i in range(len(load_specs(path)))]
+        elif os.path.isfile(path):
+            targets.append(os.path.relpath(os.path.abspath(path), ROOT_DIR))
+        else:
+            targets += [os.path.relpath(p, ROOT_DIR)
+                        for p in sorted(glob.glob(os.path.join(os.path.abspath(path), '*.py')))]
+    return targets
+
+
+def bench_once(target, scale=1):
+    """Run one target in a fresh interpreter and return its timings."""
+    fd, result_path = tempfile.mkstemp(suffix='.json')
+    os.close(fd)
+    env = dict(os.environ, MPLBACKEND='Agg', PYTHONHASHSEED='0')
+    try:
+        proc = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--child', target,
+             '--scale', str(scale), '--result', result_path],
+            cwd=ROOT_DIR, env=env, capture_output=True, text=True)
+        try:
+            with open(result_path, encoding='utf-8') as f:
+                return json.load(f)
+        except ValueError:
+            return dict(phases=dict.fromkeys(PHASES, 0.0), total=0.0, rss_mb=0.0, points=0,
+                        error=_relative(proc.stderr.strip().splitlines()[-1]) if proc.stderr
+                        else 'no result')
+    finally:
+        os.remove(result_path)
+
+
+def _relative(message):
+    """Message with repo paths made relative, so baselines match across checkouts."""
+    return message.replace(ROOT_DIR + os.sep, '')
+
+
+def _median(values):
+    values = sorted(values)
+    mid = len(values) // 2
+    return values[mid] if len(values) % 2 else (values[mid - 1] + values[mid]) / 2
+
+
+def bench_target(target, repeat=3, scale=1):
+    """Median of repeat runs, phase by phase."""
+    runs = [bench_once(target, scale) for _ in range(repeat)]
+    phases = {p: round(_median([r['phases'][p] for r in runs]), 4) for p in PHASES}
+    return dict(phases=phases, total=round(sum(phases.values()), 4),
+                rss_mb=round(max(r['rss_mb'] for r in runs), 1),
+                points=max(r.get('points', 0) for r in runs),
+                error=next((r['error'] for r in runs if r['error']), None))
+
+
+def run_benchmarks(*targets, repeat=3, scale=1, verbose=False):
+    """
+    Benchmark targets one after another (never in parallel, so runs do
+    not compete for cores or memory bandwidth).
+
+    Returns
+    -------
+    results : dict
+        target -> {'phases', 'total', 'rss_mb', 'points', 'error'}.
+    """
+    results = {}
+    for target in targets or bench_targets():
+        results[target] = bench_target(target, repeat=repeat, scale=scale)
+        if verbose:
+            print(format_row(target, results[target]), flush=True)
+    return results
+
+
+# ============================================================
+# BASELINE AND REPORT
+# ============================================================
+
+def _environment():
+    import matplotlib
+    import numpy
+    import pandas
+    return dict(python=platform.python_version(), system=platform.system(),
+                machine=platform.machine(),
+                processor=platform.processor(), cpus=os.cpu_count(),
+                matplotlib=matplotlib.__version__, numpy=numpy.__version__,
+                pandas=pandas.__version__)
+
+
+def save_baseline(results, path=BASELINE_PATH, repeat=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    payload = dict(environment=_environment(), repeat=repeat, results=results)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+        f.write('\n')
+    return path
+
+
+def environment_changes(baseline):
+    """
+    Where this machine differs from the one the baseline was recorded on.
+
+    Returns {key: (baseline value, current value)} over ENVIRONMENT_KEYS;
+    empty when the timings are comparable.
+    """
+    recorded = (baseline or {}).get('environment', {})
+    current = _environment()
+    return {key: (recorded.get(key), current[key]) for key in ENVIRONMENT_KEYS
+            if recorded.get(key) != current[key]}
+
+
+def load_baseline(path=BASELINE_PATH):
+    """The stored baseline payload, or None if there is none yet."""
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except OSError:
+        return None
+
+
+def compare(results, baseline, threshold=THRESHOLD, noise_floor=NOISE_FLOOR):
+    """
+    Phases (and peak RSS) that regressed against the baseline.
+
+    Returns
+    -------
+    regressions : list of dict
+        'target', 'phase', 'baseline', 'current' and 'change' (fraction).
+    """
+    regressions = []
+    for target, current in results.items():
+        base = (baseline or {}).get('results', {}).get(target)
+        if not base or current['error'] or base['error']:
+            continue
+        pairs = [(p, base['phases'][p], current['phases'][p]) for p in PHASES]
+        pairs += [('total', base['total'], current['total'])]
+        for phase, old, new in pairs:
+            if new - old > noise_floor and new > old * (1 + threshold):
+                regressions.append(dict(target=target, phase=phase, baseline=old,
+                                        current=new, change=new / max(old, 1e-9) - 1))
+        if current['rss_mb'] > base['rss_mb'] * (1 + threshold):
+            regressions.append(dict(target=target, phase='rss_mb', baseline=base['rss_mb'],
+                                    current=current['rss_mb'],
+                                    change=current['rss_mb'] / base['rss_mb'] - 1))
+    return regressions
+
+
+def format_header():
+    return f"{'target':<44}" + ''.join(f'{p:>10}' for p in PHASES) + f"{'total':>9}{'rss MB':>9}"
+
+
+def format_row(target, result):
+    if result['error']:
+        return f'{target:<44}  ERROR {result["error"]}'
+    return (f'{target:<44}' + ''.join(f'{result["phases"][p]:>10.3f}' for p in PHASES)
+            + f'{result["total"]:>9.3f}{result["rss_mb"]:>9.0f}')
+
+
+def scaling_report(targets, scales=(1, 10, 100), repeat=1):
+    """
+    Replay each target on synthetic datasets scale times the size
+    (see austin_synth.synthesize_panel). Each dataset gets scale times
+    the entities and scale steps per year, so a chart filtered to a few
+    entities still draws more points; the points column shows how much.
+
+    Returns
+    -------
+    table : dict
+        target -> {scale: result}.
+    """
+    table = {}
+    for target in targets:
+        table[target] = {}
+        for scale in scales:
+            table[target][scale] = bench_target(target, repeat=repeat, scale=scale)
+            result = table[target][scale]
+            print(format_row(f'{target} x{scale}', result)
+                  + ('' if result['error'] else f"{result['points']:>11,}"), flush=True)
+    return table
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Per-phase benchmarks for the chart scripts and specs.')
+    parser.add_argument('targets', nargs='*', help='scripts, folders, spec tables or table.json#N')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--threshold', type=float, default=THRESHOLD)
+    parser.add_argument('--save', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--baseline', default=BASELINE_PATH)
+    parser.add_argument('--scale', type=int, nargs='+', default=None,
+                        help='scaling mode: dataset multipliers, e.g. 1 10 100')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    parser.add_argument('--result', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        _run_child(args.child, args.scale[0] if args.scale else 1, args.result)
+        sys.exit(0)
+
+    targets = bench_targets(*args.targets)
+    if args.scale:
+        print(format_header() + f"{'points':>11}")
+        scaling_report(targets, args.scale, repeat=args.repeat)
+        sys.exit(0)
+
+    print(format_header())
+    results = run_benchmarks(*targets, repeat=args.repeat, verbose=True)
+    if args.save:
+        print(f'\nSaved baseline: {save_baseline(results, args.baseline, args.repeat)}')
+        sys.exit(0)
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        print(f'\nNo baseline at {args.baseline}; run with --save to record one.')
+        sys.exit(0)
+    changes = environment_changes(baseline)
+    if changes:
+        print('\nBaseline was recorded on a different setup; timings may not be comparable:')
+        for key, (old, new) in changes.items():
+            print(f'  {key}: {old} -> {new}')
+    regressions = compare(results, baseline, threshold=args.threshold)
+    for r in regressions:
+        print(f"REGRESSION {r['target']} {r['phase']}: {r['baseline']:.3f} -> "
+              f"{r['current']:.3f} (+{r['change']:.0%})")
+    print(f'\n{len(regressions)} regression(s) vs {args.baseline}')
+    sys.exit(1 if regressions else 0)
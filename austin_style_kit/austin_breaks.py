@@ -0,0 +1,329 @@
+"""
+AUSTIN BREAKS: Where a trend bends, found for every series at once
+===================================================================
+
+03 hard-codes split_year = 1980 ("acceleration begins") and 07 hard-codes
+1991 for the Soviet collapse. This module finds such years from the data.
+Each series is fitted as a line plus one change, and every possible year
+of every series is tried in the same array operation:
+
+  - 'hinge'   the slope changes but the line stays joined (03's climb),
+  - 'step'    the level jumps and the slope carries on (a shock, 07's drop).
+
+For a candidate year the fit needs only weighted sums (a 3 x 3 Gram
+matrix per series and year), so all of them come from two matrix products
+and one batched np.linalg.solve. Missing years are weights of zero.
+Several breaks per series come from the lowest points of the error
+profile, kept at least min_gap years apart.
+
+Each break carries its effect size: the slopes on each side, the change
+(slope per year for a hinge, level for a step), the fitted value at the
+break (an annotation anchor) and gain, the share of the straight line's
+squared error that the break removes.
+
+USAGE:
+    from austin_breaks import find_breaks, panel_breaks, break_year
+    from austin_lines import plot_split
+
+    year = break_year(world['Year'], world['Average'])          # ~1970s
+    plot_split(ax, world['Year'], world['Average'], at=year)
+
+    # Every country's women-minus-men life expectancy gap
+    breaks = panel_breaks('life_expectancy_gender',
+                          ('Life expectancy of women', 'Life expectancy of men'),
+                          model='step')
+    breaks.head()
+
+    spec['highlights'] = [as_highlight(breaks.iloc[0])]          # austin_specs
+
+    python austin_breaks.py life_expectancy_gender "Life expectancy of men" --model step
+    python austin_breaks.py --bench
+
+"""
+
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from austin_data import load_dataset, panel_columns
+from austin_insights import _countries, panel_matrix
+
+
+MODELS = ('hinge', 'step')
+
+# Fewest observed years allowed on either side of a break
+MIN_SEGMENT = 5
+# Breaks found in one series are at least this many years apart
+MIN_GAP = 10
+
+
+# ============================================================
+# BATCHED FITS
+# ============================================================
+
+def _design(t, taus, model):
+    """Columns [1, t, change at tau] for every candidate: (K, T, 3)."""
+    t = np.broadcast_to(t, (len(taus), len(t)))
+    if model == 'hinge':
+        change = np.maximum(t - taus[:, None], 0.0)
+    else:
+        change = (t >= taus[:, None]).astype(float)
+    return np.stack([np.ones_like(t), t, change], axis=-1)
+
+
+def _solve(gram, rhs):
+    """Batched normal equations; singular systems get NaN coefficients."""
+    size = gram.shape[-1]
+    det = np.linalg.det(gram)
+    bad = ~(np.abs(det) > 1e-9)
+    gram = np.where(bad[..., None, None], np.eye(size), gram)
+    beta = np.linalg.solve(gram, rhs[..., None])[..., 0]
+    beta[bad] = np.nan
+    return beta
+
+
+def _fit_profile(values, years, model, min_segment):
+    """
+    Squared error of the break model at every candidate year of every series.
+
+    Returns rss (S, K), coefficients (S, K, 3), the straight-line rss (S,),
+    the candidate years (K,) and the centring offset.
+    """
+    observed = ~np.isnan(values)
+    w = observed.astype(float)
+    y = np.where(observed, values, 0.0)
+    years = np.asarray(years, dtype=float)
+    # Centred time keeps the Gram matrices well conditioned
+    offset = years.mean()
+    t = years - offset
+    taus = t[min_segment - 1:len(t) - min_segment + 1]
+    X = _design(t, taus, model)                                   # (K, T, 3)
+    K, T, P = X.shape
+
+    # Gram and right-hand side for every (series, candidate) from two matmuls
+    products = (X[..., :, None] * X[..., None, :]).transpose(1, 0, 2, 3).reshape(T, K * P * P)
+    gram = (w @ products).reshape(len(values), K, P, P)
+    rhs = ((w * y) @ X.transpose(1, 0, 2).reshape(T, K * P)).reshape(len(values), K, P)
+    beta = _solve(gram, rhs)
+    yy = np.sum(w * y * y, axis=1)
+    rss = yy[:, None] - np.einsum('skp,skp->sk', beta, rhs)
+
+    # Both sides of the break need min_segment observed years
+    before = w @ (t[:, None] < taus[None, :]).astype(float)
+    after = w @ (t[:, None] >= taus[None, :]).astype(float)
+    if model == 'hinge':
+        # the break year itself belongs to both segments of a joined line
+        before = before + w @ (t[:, None] == taus[None, :]).astype(float)
+    rss[(before < min_segment) | (after < min_segment) | np.isnan(rss)] = np.inf
+
+    line = _design(t, taus[:1], model)[0, :, :2]                   # (T, 2)
+    line_gram = (w @ (line[:, :, None] * line[:, None, :]).reshape(T, 4)).reshape(-1, 2, 2)
+    line_rhs = (w * y) @ line
+    line_beta = _solve(line_gram, line_rhs)
+    line_rss = yy - np.sum(line_beta * line_rhs, axis=1)
+    return np.maximum(rss, 0.0), beta, np.maximum(line_rss, 0.0), taus, offset
+
+
+def find_breaks(values, years, model='hinge', n=1, min_segment=MIN_SEGMENT,
+                min_gap=MIN_GAP):
+    """
+    The best break years of many series on a shared year axis.
+
+    Parameters
+    ----------
+    values : array (series, years)
+        NaN where a series has no value (see austin_insights.panel_matrix).
+    years : array
+        Sorted year axis.
+    model : str
+        'hinge' (slope change) or 'step' (level shift).
+    n : int
+        Breaks per series, best first.
+    min_segment : int
+        Observed years required on either side of a break.
+    min_gap : int
+        Years between two breaks of the same series.
+
+    Returns
+    -------
+    breaks : DataFrame
+        One row per series and break: 'series' (row index), 'rank',
+        'year', 'level' (fitted value at the break), 'slope_before',
+        'slope_after', 'change' (slope per year for a hinge, level for a
+        step), 'gain' (share of the straight line's squared error removed).
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unknown model '{model}'. Choose from: {list(MODELS)}")
+    values = np.atleast_2d(np.asarray(values, dtype=float))
+    years = np.asarray(years)
+    columns = ['series', 'rank', 'year', 'level', 'slope_before', 'slope_after', 'change', 'gain']
+    if len(years) < 2 * min_segment:
+        return pd.DataFrame(columns=columns)
+    rss, beta, line_rss, taus, offset = _fit_profile(values, years, model, min_segment)
+
+    rows = []
+    profile = rss.copy()
+    series = np.arange(len(values))
+    for rank in range(n):
+        k = np.argmin(profile, axis=1)
+        best = profile[series, k]
+        found = np.isfinite(best)
+        if not found.any():
+            break
+        s, k = series[found], k[found]
+        a, b, c = beta[s, k].T
+        tau = taus[k]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            gain = np.where(line_rss[s] > 0, 1 - rss[s, k] / line_rss[s], 0.0)
+        if model == 'hinge':
+            level, after, change = a + b * tau, b + c, c
+        else:
+            level, after, change = a + b * tau + c, b, c
+        rows.append(pd.DataFrame({
+            'series': s, 'rank': rank + 1, 'year': tau + offset, 'level': level,
+            'slope_before': b, 'slope_after': after, 'change': change,
+            'gain': np.clip(gain, 0.0, 1.0)}))
+        # Later breaks must keep their distance from this one
+        near = np.abs(taus[None, :] - tau[:, None]) < min_gap
+        profile[s] = np.where(near, np.inf, profile[s])
+
+    if not rows:
+        return pd.DataFrame(columns=columns)
+    breaks = pd.concat(rows, ignore_index=True)
+    if np.issubdtype(years.dtype, np.integer):
+        breaks['year'] = breaks['year'].round().astype(int)
+    return breaks.sort_values(['series', 'rank'], kind='stable').reset_index(drop=True)
+
+
+def break_year(x, y, model='hinge', min_segment=MIN_SEGMENT):
+    """The single best break year of one series (None if it is too short)."""
+    order = np.argsort(np.asarray(x))
+    x = np.asarray(x)[order]
+    y = np.asarray(y, dtype=float)[order]
+    breaks = find_breaks(y[None, :], x, model=model, min_segment=min_segment)
+    return breaks['year'].iloc[0] if len(breaks) else None
+
+
+# ============================================================
+# PANELS
+# ============================================================
+
+def panel_breaks(df_or_name, column, model='hinge', n=1, min_segment=MIN_SEGMENT,
+                 min_gap=MIN_GAP, countries_only=True):
+    """
+    Break years for every entity of a panel, strongest first.
+
+    Parameters
+    ----------
+    df_or_name : DataFrame or str
+        A panel or a dataset name for austin_data.load_dataset.
+    column : str or (str, str)
+        Value column, or two columns whose difference is analysed
+        (e.g. women's minus men's life expectancy).
+    countries_only : bool
+        Leave out aggregates when the data has ISO codes.
+
+    Returns
+    -------
+    breaks : DataFrame
+        find_breaks columns with 'entity' in place of 'series', sorted by
+        gain.
+    """
+    df = load_dataset(df_or_name) if isinstance(df_or_name, str) else df_or_name
+    entity, year = panel_columns(df)
+    if countries_only:
+        df = _countries(df, entity)
+    if isinstance(column, str):
+        values, entities, years = panel_matrix(df, column, entity, year)
+    else:
+        first, second = column
+        values, entities, years = panel_matrix(df, first, entity, year)
+        other, other_entities, other_years = panel_matrix(df, second, entity, year)
+        if not (np.array_equal(entities, other_entities) and np.array_equal(years, other_years)):
+            other = pd.DataFrame(other, index=other_entities, columns=other_years).reindex(
+                index=entities, columns=years).to_numpy()
+        values = values - other
+    breaks = find_breaks(values, years, model=model, n=n, min_segment=min_segment,
+                         min_gap=min_gap)
+    breaks.insert(0, 'entity', entities[breaks.pop('series').to_numpy(dtype=int)])
+    return breaks.sort_values('gain', ascending=False, kind='stable').reset_index(drop=True)
+
+
+# ============================================================
+# CHART HOOKS
+# ============================================================
+
+def _year(row):
+    # numpy scalars do not survive json.dump into a spec file
+    year = row['year']
+    return year.item() if hasattr(year, 'item') else year
+
+
+def as_highlight(row, color='primary'):
+    """A break as an austin_specs highlight: colour the line from its year on."""
+    return {'from': _year(row), 'color': color}
+
+
+def as_annotation(row, text=None, xytext=None):
+    """
+    A break as an austin_specs annotation anchored at its year.
+
+    The default text reads like 03's: 'Acceleration begins around 1980'.
+    """
+    if text is None:
+        if 'slope_before' in row and row['slope_after'] != row['slope_before'] and \
+                np.sign(row['slope_after']) == np.sign(row['slope_before']) and \
+                abs(row['slope_after']) > abs(row['slope_before']):
+            text = f"Acceleration begins around {_year(row)}"
+        else:
+            text = f"Trend changes around {_year(row)}"
+    note = {'text': text, 'at': _year(row)}
+    if xytext is not None:
+        note['xytext'] = list(xytext)
+    return note
+
+
+def _synthetic(series=250, years=75, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(years, dtype=float)
+    taus = rng.integers(MIN_SEGMENT, years - MIN_SEGMENT, series)
+    slopes = rng.normal(0, 1, (series, 2))
+    values = slopes[:, :1] * t + (slopes[:, 1:] - slopes[:, :1]) * np.maximum(t - taus[:, None], 0)
+    values += rng.normal(0, 1, values.shape)
+    values[rng.random(values.shape) < 0.1] = np.nan
+    return values, np.arange(1950, 1950 + years), taus + 1950
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Find trend breaks across every entity of a panel.')
+    parser.add_argument('dataset', nargs='?', default='temperature_anomaly')
+    parser.add_argument('columns', nargs='*', help='value column, or two columns to difference')
+    parser.add_argument('--model', choices=MODELS, default='hinge')
+    parser.add_argument('-n', type=int, default=1, help='breaks per entity')
+    parser.add_argument('--top', type=int, default=15)
+    parser.add_argument('--aggregates', action='store_true', help='keep World, regions, etc.')
+    parser.add_argument('--bench', action='store_true', help='time 250 synthetic series instead')
+    args = parser.parse_args()
+
+    if args.bench:
+        values, years, truth = _synthetic()
+        start = time.perf_counter()
+        breaks = find_breaks(values, years, model='hinge')
+        elapsed = time.perf_counter() - start
+        error = np.abs(breaks['year'].to_numpy() - truth[breaks['series'].to_numpy()])
+        print(f'{len(values)} series x {len(years)} years: {elapsed * 1000:.0f} ms, '
+              f'median error {np.median(error):.0f} years')
+    else:
+        df = load_dataset(args.dataset)
+        if args.columns:
+            column = args.columns[0] if len(args.columns) == 1 else tuple(args.columns[:2])
+        else:
+            column = [c for c in df.select_dtypes('number').columns if c not in panel_columns(df)][0]
+        start = time.perf_counter()
+        breaks = panel_breaks(df, column, model=args.model, n=args.n,
+                              countries_only=not args.aggregates)
+        elapsed = time.perf_counter() - start
+        print(breaks.head(args.top).to_string(index=False, float_format=lambda v: f'{v:.3g}'))
+        print(f"{breaks['entity'].nunique()} entities in {elapsed * 1000:.0f} ms")
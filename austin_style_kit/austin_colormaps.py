@@ -19,10 +19,13 @@ USAGE:
 
 """
 
-import matplotlib.pyplot as plt
+import matplotlib as mpl
 import matplotlib.colors as mcolors
 import numpy as np
 
+from austin_instrument import enable_from_env, trace_module
+from austin_styles import new_figure
+
 
 # ============================================================
 # COLOR DEFINITIONS (High Contrast Palette)
@@ -152,7 +155,8 @@ austin_diverging_green = mcolors.LinearSegmentedColormap.from_list(
 def register_cmaps():
     """
     Register Austin colormaps with matplotlib so you can use them by string name.
-    Uses plt.register_cmap for broad compatibility across Matplotlib versions.
+    Uses the colormap registry where it exists (Matplotlib 3.5+) and
+    falls back to cm.register_cmap on older versions.
     """
     cmaps_to_register = [
         ('austin', austin_cmap),
@@ -166,7 +170,10 @@ def register_cmaps():
 
     for name, cmap in cmaps_to_register:
         try:
-            plt.register_cmap(name=name, cmap=cmap)
+            if hasattr(mpl, 'colormaps'):
+                mpl.colormaps.register(cmap, name=name)
+            else:
+                mpl.cm.register_cmap(name=name, cmap=cmap)
         except Exception:
             # Already registered or other registration issue — ignore
             pass
@@ -217,8 +224,16 @@ def get_n_colors(n, cmap=austin_cmap):
     return [mcolors.to_hex(cmap(i / (n - 1))) for i in range(n)]
 
 
-def show_colormaps():
-    """Display all Austin colormaps (robust when there is only one axis)."""
+def _figure(fig, figsize):
+    """The given (e.g. pyplot) figure resized, or a new one on an Agg canvas."""
+    if fig is None:
+        return new_figure(figsize=figsize)
+    fig.set_size_inches(figsize)
+    return fig
+
+
+def colormaps_figure(fig=None):
+    """Gradient strip per Austin colormap. Built without pyplot unless fig is given."""
     cmaps_to_show = [
         ('austin (sequential)', austin_cmap),
         ('austin_r (reversed)', austin_cmap_r),
@@ -229,9 +244,9 @@ def show_colormaps():
     ]
 
     n = len(cmaps_to_show)
-    fig, axes = plt.subplots(n, 1, figsize=(10, n * 0.6 + 1))
+    fig = _figure(fig, (10, n * 0.6 + 1))
     # Ensure axes is always iterable (even when n == 1)
-    axes = np.atleast_1d(axes)
+    axes = np.atleast_1d(fig.subplots(n, 1))
 
     fig.suptitle('Austin Colormaps', fontsize=14, fontweight='bold')
     gradient = np.linspace(0, 1, 256).reshape(1, -1)
@@ -242,30 +257,45 @@ def show_colormaps():
         ax.set_xticks([])
         ax.set_yticks([])
 
-    plt.tight_layout()
-    plt.show()
+    fig.tight_layout()
+    return fig
 
-def show_colormap_demo():
-    """Show colormaps in realistic heatmap context."""
-    
-    np.random.seed(42)
-    data_seq = np.random.rand(8, 10) * 100
-    data_div = np.random.randn(8, 8)
+
+def colormap_demo_figure(fig=None):
+    """Colormaps in a realistic heatmap context. Built without pyplot unless fig is given."""
+    rng = np.random.RandomState(42)
+    data_seq = rng.rand(8, 10) * 100
+    data_div = rng.randn(8, 8)
     data_div = (data_div + data_div.T) / 2  # Make symmetric
-    
-    fig, axes = plt.subplots(1, 2, figsize=(12, 5))
-    
+
+    fig = _figure(fig, (12, 5))
+    axes = fig.subplots(1, 2)
+
     # Sequential
     im1 = axes[0].imshow(data_seq, cmap=austin_cmap, aspect='auto')
     axes[0].set_title('Sequential: austin_cmap', fontsize=12, fontweight='bold')
-    plt.colorbar(im1, ax=axes[0], label='Value (%)')
-    
+    fig.colorbar(im1, ax=axes[0], label='Value (%)')
+
     # Diverging
     im2 = axes[1].imshow(data_div, cmap=austin_diverging, aspect='auto', vmin=-2, vmax=2)
     axes[1].set_title('Diverging: austin_diverging', fontsize=12, fontweight='bold')
-    plt.colorbar(im2, ax=axes[1], label='Value')
-    
-    plt.tight_layout()
+    fig.colorbar(im2, ax=axes[1], label='Value')
+
+    fig.tight_layout()
+    return fig
+
+
+def show_colormaps():
+    """Display all Austin colormaps (robust when there is only one axis)."""
+    import matplotlib.pyplot as plt
+    colormaps_figure(plt.figure())
+    plt.show()
+
+
+def show_colormap_demo():
+    """Show colormaps in realistic heatmap context."""
+    import matplotlib.pyplot as plt
+    colormap_demo_figure(plt.figure())
     plt.show()
 
 
@@ -322,6 +352,11 @@ USAGE:
 """
 
 
+# Call counts and timings when AUSTIN_PROFILE is set (see austin_instrument)
+trace_module(globals(), 'austin_colormaps')
+enable_from_env()
+
+
 if __name__ == '__main__':
     print(COLORMAP_GUIDE)
     show_colormaps()
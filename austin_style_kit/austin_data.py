@@ -0,0 +1,153 @@
+"""
+AUSTIN DATA: Cached access to the bundled datasets
+===================================================
+
+Every graphs/ script builds its own path to datasets/ and re-reads the CSV.
+These helpers load each dataset once per process, apply declarative row
+filters, and find the entity/year columns of a panel regardless of how the
+source spells them ('Entity' vs 'entity' vs 'Country').
+
+USAGE:
+    from austin_data import load_dataset, filter_frame, panel_columns
+
+    df = load_dataset('temperature_anomaly')
+    world = filter_frame(df, {'Entity': 'World', 'Year': {'>=': 1900}})
+
+    entity, year = panel_columns(df)   # ('Entity', 'Year')
+
+Frames returned by load_dataset are shared across callers: copy before
+mutating them.
+
+"""
+
+import os
+from functools import lru_cache
+
+import pandas as pd
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATASET_DIR = os.path.join(ROOT_DIR, 'datasets')
+
+ENTITY_COLUMNS = ('Entity', 'entity', 'Country', 'country')
+YEAR_COLUMNS = ('Year', 'year')
+
+# Filter operators accepted inside a per-column dict
+OPERATORS = {
+    '==': lambda s, v: s == v,
+    '!=': lambda s, v: s != v,
+    '>': lambda s, v: s > v,
+    '>=': lambda s, v: s >= v,
+    '<': lambda s, v: s < v,
+    '<=': lambda s, v: s <= v,
+    'in': lambda s, v: s.isin(v),
+    'not in': lambda s, v: ~s.isin(v),
+    'notna': lambda s, v: s.notna() if v else s.isna(),
+}
+
+
+# ============================================================
+# LOADING
+# ============================================================
+
+def list_datasets():
+    """Names of the CSV files in datasets/ (without extension)."""
+    return sorted(f[:-4] for f in os.listdir(DATASET_DIR) if f.endswith('.csv'))
+
+
+def dataset_path(name):
+    """Absolute path for a dataset name, a file name, or a path."""
+    if os.path.isfile(name):
+        return os.path.abspath(name)
+    filename = name if name.endswith('.csv') else f'{name}.csv'
+    path = os.path.join(DATASET_DIR, filename)
+    if not os.path.isfile(path):
+        raise ValueError(f"Unknown dataset '{name}'. Choose from: {list_datasets()}")
+    return path
+
+
+@lru_cache(maxsize=None)
+def _read(path, mtime):
+    # mtime is part of the cache key so an edited file is re-read
+    return pd.read_csv(path)
+
+
+def load_dataset(name):
+    """Load a dataset once per process. Treat the result as read-only."""
+    path = dataset_path(name)
+    return _read(path, os.path.getmtime(path))
+
+
+def clear_cache():
+    """Forget every loaded dataset."""
+    _read.cache_clear()
+
+
+# ============================================================
+# FILTERING
+# ============================================================
+
+def filter_frame(df, filters):
+    """
+    Select rows with a declarative filter dict.
+
+    Parameters
+    ----------
+    df : DataFrame
+    filters : dict
+        column -> condition, all combined with AND. A condition is
+        a scalar (equality), a list (membership), or a dict of
+        operator -> value using any of OPERATORS, e.g.
+        {'Year': {'>=': 1990, '<=': 2015}, 'Code': {'notna': True}}.
+
+    Returns
+    -------
+    DataFrame
+    """
+    if not filters:
+        return df
+    mask = pd.Series(True, index=df.index)
+    for column, condition in filters.items():
+        if column not in df.columns:
+            raise ValueError(f"Unknown column '{column}'. Choose from: {list(df.columns)}")
+        series = df[column]
+        if isinstance(condition, dict):
+            for op, value in condition.items():
+                if op not in OPERATORS:
+                    raise ValueError(f"Unknown operator '{op}'. Choose from: {list(OPERATORS)}")
+                mask &= OPERATORS[op](series, value)
+        elif isinstance(condition, (list, tuple, set)):
+            mask &= series.isin(list(condition))
+        else:
+            mask &= series == condition
+    return df[mask]
+
+
+# ============================================================
+# PANEL HELPERS
+# ============================================================
+
+def _first_present(df, candidates):
+    for name in candidates:
+        if name in df.columns:
+            return name
+    return None
+
+
+def panel_columns(df):
+    """
+    (entity column, year column) of an entity-year panel.
+
+    Raises ValueError if the frame has no recognisable entity or year column.
+    """
+    entity = _first_present(df, ENTITY_COLUMNS)
+    year = _first_present(df, YEAR_COLUMNS)
+    if entity is None or year is None:
+        raise ValueError(f"Not an entity-year panel: columns are {list(df.columns)}")
+    return entity, year
+
+
+def value_columns(df):
+    """Numeric columns of a panel other than the year."""
+    _, year = panel_columns(df)
+    return [c for c in df.select_dtypes('number').columns if c != year]
@@ -0,0 +1,234 @@
+"""
+AUSTIN DRAWCOST: Which artists make a figure slow to draw
+==========================================================
+
+Some charts are slow because of how many artists they have, not how much
+data: 06 draws a Text per heatmap cell, 04 a Line2D per country. This
+profiler times every artist's draw() on an Agg renderer (exclusive of
+its children) and adds it up by artist type and by the code that
+created it, so it is clear where a collection would pay off.
+
+USAGE:
+    from austin_drawcost import track_artists, profile_draw, format_draw_report
+
+    with track_artists():              # remember who created each artist
+        fig = build_my_chart()
+    report = profile_draw(fig, dpi=300)
+    print(format_draw_report(report))
+
+    # Any graphs/ script (saves are redirected, goldens stay untouched)
+    python austin_drawcost.py ../graphs/06_heatmap_life_expectancy.py
+
+Artists created outside track_artists() still get timed; their origin
+shows as '(untracked)'.
+
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import runpy
+import sys
+import tempfile
+import time
+
+import matplotlib as mpl
+import matplotlib.axis as maxis
+from matplotlib.artist import Artist
+from matplotlib.backends.backend_agg import RendererAgg
+
+
+KIT_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Library code is skipped when looking for an artist's creator
+_LIBRARY_DIRS = tuple(os.path.dirname(m.__file__) + os.sep
+                      for m in (mpl, contextlib) if getattr(m, '__file__', None))
+
+# An origin that creates this many artists of one type is a collection candidate
+COLLECTION_HINT = 50
+
+
+# ============================================================
+# CREATION TRACKING
+# ============================================================
+
+def _origin(frame):
+    """'module.function' for kit code, 'script.py:line' for everything else."""
+    while frame is not None:
+        path = frame.f_code.co_filename
+        if path != __file__ and not path.startswith(_LIBRARY_DIRS) and not path.startswith('<frozen'):
+            if os.path.dirname(os.path.abspath(path)) == KIT_DIR:
+                module = os.path.splitext(os.path.basename(path))[0]
+                return f'{module}.{frame.f_code.co_name}'
+            return f'{os.path.basename(path)}:{frame.f_lineno}'
+        frame = frame.f_back
+    return '(unknown)'
+
+
+@contextlib.contextmanager
+def track_artists():
+    """Record the creating helper or script line on every artist made inside."""
+    original = Artist.__init__
+
+    def __init__(self, *args, **kwargs):
+        original(self, *args, **kwargs)
+        if not hasattr(self, '_austin_origin'):
+            self._austin_origin = _origin(sys._getframe(1))
+
+    Artist.__init__ = __init__
+    try:
+        yield
+    finally:
+        Artist.__init__ = original
+
+
+# ============================================================
+# DRAW TIMING
+# ============================================================
+
+def _describe(artist):
+    text = getattr(artist, 'get_text', None)
+    label = text() if callable(text) else artist.get_label()
+    if not isinstance(label, str) or label.startswith('_'):
+        return ''
+    return label[:40]
+
+
+def _timed_draw(artist, costs, stack):
+    draw = artist.draw
+
+    def timed(renderer, *args, **kwargs):
+        start = time.perf_counter()
+        stack.append(0.0)
+        try:
+            return draw(renderer, *args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = stack.pop()
+            if stack:
+                stack[-1] += elapsed
+            costs[id(artist)] = costs.get(id(artist), 0.0) + elapsed - children
+
+    return timed
+
+
+def profile_draw(fig, dpi=None, repeat=3):
+    """
+    Time each artist's own draw on a fresh Agg renderer.
+
+    Parameters
+    ----------
+    fig : matplotlib Figure
+    dpi : float, optional
+        Resolution to draw at (default: the figure's own; use 300 to match
+        the gallery exports).
+    repeat : int
+        Timed draws after one warm-up draw; times are averaged.
+
+    Returns
+    -------
+    report : dict
+        'artists' (count), 'seconds' (whole draw), 'by_type' and
+        'by_origin' (name -> {'count', 'seconds'}, slowest first) and
+        'top' (the slowest single artists).
+    """
+    old_dpi = fig.dpi
+    costs = {}
+    stack = []
+    artists = []
+    try:
+        if dpi:
+            fig.set_dpi(dpi)
+        width, height = fig.bbox.size
+        renderer = RendererAgg(int(width), int(height), fig.dpi)
+        fig.draw(renderer)  # warm-up: text layout caches, font loading, lazy ticks
+
+        artists = fig.findobj()
+        for artist in artists:
+            artist.draw = _timed_draw(artist, costs, stack)
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fig.draw(RendererAgg(int(width), int(height), fig.dpi))
+        total = (time.perf_counter() - start) / repeat
+    finally:
+        for artist in artists:
+            artist.__dict__.pop('draw', None)
+        fig.set_dpi(old_dpi)
+
+    # Ticks are created lazily by whatever line happens to trigger a draw
+    ticks = {id(a) for axis in artists if isinstance(axis, maxis.Axis)
+             for tick in axis.majorTicks + axis.minorTicks for a in tick.findobj()}
+
+    by_type, by_origin, rows = {}, {}, []
+    for artist in artists:
+        seconds = costs.get(id(artist), 0.0) / repeat
+        kind = type(artist).__name__
+        origin = '(axis ticks)' if id(artist) in ticks else getattr(artist, '_austin_origin', '(untracked)')
+        for table, key in ((by_type, kind), (by_origin, origin)):
+            entry = table.setdefault(key, dict(count=0, seconds=0.0, types={}))
+            entry['count'] += 1
+            entry['seconds'] += seconds
+            entry['types'][kind] = entry['types'].get(kind, 0) + 1
+        rows.append(dict(type=kind, origin=origin, label=_describe(artist), seconds=seconds))
+
+    def ranked(table):
+        return dict(sorted(table.items(), key=lambda kv: -kv[1]['seconds']))
+
+    rows.sort(key=lambda r: -r['seconds'])
+    return dict(artists=len(artists), seconds=total, dpi=fig.dpi if not dpi else dpi,
+                by_type=ranked(by_type), by_origin=ranked(by_origin), top=rows[:20])
+
+
+def format_draw_report(report, top=10):
+    """Human-readable summary with collection hints."""
+    lines = [f"{report['artists']} artists, {report['seconds'] * 1000:.1f} ms per draw "
+             f"at {report['dpi']:g} dpi", '', f"{'artist type':<28}{'count':>7}{'ms':>9}"]
+    for name, e in list(report['by_type'].items())[:top]:
+        lines.append(f"{name:<28}{e['count']:>7}{e['seconds'] * 1000:>9.2f}")
+    lines += ['', f"{'created by':<44}{'count':>7}{'ms':>9}"]
+    for name, e in list(report['by_origin'].items())[:top]:
+        lines.append(f"{name:<44}{e['count']:>7}{e['seconds'] * 1000:>9.2f}")
+    lines += ['', 'slowest artists:']
+    for r in report['top'][:top]:
+        lines.append(f"  {r['seconds'] * 1000:7.2f} ms  {r['type']:<18} {r['origin']:<36} {r['label']}")
+
+    hints = [(origin, kind, n) for origin, e in report['by_origin'].items()
+             for kind, n in e['types'].items()
+             if n >= COLLECTION_HINT and not origin.startswith('(')]
+    if hints:
+        lines.append('')
+        for origin, kind, n in hints:
+            lines.append(f'hint: {origin} creates {n} {kind} artists; '
+                         f'a single collection would draw them in one call')
+    return '\n'.join(lines)
+
+
+def profile_script(script, dpi=300, repeat=3):
+    """Run a chart script with tracking and profile every figure it leaves open."""
+    import matplotlib.pyplot as plt
+    from austin_regression import redirected_saves
+
+    plt.close('all')
+    with track_artists(), redirected_saves(tempfile.mkdtemp(prefix='austin_drawcost_')), \
+            contextlib.redirect_stdout(io.StringIO()):
+        runpy.run_path(script, run_name='__main__')
+    reports = [profile_draw(plt.figure(num), dpi=dpi, repeat=repeat) for num in plt.get_fignums()]
+    plt.close('all')
+    return reports
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Per-artist draw cost of a chart script.')
+    parser.add_argument('scripts', nargs='+')
+    parser.add_argument('--dpi', type=float, default=300)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args()
+
+    mpl.use('Agg')
+    for script in args.scripts:
+        for report in profile_script(os.path.abspath(script), dpi=args.dpi, repeat=args.repeat):
+            print(f'== {script}')
+            print(format_draw_report(report, top=args.top))
+            print()
@@ -0,0 +1,375 @@
+"""
+AUSTIN FIGURES: Figure lifecycle for long batches and servers
+==============================================================
+
+None of the graphs/ scripts call plt.close(), so running several of them
+in one interpreter (or one notebook) keeps every figure alive, and each
+300-dpi figure that has been saved holds a 25 MB Agg buffer. Unmanaged
+figures are no better off: a Figure and its canvas point at each other,
+so the buffer waits for the cyclic garbage collector. This module makes
+the lifetime explicit:
+
+  - release_figure() closes a pyplot figure, clears an unmanaged one and
+    drops its renderer buffer right away,
+  - managed_figure() builds a figure under a style and releases it when
+    the with block ends (save it inside the block),
+  - FigurePool keeps cleared figures of one size, canvas and buffer
+    included, and hands them out again, so a batch of same-size charts
+    reuses memory instead of reallocating it,
+  - closing_figures() closes every pyplot figure opened inside it, for
+    running scripts that never close their own,
+  - watch_figures() warns when too many figures are open or RSS passes
+    a limit.
+
+USAGE:
+    from austin_figures import managed_figure, FigurePool, watch_figures
+
+    watch_figures(max_figures=20, max_rss_mb=2000)   # warnings, not errors
+
+    with managed_figure(figsize=(12, 6), style='notebook') as fig:
+        ax = fig.add_subplot()
+        ...
+        fig.savefig('chart.png', dpi=300)
+    # fig is cleared and its buffer freed here
+
+    pool = FigurePool(figsize=(12, 6))
+    for key, rows in groups:
+        with managed_figure(style='notebook', pool=pool) as fig:
+            ...
+
+    with closing_figures():                          # in a notebook cell
+        %run ../graphs/03_line_chart_temperature.py
+
+    # Memory over a long batch: leaking vs managed vs pooled
+    python austin_figures.py --charts 300
+
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+import warnings
+import weakref
+
+import numpy as np
+import matplotlib as mpl
+
+from austin_styles import new_figure, style_context
+
+
+# matplotlib's own "too many figures" warning uses the same default
+MAX_FIGURES = 20
+
+
+# ============================================================
+# MEMORY
+# ============================================================
+
+# Figures handed out by managed_figure / FigurePool and not released yet
+_live = weakref.WeakSet()
+
+
+def rss_mb():
+    """
+    Resident set size of this process in MB.
+
+    Current RSS where /proc is available (Linux); elsewhere the peak,
+    which still catches growth but never goes back down.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except (OSError, ValueError, IndexError, AttributeError):
+        import resource
+        # ru_maxrss is KiB on Linux and bytes on macOS
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return rss / 2**20 if sys.platform == 'darwin' else rss / 2**10
+
+
+def open_figures():
+    """pyplot figures still open plus managed figures still in use."""
+    plt = sys.modules.get('matplotlib.pyplot')
+    return (len(plt.get_fignums()) if plt else 0) + len(_live)
+
+
+class FigureWatch:
+    """
+    Warns (RuntimeWarning) when a limit is crossed.
+
+    Each limit warns once when it is exceeded and again only after usage
+    has dropped back under it, so a loop stuck above the limit does not
+    flood the log.
+    """
+
+    def __init__(self, max_figures=MAX_FIGURES, max_rss_mb=None):
+        self.max_figures = max_figures
+        self.max_rss_mb = max_rss_mb
+        self._over = set()
+
+    def _limit(self, name, value, limit, message):
+        if limit is None or value <= limit:
+            self._over.discard(name)
+        elif name not in self._over:
+            self._over.add(name)
+            warnings.warn(message, RuntimeWarning, stacklevel=4)
+
+    def check(self):
+        """Current {'figures', 'rss_mb'}, warning about any limit exceeded."""
+        figures = open_figures()
+        rss = rss_mb() if self.max_rss_mb is not None else None
+        self._limit('figures', figures, self.max_figures,
+                    f'{figures} figures are open (limit {self.max_figures}); use '
+                    f'managed_figure / closing_figures or close them with plt.close()')
+        self._limit('rss', rss, self.max_rss_mb,
+                    f'RSS is {rss:.0f} MB (limit {self.max_rss_mb} MB)' if rss else '')
+        return dict(figures=figures, rss_mb=rss)
+
+
+_watch = None
+
+
+def watch_figures(max_figures=MAX_FIGURES, max_rss_mb=None):
+    """
+    Check the limits every time this module hands out or releases a figure.
+
+    Returns the FigureWatch; call its check() from loops that only use
+    pyplot. stop_watching() turns it off.
+    """
+    global _watch
+    _watch = FigureWatch(max_figures=max_figures, max_rss_mb=max_rss_mb)
+    return _watch
+
+
+def stop_watching():
+    global _watch
+    _watch = None
+
+
+def _check():
+    if _watch is not None:
+        _watch.check()
+
+
+# ============================================================
+# RELEASING
+# ============================================================
+
+def _drop_renderer(canvas):
+    # FigureCanvasAgg keeps the last renderer (and its pixel buffer) for reuse
+    canvas.__dict__.pop('renderer', None)
+    if hasattr(canvas, '_lastKey'):
+        canvas._lastKey = None
+
+
+def release_figure(fig):
+    """
+    Close a pyplot-managed figure, or clear an unmanaged one, and free its buffer.
+
+    The figure object stays usable (it is empty), so a caller still
+    holding it cannot crash, but it no longer pins any memory.
+    """
+    if getattr(fig.canvas, 'manager', None) is not None:
+        import matplotlib.pyplot as plt
+        plt.close(fig)
+    fig.clear()
+    _drop_renderer(fig.canvas)
+    _live.discard(fig)
+    _check()
+
+
+@contextlib.contextmanager
+def closing_figures():
+    """Close every pyplot figure opened inside the block (earlier ones are kept)."""
+    import matplotlib.pyplot as plt
+    before = set(plt.get_fignums())
+    try:
+        yield
+    finally:
+        for num in set(plt.get_fignums()) - before:
+            release_figure(plt.figure(num))
+
+
+# ============================================================
+# POOLING
+# ============================================================
+
+class FigurePool:
+    """
+    Cleared figures of one size, ready to be drawn on again.
+
+    A released figure keeps its canvas and its Agg buffer, so the next
+    chart saved at the same dpi draws into memory that is already
+    allocated. At most max_size idle figures are kept; extra ones are
+    released normally. Thread-safe.
+
+    Parameters
+    ----------
+    figsize : tuple
+        Size in inches of every figure in the pool.
+    max_size : int
+        Idle figures to keep (one per concurrent renderer is enough).
+    """
+
+    def __init__(self, figsize=(12, 6), max_size=4):
+        self.figsize = tuple(figsize)
+        self.max_size = max_size
+        self.created = 0
+        self.reused = 0
+        self._idle = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        A blank figure, new or recycled.
+
+        Call inside the style_context the chart is built with: a recycled
+        figure takes its colours, dpi, layout engine and subplot margins
+        from the active rcParams, exactly like a new one.
+        """
+        with self._lock:
+            fig = self._idle.pop() if self._idle else None
+            if fig is None:
+                self.created += 1
+            else:
+                self.reused += 1
+        if fig is None:
+            fig = new_figure(figsize=self.figsize)
+        else:
+            rc = mpl.rcParams
+            fig.set_size_inches(self.figsize)
+            fig.set_dpi(rc['figure.dpi'])
+            fig.set_facecolor(rc['figure.facecolor'])
+            fig.set_edgecolor(rc['figure.edgecolor'])
+            fig.set_frameon(rc['figure.frameon'])
+            fig.set_layout_engine(None)
+            fig.subplotpars.reset()
+        _live.add(fig)
+        return fig
+
+    def release(self, fig):
+        """Clear fig and keep it for the next acquire (or free it if the pool is full)."""
+        fig.clear()
+        _live.discard(fig)
+        with self._lock:
+            keep = len(self._idle) < self.max_size
+            if keep:
+                self._idle.append(fig)
+        if not keep:
+            release_figure(fig)
+        _check()
+
+    def clear(self):
+        """Free every idle figure."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for fig in idle:
+            release_figure(fig)
+
+    def stats(self):
+        return dict(created=self.created, reused=self.reused, idle=len(self._idle))
+
+
+# ============================================================
+# MANAGED FIGURES
+# ============================================================
+
+@contextlib.contextmanager
+def managed_figure(figsize=(12, 6), style=None, pool=None, **fig_kw):
+    """
+    A styled, pyplot-free figure that is released when the block ends.
+
+    Parameters
+    ----------
+    figsize : tuple
+        Ignored when pool is given (the pool's size is used).
+    style : str or dict, optional
+        Applied to the whole block, building and saving alike
+        (see austin_styles.style_context).
+    pool : FigurePool, optional
+        Borrow a recycled figure and give it back afterwards.
+    **fig_kw : dict
+        Passed to Figure for new (unpooled) figures.
+    """
+    with style_context(style):
+        if pool is not None:
+            fig = pool.acquire()
+        else:
+            fig = new_figure(figsize=figsize, **fig_kw)
+            _live.add(fig)
+        _check()
+        try:
+            yield fig
+        finally:
+            if pool is not None:
+                pool.release(fig)
+            else:
+                release_figure(fig)
+
+
+# ============================================================
+# SOAK TEST
+# ============================================================
+
+def _draw_demo(fig, i):
+    ax = fig.add_subplot()
+    x = np.arange(200)
+    ax.plot(x, np.sin(x / 20 + i) * 10 + i % 7, linewidth=2.5)
+    ax.set_title(f'chart {i}')
+
+
+def soak(charts=300, mode='pool', dpi=300, style='notebook', every=50):
+    """
+    Render and save many charts, sampling RSS along the way.
+
+    mode is 'pyplot' (plt.subplots, never closed: the usual script
+    pattern), 'cleared' (unmanaged figures only cleared), 'managed' or
+    'pool'. Returns a list of (chart index, open figures, RSS MB).
+    """
+    samples = []
+    pool = FigurePool(figsize=(12, 6)) if mode == 'pool' else None
+    for i in range(charts):
+        buffer = io.BytesIO()
+        if mode == 'pyplot':
+            import matplotlib.pyplot as plt
+            with style_context(style):
+                fig = plt.figure(figsize=(12, 6))
+                _draw_demo(fig, i)
+                fig.savefig(buffer, format='png', dpi=dpi)
+        elif mode == 'cleared':
+            with style_context(style):
+                fig = new_figure(figsize=(12, 6))
+                _draw_demo(fig, i)
+                fig.savefig(buffer, format='png', dpi=dpi)
+            fig.clear()
+        else:
+            with managed_figure(style=style, pool=pool) as fig:
+                _draw_demo(fig, i)
+                fig.savefig(buffer, format='png', dpi=dpi)
+        if (i + 1) % every == 0 or i + 1 == charts:
+            samples.append((i + 1, open_figures(), rss_mb()))
+    if pool is not None:
+        pool.clear()
+    return samples
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Memory over a long batch of saved figures.')
+    parser.add_argument('--charts', type=int, default=300)
+    parser.add_argument('--dpi', type=float, default=300)
+    parser.add_argument('--modes', nargs='+', default=['managed', 'pool', 'cleared', 'pyplot'],
+                        choices=['pyplot', 'cleared', 'managed', 'pool'])
+    args = parser.parse_args()
+
+    mpl.use('Agg')
+    warnings.simplefilter('ignore', RuntimeWarning)
+    for mode in args.modes:
+        start = time.perf_counter()
+        samples = soak(args.charts, mode=mode, dpi=args.dpi)
+        trail = '  '.join(f'{rss:.0f}' for _, _, rss in samples)
+        print(f'{mode:<8} {time.perf_counter() - start:6.1f}s  open {samples[-1][1]:>4}  '
+              f'RSS MB: {trail}')
@@ -0,0 +1,266 @@
+"""
+AUSTIN GALLERY: Thumbnails and markdown for the before/after gallery
+=====================================================================
+
+GALLERY.md and README.md show every before/after pair at width="400",
+but the browser still downloads the full 300-dpi PNGs (3 MB for the
+gallery). This builder:
+
+  1. pairs graphs/ugly/NN_ugly.png with graphs/NN_*.png,
+  2. writes 2x-width thumbnails (sharp on high-dpi screens) to
+     graphs/thumbs/ as 8-bit palette PNGs (austin_export),
+     optionally with a side-by-side composite per pair,
+  3. points the <img> tags in the markdown at the thumbnails and wraps
+     them in a link to the full-size chart.
+
+Builds are incremental: graphs/thumbs/manifest.json records the content
+hash of every source and the settings used, and only outputs whose
+inputs changed are regenerated (in parallel).
+
+USAGE:
+    python austin_gallery.py                  # thumbnails + rewrite the markdown
+    python austin_gallery.py --composite      # also NN_pair.png side-by-sides
+    python austin_gallery.py --force          # rebuild everything
+
+    from austin_gallery import build_gallery
+    summary = build_gallery(composite=True)
+
+"""
+
+import argparse
+import glob
+import hashlib
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+from PIL import Image
+
+from austin_export import write_png
+from austin_regression import GRAPHS_DIR, ROOT_DIR
+
+
+THUMB_DIR = os.path.join(GRAPHS_DIR, 'thumbs')
+MANIFEST = 'manifest.json'
+MARKDOWN_FILES = ('GALLERY.md', 'README.md')
+
+# Thumbnails are stored at this multiple of the width they are shown at
+PIXEL_DENSITY = 2
+DISPLAY_WIDTH = 400
+
+# Space between the two halves of a composite, in pixels
+COMPOSITE_GAP = 24
+
+# <img src="graphs/..." width="N">, optionally already wrapped in a link
+_IMG = re.compile(r'(?:<a href="[^"]*">)?<img src="(graphs/[^"]+\.png)" width="(\d+)">(?:</a>)?')
+
+
+# ============================================================
+# PAIRS
+# ============================================================
+
+def gallery_pairs(graphs_dir=GRAPHS_DIR):
+    """
+    Before/after pairs found on disk.
+
+    Returns
+    -------
+    pairs : list of (number, ugly_path, polished_path)
+        Sorted by number. Numbers without both images are skipped.
+    """
+    polished = {}
+    for path in glob.glob(os.path.join(graphs_dir, '[0-9][0-9]_*.png')):
+        polished.setdefault(os.path.basename(path)[:2], path)
+    pairs = []
+    for ugly in sorted(glob.glob(os.path.join(graphs_dir, 'ugly', '[0-9][0-9]_ugly.png'))):
+        number = os.path.basename(ugly)[:2]
+        if number in polished:
+            pairs.append((number, ugly, polished[number]))
+    return pairs
+
+
+def thumb_path(source, graphs_dir=GRAPHS_DIR, thumb_dir=THUMB_DIR):
+    """graphs/ugly/01_ugly.png -> graphs/thumbs/ugly/01_ugly.png"""
+    return os.path.join(thumb_dir, os.path.relpath(source, graphs_dir))
+
+
+# ============================================================
+# IMAGES
+# ============================================================
+
+def _resized(path, width):
+    image = Image.open(path).convert('RGB')
+    if image.width > width:
+        height = round(image.height * width / image.width)
+        image = image.resize((width, height), Image.LANCZOS)
+    return image
+
+
+def make_thumbnail(source, target, width):
+    """Downscale source to width pixels and write it as a palette PNG."""
+    write_png(np.asarray(_resized(source, width)), target, palette=True, compress_level=9)
+    return target
+
+
+def make_composite(left, right, target, width):
+    """Both images side by side, scaled to the same height, width pixels in total."""
+    images = [Image.open(p).convert('RGB') for p in (left, right)]
+    height = min(im.height for im in images)
+    images = [im.resize((round(im.width * height / im.height), height), Image.LANCZOS)
+              if im.height != height else im for im in images]
+    canvas = Image.new('RGB', (sum(im.width for im in images) + COMPOSITE_GAP, height), 'white')
+    canvas.paste(images[0], (0, 0))
+    canvas.paste(images[1], (images[0].width + COMPOSITE_GAP, 0))
+    canvas = canvas.resize((width, round(height * width / canvas.width)), Image.LANCZOS)
+    write_png(np.asarray(canvas), target, palette=True, compress_level=9)
+    return target
+
+
+# ============================================================
+# INCREMENTAL BUILD
+# ============================================================
+
+def _file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _rel(path):
+    """Repo-relative path with forward slashes (manifest keys, markdown links)."""
+    return os.path.relpath(path, ROOT_DIR).replace(os.sep, '/')
+
+
+def _load_manifest(thumb_dir):
+    path = os.path.join(thumb_dir, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _jobs(pairs, width, composite, thumb_dir):
+    """(target, make, sources, settings) for every output the gallery needs."""
+    jobs = []
+    for number, ugly, polished in pairs:
+        for source in (ugly, polished):
+            jobs.append((thumb_path(source, thumb_dir=thumb_dir), make_thumbnail,
+                         (source,), dict(width=width)))
+        if composite:
+            jobs.append((os.path.join(thumb_dir, f'{number}_pair.png'), make_composite,
+                         (ugly, polished), dict(width=2 * width)))
+    return jobs
+
+
+def build_thumbnails(width=DISPLAY_WIDTH * PIXEL_DENSITY, composite=False,
+                     thumb_dir=THUMB_DIR, force=False, workers=None):
+    """
+    Write the thumbnails (and composites) whose sources changed.
+
+    Parameters
+    ----------
+    width : int
+        Thumbnail width in pixels (composites are twice as wide).
+    composite : bool
+        Also write NN_pair.png side-by-side images.
+    force : bool
+        Ignore the manifest and rebuild everything.
+    workers : int, optional
+        Threads (Pillow resizing and PNG encoding release the GIL).
+
+    Returns
+    -------
+    summary : dict
+        'built' and 'skipped' (lists of paths relative to the repo root),
+        'bytes_full' and 'bytes_thumb' (total size of sources and thumbnails).
+    """
+    pairs = gallery_pairs()
+    old = {} if force else _load_manifest(thumb_dir)
+    hashes = {}
+    manifest, todo, skipped = {}, [], []
+    for target, make, sources, settings in _jobs(pairs, width, composite, thumb_dir):
+        key = _rel(target)
+        entry = dict(settings, sources={_rel(s):
+                                        hashes.setdefault(s, _file_hash(s)) for s in sources})
+        manifest[key] = entry
+        if old.get(key) == entry and os.path.exists(target):
+            skipped.append(key)
+        else:
+            todo.append((target, make, sources, settings))
+
+    workers = workers or min(len(todo), os.cpu_count() or 1) or 1
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(make, *sources, target, **settings)
+                   for target, make, sources, settings in todo]
+        built = [_rel(f.result()) for f in futures]
+
+    os.makedirs(thumb_dir, exist_ok=True)
+    with open(os.path.join(thumb_dir, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    thumbs = [os.path.join(ROOT_DIR, key) for key in manifest if not key.endswith('_pair.png')]
+    return dict(built=built, skipped=skipped,
+                bytes_full=sum(os.path.getsize(s) for s in hashes),
+                bytes_thumb=sum(os.path.getsize(t) for t in thumbs))
+
+
+# ============================================================
+# MARKDOWN
+# ============================================================
+
+def rewrite_markdown(path, thumb_dir=THUMB_DIR):
+    """
+    Point every graphs/ <img> in a markdown file at its thumbnail.
+
+    Each image becomes a link to the full-size chart. Images without a
+    thumbnail are left alone, and running it twice changes nothing.
+    Returns the number of images pointing at thumbnails.
+    """
+    thumbs_rel = _rel(thumb_dir) + '/'
+    count = 0
+
+    def replace(match):
+        nonlocal count
+        src, width = match.groups()
+        full = src.replace(thumbs_rel, 'graphs/', 1) if src.startswith(thumbs_rel) else src
+        thumb = _rel(thumb_path(os.path.join(ROOT_DIR, full), thumb_dir=thumb_dir))
+        if not os.path.exists(os.path.join(ROOT_DIR, thumb)):
+            return match.group(0)
+        count += 1
+        return f'<a href="{full}"><img src="{thumb}" width="{width}"></a>'
+
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    new = _IMG.sub(replace, text)
+    if new != text:
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(new)
+    return count
+
+
+def build_gallery(composite=False, force=False, workers=None,
+                  markdown=MARKDOWN_FILES, width=DISPLAY_WIDTH * PIXEL_DENSITY):
+    """build_thumbnails, then rewrite_markdown on each file. Returns the summary."""
+    summary = build_thumbnails(width=width, composite=composite, force=force, workers=workers)
+    summary['markdown'] = {name: rewrite_markdown(os.path.join(ROOT_DIR, name))
+                           for name in markdown if os.path.exists(os.path.join(ROOT_DIR, name))}
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Build gallery thumbnails and rewrite the markdown.')
+    parser.add_argument('--composite', action='store_true', help='also write NN_pair.png side-by-sides')
+    parser.add_argument('--force', action='store_true', help='rebuild even if sources are unchanged')
+    parser.add_argument('--width', type=int, default=DISPLAY_WIDTH * PIXEL_DENSITY)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--no-markdown', action='store_true', help='only write the images')
+    args = parser.parse_args()
+
+    summary = build_gallery(composite=args.composite, force=args.force, workers=args.workers,
+                            markdown=() if args.no_markdown else MARKDOWN_FILES, width=args.width)
+    print(f"built {len(summary['built'])}, unchanged {len(summary['skipped'])}")
+    print(f"full-size {summary['bytes_full'] / 1024:.0f} KB -> thumbnails "
+          f"{summary['bytes_thumb'] / 1024:.0f} KB")
+    for name, count in summary['markdown'].items():
+        print(f'{name}: {count} images point at thumbnails')
@@ -0,0 +1,484 @@
+"""
+AUSTIN INSIGHTS: Candidate stories from a scan of every dataset
+================================================================
+
+The Explorer prompt (PROMPTS.md) asks for the most surprising finding,
+the biggest gap and the biggest change. The scripts answer by hand
+(Qatar vs DRC in 02, Denmark vs Russia in 04). This scan answers for
+every entity, year and value column at once. Each column is pivoted to
+an entity x year matrix and every statistic is one array operation over
+it:
+
+  - mover     largest change over a window (log change for positive data),
+  - spread    leader vs laggard in the latest well-covered year (the "764x"),
+  - group     gap between region / continent medians,
+  - pair      gap between two related columns of the same entity
+              (women vs men),
+  - record    latest value is the entity's all-time high or low,
+  - outlier   furthest from the median in the latest year.
+
+Every candidate gets a raw strength in robust standard deviations and
+the numbers a title needs. Raw strengths are not comparable across kinds
+(a 10-year change is routinely 6 SD, a record rarely 2), so the ranking
+score is the raw strength over the median raw strength of its kind in
+the same scan: 3.0 is three times as strong as a typical candidate of
+that kind, whatever the kind.
+
+USAGE:
+    from austin_insights import scan, scan_dataset
+
+    stories = scan(top=20)                          # every bundled dataset
+    stories[['score', 'title']]
+
+    scan_dataset('co2_per_capita', kinds=('spread', 'mover'), window=20)
+
+    python austin_insights.py                       # top stories, all datasets
+    python austin_insights.py gdp_per_capita --window 20 --top 10
+
+Aggregates (World, continents, income groups) are left out when the data
+has ISO country codes; pass countries_only=False to keep them.
+
+"""
+
+import argparse
+import os
+import re
+import time
+
+import numpy as np
+import pandas as pd
+
+from austin_corr import numeric_columns
+from austin_data import list_datasets, load_dataset, panel_columns
+
+
+KINDS = ('mover', 'spread', 'group', 'pair', 'record', 'outlier')
+
+# The Explorer prompt's three questions and the kinds that answer them
+QUESTIONS = {
+    'most surprising': ('outlier', 'record'),
+    'biggest gap': ('spread', 'group', 'pair'),
+    'biggest change': ('mover',),
+}
+
+CODE_COLUMNS = ('Code', 'code')
+ISO_CODE = re.compile(r'^[A-Z]{3}$')
+
+# Cross-entity statistics need at least this many entities
+MIN_ENTITIES = 5
+# Groups with fewer members than this are left out of group gaps
+MIN_GROUP = 3
+# Records need at least this many observed years
+MIN_YEARS = 10
+# Latest year counted as current: at least this share of the best-covered year
+COVERAGE = 0.5
+# Two columns are a pair when their names share a prefix this long
+PAIR_PREFIX = 12
+# A text column with at most this many values can group entities
+MAX_GROUPS = 12
+# Columns that are uncertainty bands, not measurements
+IGNORE = re.compile(r'\b(lower|upper) bound\b', re.IGNORECASE)
+
+# Non-negative data whose max is this many medians is compared in logs
+SKEW = 10
+
+# MAD of a normal sample times this is its standard deviation
+MAD_SCALE = 1.4826
+
+# Columns of a scan_dataset / scan table
+STORY_COLUMNS = ['kind', 'score', 'raw', 'title', 'dataset', 'column', 'entity', 'other',
+                 'year', 'start', 'value', 'other_value', 'change', 'pct', 'ratio', 'rank']
+
+
+# ============================================================
+# PANEL MATRICES
+# ============================================================
+
+def panel_matrix(df, column, entity, year):
+    """
+    One column as an entity x year array.
+
+    Returns
+    -------
+    values : array (entities, years)
+        NaN where the entity has no value that year.
+    entities, years : arrays
+        Row and column labels, sorted.
+    """
+    rows = df[[entity, year, column]].dropna(subset=[entity, year])
+    entity_index, entities = pd.factorize(rows[entity], sort=True)
+    year_index, years = pd.factorize(rows[year], sort=True)
+    values = np.full((len(entities), len(years)), np.nan)
+    values[entity_index, year_index] = pd.to_numeric(rows[column], errors='coerce').to_numpy(dtype=float)
+    return values, np.asarray(entities, dtype=object), np.asarray(years)
+
+
+def _countries(df, entity):
+    """Rows for countries (ISO codes) when the data has codes, else all."""
+    code = next((c for c in CODE_COLUMNS if c in df.columns), None)
+    if code is None:
+        return df
+    countries = df[df[code].astype(str).str.match(ISO_CODE)]
+    return countries if countries[entity].nunique() >= MIN_ENTITIES else df
+
+
+def _group_columns(df, entity):
+    skip = {entity, *CODE_COLUMNS}
+    return [c for c in df.columns
+            if c not in skip and not pd.api.types.is_numeric_dtype(df[c])
+            and 2 <= df[c].nunique() <= MAX_GROUPS]
+
+
+def _latest(values):
+    """Index of the latest year covered well enough to count as 'now'."""
+    coverage = np.sum(~np.isnan(values), axis=0)
+    return int(np.nonzero(coverage >= COVERAGE * coverage.max())[0][-1])
+
+
+def _scaled(values):
+    """
+    Values on the scale their spread is judged on.
+
+    Heavy-tailed non-negative data (population, CO2, case counts) is
+    compared in logs, so one giant does not swamp every score.
+    """
+    low, median, high = np.nanmin(values), np.nanmedian(values), np.nanmax(values)
+    if low < 0 or not high > SKEW * max(median, 0):
+        return values
+    return np.log(values) if low > 0 else np.log1p(values)
+
+
+def _robust_z(x):
+    """(x - median) in robust standard deviations; NaN in, NaN out."""
+    median = np.nanmedian(x)
+    scale = MAD_SCALE * np.nanmedian(np.abs(x - median))
+    if not scale > 0:
+        scale = np.nanstd(x)
+    if not scale > 0:
+        return np.zeros_like(x)
+    return (x - median) / scale
+
+
+def _fmt(value):
+    """3 significant figures, thousands separators for big numbers."""
+    if not np.isfinite(value):
+        return 'n/a'
+    if abs(value) >= 1000:
+        return f'{value:,.0f}'
+    return f'{value:.3g}'
+
+
+def _name(column):
+    return column.strip().replace('_', ' ')
+
+
+def _year(value):
+    return int(value) if float(value).is_integer() else float(value)
+
+
+# ============================================================
+# STATISTICS
+# ============================================================
+
+def _story(kind, score, title, **numbers):
+    return dict(kind=kind, score=float(abs(score)), title=title, **numbers)
+
+
+def movers(values, entities, years, column, window=10, top=3):
+    """Largest changes between the latest well-covered year and window years earlier."""
+    end = _latest(values)
+    start = int(np.searchsorted(years, years[end] - window, side='right')) - 1
+    if start < 0 or start == end:
+        return []
+    a, b = values[:, start], values[:, end]
+    ok = ~np.isnan(a) & ~np.isnan(b)
+    if ok.sum() < MIN_ENTITIES:
+        return []
+    scaled = _scaled(values)
+    change = scaled[:, end] - scaled[:, start]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pct = (b - a) / np.abs(a) * 100
+    z = np.full(len(a), np.nan)
+    z[ok] = _robust_z(change[ok])
+    stories = []
+    for i in np.argsort(-np.abs(np.nan_to_num(z)))[:top]:
+        if not ok[i]:
+            continue
+        verb = 'rose' if b[i] > a[i] else 'fell'
+        by = f' ({pct[i]:+.0f}%)' if np.isfinite(pct[i]) and a[i] != 0 else ''
+        stories.append(_story(
+            'mover', z[i], f'{entities[i]}: {_name(column)} {verb} from {_fmt(a[i])} to '
+            f'{_fmt(b[i])}{by}, {_year(years[start])}-{_year(years[end])}',
+            entity=entities[i], year=_year(years[end]), start=_year(years[start]),
+            value=b[i], other_value=a[i], change=b[i] - a[i], pct=pct[i]))
+    return stories
+
+
+def spread(values, entities, years, column):
+    """Leader vs laggard in the latest well-covered year."""
+    end = _latest(values)
+    x = values[:, end]
+    ok = ~np.isnan(x)
+    if ok.sum() < MIN_ENTITIES:
+        return []
+    hi, lo = np.nanargmax(x), np.nanargmin(x)
+    z = _robust_z(_scaled(values)[ok, end])
+    score = (z.max() - z.min()) / 2
+    multiple = x[hi] / x[lo] if x[lo] > 0 else np.nan
+    times = f'{multiple:,.0f}x' if multiple >= 10 else f'{multiple:.1f}x'
+    gap = f'{times} ' if np.isfinite(multiple) else f'{_fmt(x[hi] - x[lo])} more than '
+    return [_story(
+        'spread', score, f'{_name(column)} in {entities[hi]} ({_fmt(x[hi])}) is {gap}'
+        f'{entities[lo]} ({_fmt(x[lo])}), {_year(years[end])}',
+        entity=entities[hi], other=entities[lo], year=_year(years[end]),
+        value=x[hi], other_value=x[lo], change=x[hi] - x[lo], ratio=multiple)]
+
+
+def records(values, entities, years, column, top=3):
+    """Entities whose latest value beats every earlier one, high or low."""
+    end = _latest(values)
+    last = values[:, end]
+    earlier = values[:, :end]
+    counted = np.sum(~np.isnan(earlier), axis=1) >= MIN_YEARS - 1
+    ok = counted & ~np.isnan(last)
+    if not ok.any():
+        return []
+    # Typical size of a year-on-year move (root mean square), so a record
+    # set by one step of a steady trend scores about 1
+    steps = np.diff(values, axis=1)
+    counts = np.sum(~np.isnan(steps), axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        step = np.sqrt(np.nansum(steps ** 2, axis=1) / counts)
+    step[~(step > 0)] = np.nan
+    stories = []
+    for high, best in ((True, np.nanmax(np.where(ok[:, None], earlier, -np.inf), axis=1)),
+                       (False, np.nanmin(np.where(ok[:, None], earlier, np.inf), axis=1))):
+        margin = (last - best) if high else (best - last)
+        margin = np.where(ok & (margin > 0), margin / step, np.nan)
+        for i in np.argsort(-np.nan_to_num(margin, nan=-np.inf))[:top]:
+            if not margin[i] > 0:
+                break
+            word = 'high' if high else 'low'
+            stories.append(_story(
+                'record', margin[i], f'{entities[i]}: {_name(column)} hit a record {word} of '
+                f'{_fmt(last[i])} in {_year(years[end])} (previous {_fmt(best[i])})',
+                entity=entities[i], year=_year(years[end]), value=last[i],
+                other_value=best[i], change=last[i] - best[i]))
+    return stories
+
+
+def outliers(values, entities, years, column, top=3):
+    """Entities furthest from the median in the latest well-covered year."""
+    end = _latest(values)
+    x = values[:, end]
+    ok = ~np.isnan(x)
+    if ok.sum() < MIN_ENTITIES:
+        return []
+    z = np.full(len(x), np.nan)
+    z[ok] = _robust_z(_scaled(values)[ok, end])
+    median = np.nanmedian(x)
+    stories = []
+    for i in np.argsort(-np.abs(np.nan_to_num(z)))[:top]:
+        side = 'above' if x[i] > median else 'below'
+        stories.append(_story(
+            'outlier', z[i], f'{entities[i]} is far {side} the rest on {_name(column)}: '
+            f'{_fmt(x[i])} vs a median of {_fmt(median)} ({_year(years[end])})',
+            entity=entities[i], year=_year(years[end]), value=x[i], other_value=median,
+            rank=int(np.sum(x[ok] > x[i])) + 1))
+    return stories
+
+
+def group_gaps(values, entities, years, column, groups, group_column):
+    """Largest gap between group medians in the latest well-covered year."""
+    end = _latest(values)
+    x = values[:, end]
+    labels = np.array([groups.get(e) for e in entities], dtype=object)
+    ok = ~np.isnan(x) & pd.notna(labels)
+    if ok.sum() < MIN_ENTITIES:
+        return []
+    frame = pd.DataFrame({'group': labels[ok], 'value': x[ok]})
+    sizes = frame.groupby('group')['value'].size()
+    frame = frame[frame['group'].map(sizes).to_numpy() >= MIN_GROUP]
+    medians = frame.groupby('group')['value'].median()
+    if len(medians) < 2:
+        return []
+    hi, lo = medians.idxmax(), medians.idxmin()
+    z = pd.Series(_robust_z(_scaled(values)[ok, end]))[frame.index]
+    z_medians = z.groupby(frame['group']).median()
+    return [_story(
+        'group', z_medians[hi] - z_medians[lo],
+        f'{_name(column)}: typical {hi} value {_fmt(medians[hi])} vs {_fmt(medians[lo])} '
+        f'in {lo} ({_name(group_column)}, {_year(years[end])})',
+        entity=hi, other=lo, year=_year(years[end]), value=medians[hi],
+        other_value=medians[lo], change=medians[hi] - medians[lo])]
+
+
+def pair_gaps(a_values, b_values, entities, years, a_column, b_column, top=3):
+    """Entities where two related columns differ the most, relative to the rest."""
+    end = _latest(a_values)
+    gap = a_values[:, end] - b_values[:, end]
+    ok = ~np.isnan(gap)
+    if ok.sum() < MIN_ENTITIES:
+        return []
+    z = np.full(len(gap), np.nan)
+    z[ok] = _robust_z(gap[ok])
+    median = np.nanmedian(gap)
+    stories = []
+    for i in np.argsort(-np.abs(np.nan_to_num(z)))[:top]:
+        stories.append(_story(
+            'pair', z[i], f'{entities[i]}: {_name(a_column)} minus {_name(b_column)} is '
+            f'{_fmt(gap[i])} (typical gap {_fmt(median)}), {_year(years[end])}',
+            entity=entities[i], year=_year(years[end]), value=a_values[i, end],
+            other_value=b_values[i, end], change=gap[i]))
+    return stories
+
+
+# ============================================================
+# SCANNING
+# ============================================================
+
+def _pairs(columns):
+    return [(a, b) for i, a in enumerate(columns) for b in columns[i + 1:]
+            if len(os.path.commonprefix([a, b])) >= PAIR_PREFIX]
+
+
+def _rank(table):
+    """Score each row against the median raw strength of its kind; best first."""
+    typical = table.groupby('kind')['raw'].transform('median')
+    table['score'] = table['raw'] / typical.where(typical > 0, 1.0)
+    return table.sort_values('score', ascending=False, kind='stable').reset_index(drop=True)
+
+
+def scan_dataset(name, kinds=KINDS, window=10, top=3, countries_only=True):
+    """
+    Every candidate story in one dataset.
+
+    Parameters
+    ----------
+    name : str or DataFrame
+        Dataset name for austin_data.load_dataset, or a panel.
+    kinds : tuple
+        Which statistics to run (see KINDS).
+    window : int
+        Years for 'mover'.
+    top : int
+        Candidates per statistic and column.
+    countries_only : bool
+        Leave out aggregates when the data has ISO codes.
+
+    Returns
+    -------
+    stories : DataFrame
+        One row per candidate, highest score first (see STORY_COLUMNS).
+        'raw' is the strength in robust standard deviations, 'score' the
+        same over the median of its kind within this dataset.
+    """
+    unknown = set(kinds) - set(KINDS)
+    if unknown:
+        raise ValueError(f"Unknown kind '{sorted(unknown)[0]}'. Choose from: {list(KINDS)}")
+    df = load_dataset(name) if isinstance(name, str) else name
+    entity, year = panel_columns(df)
+    if countries_only:
+        df = _countries(df, entity)
+    columns = [c for c in numeric_columns(df) if not IGNORE.search(c)]
+
+    matrices = {c: panel_matrix(df, c, entity, year) for c in columns}
+    group_maps = {g: df.dropna(subset=[g]).groupby(entity)[g].first().to_dict()
+                  for g in _group_columns(df, entity)} if 'group' in kinds else {}
+
+    stories = []
+    for column, (values, entities, years) in matrices.items():
+        if not np.isfinite(values).any():
+            continue
+        if 'mover' in kinds:
+            stories += [dict(s, column=column) for s in movers(values, entities, years, column, window, top)]
+        if 'spread' in kinds:
+            stories += [dict(s, column=column) for s in spread(values, entities, years, column)]
+        if 'record' in kinds:
+            stories += [dict(s, column=column) for s in records(values, entities, years, column, top)]
+        if 'outlier' in kinds:
+            stories += [dict(s, column=column) for s in outliers(values, entities, years, column, top)]
+        for group_column, groups in group_maps.items():
+            stories += [dict(s, column=column)
+                        for s in group_gaps(values, entities, years, column, groups, group_column)]
+    if 'pair' in kinds:
+        for a, b in _pairs(columns):
+            a_values, entities, years = matrices[a]
+            b_values = matrices[b][0]
+            stories += [dict(s, column=f'{a} - {b}')
+                        for s in pair_gaps(a_values, b_values, entities, years, a, b, top)]
+
+    table = pd.DataFrame(stories).rename(columns={'score': 'raw'})
+    table = table.reindex(columns=STORY_COLUMNS)
+    table['dataset'] = name if isinstance(name, str) else None
+    return _rank(table)
+
+
+def scan(datasets=None, kinds=KINDS, window=10, top=20, per_column=3, per_dataset=5,
+         countries_only=True):
+    """
+    Ranked candidate stories across datasets (default: every bundled one).
+
+    Datasets that fail to load or are not entity-year panels are skipped.
+    Scores are recomputed over the whole scan, each kind against its own
+    median, so movers do not crowd out every other kind. Each dataset
+    contributes at most per_dataset stories (None for no limit), so one
+    noisy table cannot fill the whole list. Returns the top rows, with
+    the scan_dataset columns even when nothing was found.
+    """
+    tables = []
+    for name in datasets or list_datasets():
+        try:
+            table = scan_dataset(name, kinds=kinds, window=window, top=per_column,
+                                 countries_only=countries_only)
+        except (ValueError, OSError):
+            continue
+        if len(table):
+            tables.append(table)
+    if not tables:
+        return pd.DataFrame(columns=STORY_COLUMNS)
+    table = _rank(pd.concat(tables, ignore_index=True))
+    if per_dataset is not None:
+        table = table.groupby('dataset', sort=False).head(per_dataset)
+    return table.head(top).reset_index(drop=True)
+
+
+def answers(stories):
+    """
+    The top story for each Explorer question (see QUESTIONS).
+
+    stories is a scan or scan_dataset table, whose scores are already
+    relative to each kind, so each question takes its highest-scoring
+    row among its kinds. Returns {question: row}.
+    """
+    best = {}
+    for question, kinds in QUESTIONS.items():
+        rows = stories[stories['kind'].isin(kinds)]
+        if len(rows):
+            best[question] = rows.loc[rows['score'].idxmax()]
+    return best
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Rank candidate stories across the datasets.')
+    parser.add_argument('datasets', nargs='*', help='dataset names (default: all)')
+    parser.add_argument('--kinds', nargs='+', choices=KINDS, default=list(KINDS))
+    parser.add_argument('--window', type=int, default=10, help='years for top movers')
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--per-dataset', type=int, default=5, help='0 for no limit')
+    parser.add_argument('--aggregates', action='store_true', help='keep World, regions, etc.')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stories = scan(args.datasets or None, kinds=tuple(args.kinds), window=args.window,
+                   top=args.top, per_dataset=args.per_dataset or None,
+                   countries_only=not args.aggregates)
+    elapsed = time.perf_counter() - start
+    for row in stories.itertuples():
+        print(f'{row.score:6.1f}  {row.kind:<8} {row.dataset:<24} {row.title}')
+    print(f'{len(stories)} stories in {elapsed:.2f}s')
+
+    everything = scan(args.datasets or None, kinds=tuple(args.kinds), window=args.window,
+                      top=None, per_dataset=None, countries_only=not args.aggregates)
+    for question, row in answers(everything).items():
+        print(f'{question + ":":<16} {row.title}')
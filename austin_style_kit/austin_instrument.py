@@ -0,0 +1,270 @@
+"""
+AUSTIN INSTRUMENT: Opt-in call counts and timings for the style kit
+====================================================================
+
+When a batch is slow, is it annotate(), add_source_note(), colormap
+lookups or Matplotlib's draw? With instrumentation on, every public
+austin_annotations and austin_colormaps function, Colormap.__call__,
+Figure.draw and Figure.savefig record call counts, total time and self
+time (minus instrumented calls inside).
+
+Off by default. Kit functions carry a wrapper that checks one flag and
+calls straight through; the Matplotlib methods are only patched while
+instrumentation is on.
+
+USAGE:
+    # Unmodified scripts: one profile per saved chart
+    AUSTIN_PROFILE=profiles python graphs/06_heatmap_life_expectancy.py
+    # -> profiles/06_heatmap_life_expectancy.json   (counts and times)
+    #    profiles/06_heatmap_life_expectancy.folded (flamegraph.pl / speedscope)
+
+    # In code
+    from austin_instrument import instrument
+
+    with instrument() as profile:
+        build_and_save_charts()
+    print(profile.report())
+    profile.write('profiles/batch')       # batch.json + batch.folded
+
+"""
+
+import atexit
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+
+ENV_VAR = 'AUSTIN_PROFILE'
+
+# Folder used when the environment variable is just '1'
+DEFAULT_DIR = 'austin_profile'
+
+
+class Profile:
+    """
+    Aggregated timings plus folded call stacks.
+
+    stats() -> name -> {'calls', 'total', 'self'} in seconds.
+    folded() -> 'outer;inner <microseconds>' lines for flame graphs.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+            self._stacks = {}
+
+    def _frames(self):
+        frames = getattr(self._local, 'frames', None)
+        if frames is None:
+            frames = self._local.frames = []
+        return frames
+
+    def call(self, name, fn, args, kwargs):
+        frames = self._frames()
+        # [name, start, time spent in instrumented children]
+        frame = [name, time.perf_counter(), 0.0]
+        frames.append(frame)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - frame[1]
+            frames.pop()
+            own = elapsed - frame[2]
+            if frames:
+                frames[-1][2] += elapsed
+            stack = ';'.join([f[0] for f in frames] + [name])
+            with self._lock:
+                entry = self._stats.setdefault(name, [0, 0.0, 0.0])
+                entry[0] += 1
+                entry[1] += elapsed
+                entry[2] += own
+                self._stacks[stack] = self._stacks.get(stack, 0.0) + own
+
+    def stats(self):
+        with self._lock:
+            return {name: dict(calls=c, total=round(t, 6), self=round(s, 6))
+                    for name, (c, t, s) in sorted(self._stats.items(),
+                                                  key=lambda kv: -kv[1][1])}
+
+    def folded(self):
+        with self._lock:
+            return [f'{stack} {max(1, round(seconds * 1e6))}'
+                    for stack, seconds in sorted(self._stacks.items())]
+
+    def report(self, top=20):
+        """Text table of the slowest entries by total time."""
+        lines = [f"{'function':<40}{'calls':>8}{'total s':>10}{'self s':>10}"]
+        for name, s in list(self.stats().items())[:top]:
+            lines.append(f"{name:<40}{s['calls']:>8}{s['total']:>10.4f}{s['self']:>10.4f}")
+        return '\n'.join(lines)
+
+    def write(self, stem, **extra):
+        """Write stem.json and stem.folded; returns both paths."""
+        folder = os.path.dirname(os.path.abspath(stem))
+        os.makedirs(folder, exist_ok=True)
+        payload = dict(extra, functions=self.stats())
+        with open(f'{stem}.json', 'w', encoding='utf-8') as f:
+            json.dump(payload, f, indent=2)
+        with open(f'{stem}.folded', 'w', encoding='utf-8') as f:
+            f.write('\n'.join(self.folded()) + '\n')
+        return f'{stem}.json', f'{stem}.folded'
+
+
+# ============================================================
+# SWITCH
+# ============================================================
+
+_active = None          # the Profile being recorded into, or None
+_out_dir = None         # per-chart dumps go here when set
+_patched = []
+
+
+def traced(name):
+    """Decorator: time fn into the active profile, if any."""
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            profile = _active
+            if profile is None:
+                return fn(*args, **kwargs)
+            return profile.call(name, fn, args, kwargs)
+        return wrapper
+    return decorate
+
+
+def trace_module(namespace, prefix):
+    """
+    Wrap every public function defined in a module namespace.
+
+    Called at the bottom of austin_annotations and austin_colormaps, so
+    `from austin_annotations import annotate` already gets the wrapper.
+    """
+    module = namespace['__name__']
+    for attr, value in list(namespace.items()):
+        if (not attr.startswith('_') and callable(value) and not isinstance(value, type)
+                and getattr(value, '__module__', None) == module):
+            namespace[attr] = traced(f'{prefix}.{attr}')(value)
+
+
+def _patch(owner, attr, name):
+    original = getattr(owner, attr)
+    setattr(owner, attr, traced(name)(original))
+    _patched.append((owner, attr, original))
+
+
+def _dump_chart(fname):
+    """Write the active profile for one saved chart and start the next from zero."""
+    if _out_dir and _active is not None and isinstance(fname, (str, os.PathLike)):
+        stem = os.path.splitext(os.path.basename(os.fspath(fname)))[0]
+        _active.write(os.path.join(_out_dir, stem), chart=os.fspath(fname))
+        _active.reset()
+
+
+def _install_matplotlib():
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import Colormap
+    from matplotlib.figure import Figure
+
+    _patch(Colormap, '__call__', 'Colormap.__call__')
+    _patch(Figure, 'draw', 'Figure.draw')
+
+    savefig = Figure.savefig
+    timed_savefig = traced('Figure.savefig')(savefig)
+    pyplot_saving = threading.local()
+
+    @functools.wraps(savefig)
+    def savefig_and_dump(fig, fname, *args, **kwargs):
+        try:
+            return timed_savefig(fig, fname, *args, **kwargs)
+        finally:
+            # After the timed call, so the savefig itself is in this chart's profile
+            if not getattr(pyplot_saving, 'active', False):
+                _dump_chart(fname)
+
+    # plt.savefig redraws the canvas after Figure.savefig returns; that
+    # draw belongs to the same chart
+    plt_savefig = plt.savefig
+
+    @functools.wraps(plt_savefig)
+    def plt_savefig_and_dump(fname, *args, **kwargs):
+        pyplot_saving.active = True
+        try:
+            return plt_savefig(fname, *args, **kwargs)
+        finally:
+            pyplot_saving.active = False
+            _dump_chart(fname)
+
+    Figure.savefig = savefig_and_dump
+    plt.savefig = plt_savefig_and_dump
+    _patched.append((Figure, 'savefig', savefig))
+    _patched.append((plt, 'savefig', plt_savefig))
+
+
+def _uninstall_matplotlib():
+    while _patched:
+        owner, attr, original = _patched.pop()
+        setattr(owner, attr, original)
+
+
+def enable(out_dir=None):
+    """
+    Start recording into a fresh Profile and return it.
+
+    out_dir : str, optional
+        Write <chart>.json / <chart>.folded there after every savefig and
+        start the next chart from zero.
+    """
+    global _active, _out_dir
+    if _active is not None:
+        return _active
+    _out_dir = out_dir
+    _install_matplotlib()
+    _active = Profile()
+    return _active
+
+
+def disable():
+    """Stop recording; returns the Profile that was active (or None)."""
+    global _active, _out_dir
+    profile, _active, _out_dir = _active, None, None
+    _uninstall_matplotlib()
+    return profile
+
+
+def is_enabled():
+    return _active is not None
+
+
+@contextlib.contextmanager
+def instrument(out_dir=None):
+    """Record kit and Matplotlib timings inside a with block; yields the Profile."""
+    already = is_enabled()
+    profile = enable(out_dir)
+    try:
+        yield profile
+    finally:
+        if not already:
+            disable()
+
+
+def enable_from_env():
+    """Turn instrumentation on if AUSTIN_PROFILE is set (folder, or '1')."""
+    value = os.environ.get(ENV_VAR)
+    if not value or value == '0' or is_enabled():
+        return
+    profile = enable(DEFAULT_DIR if value == '1' else value)
+
+    def dump_rest():
+        # Calls after the last savefig (or scripts that never save)
+        if profile.stats() and _out_dir:
+            profile.write(os.path.join(_out_dir, 'unsaved'))
+
+    atexit.register(dump_rest)
@@ -0,0 +1,489 @@
+"""
+AUSTIN KPI: Big-number cards from metric definitions
+====================================================
+
+01 computes one number ((1990 value - 2015 value) / days) and sets it in
+96 pt; 02 works out Qatar's 764x by hand. A weekly report wants hundreds
+of these. A metric definition says what to compute, and evaluate_metrics()
+computes it for every entity of the panel in one array operation:
+
+  - 'value'       the value in the end year,
+  - 'change'      end minus start,
+  - 'per_day'     change / days between the years (01),
+  - 'pct_change'  change as a percentage of the start value,
+  - 'multiple'    entity / other entity in the end year (02's 764x);
+                  other can be a name, 'min' or 'median'.
+
+Cards render through one KPICard template: the figure and its text
+artists are built once, and each card only replaces their text and
+colour before saving. render_cards() splits the cards over worker
+processes (or threads), one template per worker.
+
+USAGE:
+    from austin_kpi import evaluate_metrics, render_cards, KPICard
+
+    cards = evaluate_metrics([
+        {'dataset': 'extreme_poverty', 'entity': 'World', 'metric': 'per_day',
+         'column': 'Number of people living in extreme poverty',
+         'start': 1990, 'end': 2015, 'flip': True,
+         'label': 'people escaped extreme poverty every day',
+         'period': 'from {start} to {end}', 'good': 'up'},
+        {'dataset': 'life_expectancy_gender', 'metric': 'pct_change',
+         'column': 'Life expectancy of women', 'start': 1990, 'good': 'up'},
+    ])                                     # one row per entity and metric
+    render_cards(cards, 'out/kpi', workers=4)
+
+    card = KPICard()
+    card.update(cards.iloc[0])
+    card.save('out/poverty.png')
+
+    python austin_kpi.py metrics.json --out out/kpi --workers 4
+    python austin_kpi.py --out /tmp/kpi --bench   # built-in metrics, timed
+
+METRIC KEYS:
+    dataset, column, metric   Required
+    entity       One name, a list, or omitted for every entity
+    start, end   Years; end defaults to the latest year well covered
+    other        'multiple' only: a name, 'min' (default) or 'median'
+    flip         Negate the result (a fall reads as a positive number)
+    scale        Multiply the result, e.g. 1e-6 for millions
+    format       Number format, e.g. '{:,.0f}' or '{:,.0f}x'
+    label, period, note, source   Text; may use {entity}, {other},
+                 {start}, {end}, {column}, {start_value}, {end_value},
+                 {change}
+    good         'up' or 'down': the colour says good news or bad
+    color        Palette name; overrides good
+    name         Output file stem (default '{metric}_{column}_{entity}');
+                 must be unique across the batch
+
+"""
+
+import argparse
+import copy
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from austin_annotations import PALETTE, add_source_note
+from austin_data import load_dataset, panel_columns
+from austin_figures import release_figure
+from austin_insights import _countries, _latest, panel_matrix
+from austin_specs import read_records
+from austin_styles import STYLE_FILES, new_figure, style_context
+
+
+METRICS = ('value', 'change', 'per_day', 'pct_change', 'multiple')
+
+DEFAULTS = {
+    'entity': None,
+    'start': None,
+    'end': None,
+    'other': 'min',
+    'flip': False,
+    'scale': 1,
+    'format': None,
+    'label': None,
+    'period': None,
+    'note': '',
+    'source': '',
+    'good': None,
+    'color': None,
+    'name': '{metric}_{column}_{entity}',
+    'countries_only': True,
+}
+
+FORMATS = {
+    'value': '{:,.3g}',
+    'change': '{:+,.3g}',
+    'per_day': '{:,.0f}',
+    'pct_change': '{:+.0f}%',
+    'multiple': '{:,.0f}x',
+}
+
+LABELS = {
+    'value': '{column}',
+    'change': 'change in {column}',
+    'per_day': 'change in {column} every day',
+    'pct_change': 'change in {column}',
+    'multiple': '{column}, {entity} vs {other}',
+}
+
+PERIODS = {
+    'value': 'in {end}',
+    'change': '{start} to {end}',
+    'per_day': 'from {start} to {end}',
+    'pct_change': '{start} to {end}',
+    'multiple': 'in {end}',
+}
+
+DAYS_PER_YEAR = 365.25
+
+# Longest number that fits at full size on the default card
+NUMBER_CHARS = 8
+
+
+# ============================================================
+# METRIC DEFINITIONS
+# ============================================================
+
+def compile_metric(metric):
+    """
+    Validate a metric definition and fill in defaults.
+
+    Raises ValueError on missing or unknown keys and unknown metrics,
+    palette colours or directions.
+    """
+    if not isinstance(metric, dict):
+        raise ValueError(f"A metric definition must be a dict, got {type(metric).__name__}")
+    for key in ('dataset', 'column', 'metric'):
+        if key not in metric:
+            raise ValueError(f"Metric definition is missing required key '{key}'")
+    unknown = set(metric) - set(DEFAULTS) - {'dataset', 'column', 'metric'}
+    if unknown:
+        raise ValueError(f"Unknown metric keys {sorted(unknown)}")
+    if metric['metric'] not in METRICS:
+        raise ValueError(f"Unknown metric '{metric['metric']}'. Choose from: {list(METRICS)}")
+
+    out = copy.deepcopy(DEFAULTS)
+    out.update(copy.deepcopy(metric))
+    kind = out['metric']
+    if kind in ('change', 'per_day', 'pct_change') and out['start'] is None:
+        raise ValueError(f"A '{kind}' metric needs 'start'")
+    if out['good'] not in (None, 'up', 'down'):
+        raise ValueError(f"Unknown good '{out['good']}'. Choose from: [None, 'up', 'down']")
+    if out['color'] is not None and out['color'] not in PALETTE:
+        raise ValueError(f"Unknown color '{out['color']}'. Choose from: {list(PALETTE)}")
+    out['format'] = out['format'] or FORMATS[kind]
+    out['label'] = out['label'] or LABELS[kind]
+    out['period'] = out['period'] or PERIODS[kind]
+    return out
+
+
+def load_metrics(path):
+    """Read a metric table (.json, .jsonl or .yaml) and compile every definition."""
+    return [compile_metric(item) for item in read_records(path)]
+
+
+# ============================================================
+# EVALUATION
+# ============================================================
+
+def _year_index(years, year, metric):
+    found = np.nonzero(years == year)[0]
+    if not len(found):
+        raise ValueError(f"Year {year} not in '{metric['dataset']}' ({years.min()}-{years.max()})")
+    return int(found[0])
+
+
+def _rows(entities, selected, metric):
+    """Row indices for the entity key (None -> all)."""
+    if selected is None:
+        return np.arange(len(entities))
+    names = [selected] if isinstance(selected, str) else list(selected)
+    lookup = {name: i for i, name in enumerate(entities)}
+    missing = [n for n in names if n not in lookup]
+    if missing:
+        raise ValueError(f"Unknown entity '{missing[0]}' in '{metric['dataset']}'")
+    return np.array([lookup[n] for n in names], dtype=int)
+
+
+def _evaluate(metric, values, entities, years):
+    """One metric for every entity: result, start and end values, other names."""
+    kind = metric['metric']
+    end = _latest(values) if metric['end'] is None else _year_index(years, metric['end'], metric)
+    b = values[:, end]
+    a = np.full_like(b, np.nan)
+    start_year = None
+    if metric['start'] is not None:
+        start = _year_index(years, metric['start'], metric)
+        a, start_year = values[:, start], years[start]
+    other = np.full(len(b), None, dtype=object)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if kind == 'value':
+            result = b.copy()
+        elif kind == 'change':
+            result = b - a
+        elif kind == 'per_day':
+            result = (b - a) / ((years[end] - start_year) * DAYS_PER_YEAR)
+        elif kind == 'pct_change':
+            result = (b - a) / np.abs(a) * 100
+        else:
+            positive = np.where(b > 0, b, np.nan)
+            if metric['other'] == 'min':
+                j = np.nanargmin(positive)
+            elif metric['other'] == 'median':
+                j = None
+            else:
+                j = _rows(entities, metric['other'], metric)[0]
+            base = np.nanmedian(positive) if j is None else b[j]
+            result = b / base
+            other[:] = 'the median' if j is None else entities[j]
+            if j is not None:
+                result[j] = np.nan
+    sign = -1 if metric['flip'] else 1
+    return sign * result * metric['scale'], a, b, years[end], start_year, other
+
+
+def _color(metric, value):
+    if metric['color'] is not None:
+        return PALETTE[metric['color']]
+    if metric['good'] is None or not np.isfinite(value) or value == 0:
+        return PALETTE['primary']
+    # flip already turned a good fall into a positive number
+    up = value > 0 if metric['metric'] != 'multiple' else value > 1
+    good = up == (metric['good'] == 'up')
+    return PALETTE['positive'] if good else PALETTE['negative']
+
+
+def _slug(text):
+    return re.sub(r'[^A-Za-z0-9]+', '_', str(text)).strip('_').lower()
+
+
+def _plain(value):
+    return value.item() if hasattr(value, 'item') else value
+
+
+def evaluate_metrics(metrics):
+    """
+    Evaluate metric definitions into card rows.
+
+    Each (dataset, column) is pivoted to an entity x year array once, and
+    each definition is evaluated for all of its entities at once.
+    Entities with no result (missing years) are left out. Raises
+    ValueError if two cards get the same name, since one file would
+    overwrite the other.
+
+    Returns
+    -------
+    cards : DataFrame
+        One row per card: 'name', 'dataset', 'metric', 'entity', 'other',
+        'start', 'end', 'value' (the computed number), 'number' (its
+        formatted text), 'label', 'period', 'note', 'source', 'color'.
+    """
+    metrics = [compile_metric(m) for m in metrics]
+    frames, matrices = {}, {}
+    rows = []
+    for metric in metrics:
+        frame_key = (metric['dataset'], metric['countries_only'])
+        if frame_key not in frames:
+            df = load_dataset(metric['dataset'])
+            entity, year = panel_columns(df)
+            frames[frame_key] = (_countries(df, entity) if metric['countries_only'] else df,
+                                 entity, year)
+        df, entity, year = frames[frame_key]
+        key = frame_key + (metric['column'],)
+        if key not in matrices:
+            if metric['column'] not in df.columns:
+                raise ValueError(f"Column '{metric['column']}' not in '{metric['dataset']}'")
+            matrices[key] = panel_matrix(df, metric['column'], entity, year)
+        values, entities, years = matrices[key]
+
+        result, a, b, end, start, other = _evaluate(metric, values, entities, years)
+        for i in _rows(entities, metric['entity'], metric):
+            if not np.isfinite(result[i]):
+                continue
+            fields = dict(entity=entities[i], other=other[i], start=_plain(start),
+                          end=_plain(end), column=metric['column'].strip(),
+                          start_value=a[i], end_value=b[i], change=b[i] - a[i],
+                          metric=metric['metric'])
+            rows.append(dict(
+                name=_slug(metric['name'].format(**fields)),
+                dataset=metric['dataset'], metric=metric['metric'],
+                entity=entities[i], other=other[i], start=fields['start'], end=fields['end'],
+                value=result[i], number=metric['format'].format(result[i]),
+                label=metric['label'].format(**fields),
+                period=metric['period'].format(**fields),
+                note=metric['note'].format(**fields),
+                source=metric['source'].format(**fields),
+                color=_color(metric, result[i])))
+    cards = pd.DataFrame(rows, columns=['name', 'dataset', 'metric', 'entity', 'other', 'start',
+                                        'end', 'value', 'number', 'label', 'period', 'note',
+                                        'source', 'color'])
+    duplicated = cards['name'][cards['name'].duplicated()].unique()
+    if len(duplicated):
+        raise ValueError(f"Card name '{duplicated[0]}' is used more than once; give the "
+                         f"metrics distinct 'name' patterns, e.g. with {{column}} or {{start}}")
+    # Cards without a start year would otherwise turn every year into a float
+    for column in ('start', 'end'):
+        years = pd.to_numeric(cards[column])
+        if (years.dropna() % 1 == 0).all():
+            cards[column] = years.astype('Int64')
+    return cards
+
+
+# ============================================================
+# CARD TEMPLATE
+# ============================================================
+
+class KPICard:
+    """
+    A reusable big-number card laid out like 01.
+
+    The figure, axes and text artists are created once under the style;
+    update() only changes their text and colour, so a batch of cards pays
+    for the layout and font setup a single time.
+
+    Parameters
+    ----------
+    figsize : tuple
+    style : str
+        Kit style the card is built and saved under.
+    number_size : float
+        Point size of the headline number (01 uses 96). Longer numbers
+        are shrunk to fit.
+    """
+
+    def __init__(self, figsize=(10, 6), style='notebook', number_size=96):
+        if style not in STYLE_FILES:
+            raise ValueError(f"Unknown style '{style}'. Choose from: {list(STYLE_FILES)}")
+        self.style = style
+        self.number_size = number_size
+        with style_context(style):
+            self.fig = new_figure(figsize=figsize)
+            ax = self.fig.add_subplot()
+            ax.axis('off')
+            text = dict(ha='center', va='center', transform=ax.transAxes)
+            self.number = ax.text(0.5, 0.58, '', fontsize=number_size, fontweight='bold', **text)
+            self.label = ax.text(0.5, 0.38, '', fontsize=20, color=PALETTE['neutral'], **text)
+            self.period = ax.text(0.5, 0.28, '', fontsize=16, color='#999999', **text)
+            self.note = ax.text(0.5, 0.12, '', fontsize=13, color=PALETTE['neutral'],
+                                style='italic', **text)
+            self.source = add_source_note(ax, '')
+        self.ax = ax
+
+    def update(self, card):
+        """Show one card (a row of evaluate_metrics or a dict with the same keys)."""
+        number = str(card['number'])
+        self.number.set_text(number)
+        self.number.set_fontsize(self.number_size * min(1.0, NUMBER_CHARS / max(len(number), 1)))
+        self.number.set_color(card.get('color') or PALETTE['primary'])
+        for artist in ('label', 'period', 'note', 'source'):
+            getattr(self, artist).set_text(card.get(artist) or '')
+        return self
+
+    def save(self, path, dpi=300, **savefig_kw):
+        """Save the current card (01's settings: tight bbox on white)."""
+        kwargs = dict(dpi=dpi, bbox_inches='tight', facecolor='white')
+        kwargs.update(savefig_kw)
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with style_context(self.style):
+            self.fig.savefig(path, **kwargs)
+        return path
+
+    def close(self):
+        release_figure(self.fig)
+
+
+# ============================================================
+# EXPORT
+# ============================================================
+
+def _render_chunk(cards, out_dir, style, figsize, fmt, savefig_kw):
+    card = KPICard(figsize=figsize, style=style)
+    try:
+        return [card.update(c).save(os.path.join(out_dir, f"{c['name']}.{fmt}"), **savefig_kw)
+                for c in cards]
+    finally:
+        card.close()
+
+
+def render_cards(cards, out_dir, workers=None, threads=False, style='notebook',
+                 figsize=(10, 6), fmt='png', **savefig_kw):
+    """
+    Save every card, one KPICard template per worker.
+
+    Parameters
+    ----------
+    cards : DataFrame or list of dict
+        evaluate_metrics() output.
+    out_dir : str
+        Files are named '<name>.<fmt>'.
+    workers : int, optional
+        Processes (or threads with threads=True); the cards are split into
+        one contiguous chunk per worker. Default: CPU count.
+    **savefig_kw : dict
+        Passed to KPICard.save (dpi=300 by default).
+
+    Returns
+    -------
+    paths : list of str
+        In card order.
+    """
+    if isinstance(cards, pd.DataFrame):
+        cards = cards.to_dict('records')
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(cards)))
+    os.makedirs(out_dir, exist_ok=True)
+    if workers == 1:
+        return _render_chunk(cards, out_dir, style, figsize, fmt, savefig_kw)
+    chunks = [list(c) for c in np.array_split(np.array(cards, dtype=object), workers)]
+    executor = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    with executor(max_workers=workers) as pool:
+        futures = [pool.submit(_render_chunk, chunk, out_dir, style, figsize, fmt, savefig_kw)
+                   for chunk in chunks]
+        return [path for f in futures for path in f.result()]
+
+
+# ============================================================
+# BUILT-IN REPORT
+# ============================================================
+
+# 01 and 02 as metrics, plus one card per country for the weekly report
+REPORT = [
+    {'dataset': 'extreme_poverty', 'entity': 'World', 'metric': 'per_day',
+     'column': 'Number of people living in extreme poverty', 'start': 1990, 'end': 2015,
+     'flip': True, 'good': 'up', 'name': 'poverty_per_day',
+     'label': 'people escaped extreme poverty every day', 'period': 'from {start} to {end}',
+     'source': 'Source: Our World in Data / World Bank PIP'},
+    {'dataset': 'co2_per_capita', 'entity': 'Qatar', 'metric': 'multiple',
+     'column': 'CO₂ emissions per capita', 'other': 'Democratic Republic of Congo',
+     'label': 'more CO₂ per person in {entity} than in DR Congo', 'color': 'negative',
+     'name': 'co2_qatar_vs_drc', 'source': 'Source: Our World in Data / Global Carbon Budget 2024'},
+    {'dataset': 'life_expectancy_gender', 'metric': 'change', 'start': 1990,
+     'column': 'Life expectancy of women', 'format': '{:+.1f} yrs', 'good': 'up',
+     'label': "women's life expectancy in {entity}", 'name': 'life_women_{entity}',
+     'source': 'Source: Our World in Data / UN WPP'},
+]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Evaluate KPI metrics and export big-number cards.')
+    parser.add_argument('metrics', nargs='?', help='.json, .jsonl or .yaml metric table (default: built-in report)')
+    parser.add_argument('--out', default='kpi_cards')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--threads', action='store_true', help='use a thread pool instead of processes')
+    parser.add_argument('--dpi', type=float, default=300)
+    parser.add_argument('--limit', type=int, default=None, help='render only the first N cards')
+    parser.add_argument('--bench', action='store_true', help='also time rebuilding a figure per card')
+    args = parser.parse_args()
+
+    import matplotlib
+    matplotlib.use('Agg')
+    start = time.perf_counter()
+    cards = evaluate_metrics(load_metrics(args.metrics) if args.metrics else REPORT)
+    print(f'{len(cards)} cards evaluated in {(time.perf_counter() - start) * 1000:.0f} ms')
+    cards = cards.head(args.limit) if args.limit else cards
+
+    start = time.perf_counter()
+    paths = render_cards(cards, args.out, workers=args.workers, threads=args.threads, dpi=args.dpi)
+    elapsed = time.perf_counter() - start
+    print(f'{len(paths)} cards saved to {args.out} in {elapsed:.1f}s '
+          f'({elapsed / max(len(paths), 1) * 1000:.0f} ms each)')
+
+    if args.bench:
+        start = time.perf_counter()
+        for row in cards.to_dict('records'):
+            card = KPICard()
+            card.update(row).save(os.path.join(args.out, f"{row['name']}.png"), dpi=args.dpi)
+            card.close()
+        rebuilt = time.perf_counter() - start
+        print(f'rebuilding the figure per card: {rebuilt:.1f}s '
+              f'({rebuilt / max(len(paths), 1) * 1000:.0f} ms each)')
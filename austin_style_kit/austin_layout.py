@@ -0,0 +1,261 @@
+"""
+AUSTIN LAYOUT: Story headers without the tight-bbox double draw
+================================================================
+
+Every graphs/ script places its title, subtitle and insight line with
+hand-tuned transAxes offsets (1.08 / 1.03, or 1.14 / 1.08 / 1.03 when
+there is an insight line), then calls tight_layout() and
+savefig(bbox_inches='tight'). Both need full draws just to find extents.
+
+story_header measures the header and footer text with the cached text
+metrics, wraps long titles to the figure width, and pins the axes to the
+space that is left. The figure size is fixed and known up front, so
+save_story exports with a single draw.
+
+USAGE:
+    from austin_layout import story_header, save_story
+
+    fig, ax = plt.subplots(figsize=(12, 6))
+    ax.plot(...)                       # plot and set limits/ticks FIRST
+    story_header(fig,
+                 title='130 years of stability, then a relentless climb',
+                 subtitle='Temperature anomaly (°C vs. 1850–1900 baseline)',
+                 insight='2024 hit +1.53°C',
+                 source='Source: Our World in Data / HadCRUT5')
+    save_story(fig, '03_line_chart_temperature.png')
+
+story_header lays out one main axes (the first one by default). Figures
+with colorbars or several axes can pass right= or left= margins, or keep
+using tight_layout.
+
+"""
+
+import math
+
+import matplotlib as mpl
+from matplotlib.font_manager import FontProperties
+from matplotlib.transforms import Bbox
+
+from austin_annotations import PALETTE, SCALE_PROFILES
+from austin_textmetrics import get_text_metrics
+
+
+# ============================================================
+# HEADER STYLES
+# ============================================================
+
+HEADER_STYLES = {
+    'title': dict(size=14, weight='bold', color='#333333'),
+    'subtitle': dict(size=11, color='#888888'),
+    'insight': dict(size=10, weight='bold', color=PALETTE['primary']),
+    'source': dict(size=8, style='italic', color='#888888'),
+}
+
+# Spacing in points
+EDGE_PAD = 10       # between the figure edge and the outermost text
+LINE_GAP = 4        # between header lines
+AXES_GAP = 12       # between the header/footer and the axes
+
+
+def _measure(text, spec):
+    """(width, height) of text in points for a HEADER_STYLES entry."""
+    w, h, _ = get_text_metrics().measure(
+        text, size=spec['size'], weight=spec.get('weight', 'normal'),
+        style=spec.get('style', 'normal'), dpi=72)
+    return w, h
+
+
+# ============================================================
+# WRAPPING
+# ============================================================
+
+def wrap_text(text, width, size=14, weight='normal', style='normal'):
+    """
+    Greedy word wrap so no line is wider than width points.
+
+    Uses cached metrics, so wrapping the same title again is free.
+    Existing line breaks are kept.
+    """
+    metrics = get_text_metrics()
+    out = []
+    for paragraph in text.split('\n'):
+        words = paragraph.split(' ')
+        line = words[0]
+        for word in words[1:]:
+            candidate = f'{line} {word}'
+            if metrics.width(candidate, size=size, weight=weight, style=style, dpi=72) <= width:
+                line = candidate
+            else:
+                out.append(line)
+                line = word
+        out.append(line)
+    return '\n'.join(out)
+
+
+# ============================================================
+# AXIS DECORATION EXTENTS
+# ============================================================
+
+def _tick_label_extent(axis, along):
+    """
+    Space tick labels take away from the axes, in points.
+
+    along='height' for the x axis (label height), 'width' for the y axis.
+    Tick strings come from the axis' own locator and formatter, so no
+    draw is needed.
+    """
+    ticks = axis.get_major_ticks()
+    if not ticks or not ticks[0].label1.get_visible():
+        return 0.0
+    label = ticks[0].label1
+    lo, hi = sorted(axis.get_view_interval())
+    locs = [v for v in axis.get_major_locator()() if lo <= v <= hi]
+    if not locs:
+        return 0.0
+    strings = [s for s in axis.get_major_formatter().format_ticks(locs) if s]
+    if not strings:
+        return 0.0
+
+    size = FontProperties(size=label.get_fontsize()).get_size_in_points()
+    sizes = get_text_metrics().measure_many(strings, size=size,
+                                            weight=label.get_fontweight(), dpi=72)
+    angle = math.radians(label.get_rotation())
+    extents = [abs(w * math.sin(angle)) + abs(h * math.cos(angle)) if along == 'height'
+               else abs(w * math.cos(angle)) + abs(h * math.sin(angle))
+               for w, h, _ in sizes]
+
+    prefix = 'xtick' if along == 'height' else 'ytick'
+    tick = mpl.rcParams[f'{prefix}.major.size'] + mpl.rcParams[f'{prefix}.major.pad']
+    return max(extents) + tick
+
+
+def _axis_label_extent(label_artist):
+    text = label_artist.get_text()
+    if not text or not label_artist.get_visible():
+        return 0.0
+    size = FontProperties(size=label_artist.get_fontsize()).get_size_in_points()
+    _, h, _ = get_text_metrics().measure(text, size=size, dpi=72)
+    return h + mpl.rcParams['axes.labelpad']
+
+
+# ============================================================
+# STORY HEADER
+# ============================================================
+
+def _no_layout_engine(fig):
+    """Turn off tight/constrained layout so the margins set here stay put."""
+    if hasattr(fig, 'set_layout_engine'):
+        fig.set_layout_engine('none')
+    else:
+        # matplotlib < 3.6
+        fig.set_tight_layout(False)
+        fig.set_constrained_layout(False)
+
+
+def full_bbox(fig):
+    """
+    bbox_inches that saves the whole figure at its own size.
+
+    bbox_inches=None is not enough: savefig then falls back to
+    rcParams['savefig.bbox'], which the kit styles set to 'tight'
+    (a second draw and a size that depends on the content).
+    """
+    return Bbox.from_bounds(0, 0, *fig.get_size_inches())
+
+
+def story_header(fig, title, subtitle=None, insight=None, source=None, ax=None,
+                 left=None, right=None, wrap=True, profile='notebook'):
+    """
+    Lay out title, subtitle, insight line and source note, then pin the axes.
+
+    Call after plotting and setting limits, ticks and tick labels, since the
+    margins are computed from them.
+
+    Parameters
+    ----------
+    fig : matplotlib Figure
+    title, subtitle, insight, source : str or None
+        Header lines top to bottom, and the footnote.
+    ax : matplotlib Axes, optional
+        The axes to fit (default: fig.axes[0]).
+    left, right : float, optional
+        Margins in points. Default: left fits the y tick labels, right is
+        EDGE_PAD. Raise right for end-of-line labels or a colorbar.
+    wrap : bool
+        Wrap header lines that are wider than the figure.
+    profile : str
+        Scale profile for the header font sizes (see
+        austin_annotations.SCALE_PROFILES).
+
+    Returns
+    -------
+    texts : dict
+        The created Text artists keyed by 'title', 'subtitle', 'insight',
+        'source'.
+    """
+    ax = ax or fig.axes[0]
+    if profile not in SCALE_PROFILES:
+        raise ValueError(f"Unknown profile '{profile}'. Choose from: {list(SCALE_PROFILES.keys())}")
+    font_scale = SCALE_PROFILES[profile]['font']
+    styles = {role: dict(spec, size=round(spec['size'] * font_scale))
+              for role, spec in HEADER_STYLES.items()}
+    _no_layout_engine(fig)
+    fig_w = fig.get_figwidth() * 72
+    fig_h = fig.get_figheight() * 72
+
+    if ax.axison:
+        y_space = _tick_label_extent(ax.yaxis, 'width') + _axis_label_extent(ax.yaxis.label)
+        x_space = _tick_label_extent(ax.xaxis, 'height') + _axis_label_extent(ax.xaxis.label)
+    else:
+        y_space = x_space = 0.0
+    left = EDGE_PAD + y_space if left is None else left
+    right = EDGE_PAD if right is None else right
+    text_width = fig_w - left - right
+
+    texts = {}
+    y = fig_h - EDGE_PAD
+    for role, text in (('title', title), ('subtitle', subtitle), ('insight', insight)):
+        if not text:
+            continue
+        spec = styles[role]
+        if wrap:
+            text = wrap_text(text, text_width, size=spec['size'],
+                             weight=spec.get('weight', 'normal'),
+                             style=spec.get('style', 'normal'))
+        _, h = _measure(text, spec)
+        texts[role] = fig.text(left / fig_w, y / fig_h, text, ha='left', va='top',
+                               fontsize=spec['size'], color=spec['color'],
+                               fontweight=spec.get('weight', 'normal'),
+                               style=spec.get('style', 'normal'))
+        y -= h + LINE_GAP
+    top = y + LINE_GAP - (AXES_GAP if texts else 0)
+
+    bottom = EDGE_PAD
+    if source:
+        spec = styles['source']
+        _, h = _measure(source, spec)
+        texts['source'] = fig.text(left / fig_w, bottom / fig_h, source, ha='left',
+                                   va='bottom', fontsize=spec['size'],
+                                   color=spec['color'], style=spec['style'])
+        bottom += h + AXES_GAP
+    bottom += x_space
+
+    width = max(fig_w - left - right, 1)
+    height = max(top - bottom, 1)
+    ax.set_position([left / fig_w, bottom / fig_h, width / fig_w, height / fig_h])
+    return texts
+
+
+def save_story(fig, path, **savefig_kw):
+    """
+    Save a figure laid out by story_header with a single draw.
+
+    Defaults to dpi=300 and a white background, and always saves the
+    full figure (full_bbox) so the layout is not re-measured, whatever
+    savefig.bbox the active style sets.
+    """
+    kwargs = dict(dpi=300, facecolor='white')
+    kwargs.update(savefig_kw)
+    kwargs['bbox_inches'] = full_bbox(fig)
+    fig.savefig(path, **kwargs)
+    return path
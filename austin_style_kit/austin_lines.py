@@ -0,0 +1,302 @@
+"""
+AUSTIN LINES: Line helpers that stay fast on long time series
+==============================================================
+
+The graphs/ scripts plot every yearly point, which is fine for 175 years.
+Monthly and daily series with 10^5-10^7 points are not: Line2D drawing and
+SVG/PDF output grow linearly with the number of vertices. These helpers add
+an opt-in downsampling stage that targets the axes' pixel width, keeps the
+peaks, and never drops the points you annotate.
+
+USAGE:
+    from austin_lines import plot_line, plot_split, lttb, minmax_downsample
+
+    # Same call as ax.plot, reduced to ~2 points per pixel column
+    plot_line(ax, df['date'], df['value'], downsample='lttb',
+              keep=[1980], color=PALETTE['primary'])
+
+    # Or downsample yourself
+    x_small, y_small = lttb(x, y, n_out=2000)
+
+    # Gray before a year, purple after (03's flat era vs the climb)
+    plot_split(ax, world['Year'], world['Average'], at=1980)
+
+"""
+
+import numpy as np
+import matplotlib as mpl
+
+from austin_annotations import PALETTE
+
+
+# ============================================================
+# DOWNSAMPLING ALGORITHMS
+# ============================================================
+
+METHODS = ('lttb', 'minmax')
+
+
+def _as_float_arrays(x, y):
+    """Return float64 copies of x and y plus the positions where both are finite."""
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=float)
+    if np.issubdtype(x.dtype, np.datetime64):
+        x_num = x.astype('datetime64[ns]').astype(np.int64).astype(float)
+    else:
+        x_num = x.astype(float)
+    finite = np.isfinite(x_num) & np.isfinite(y)
+    return x_num, y, np.flatnonzero(finite)
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Indices selected by Largest-Triangle-Three-Buckets.
+
+    Parameters
+    ----------
+    x, y : array-like
+        Series sorted by x. Non-finite points are skipped.
+    n_out : int
+        Number of points to keep (>= 3).
+
+    Returns
+    -------
+    indices : ndarray of int
+        Sorted positions into the original arrays.
+    """
+    x_num, y, valid = _as_float_arrays(x, y)
+    if n_out < 3:
+        raise ValueError(f"n_out must be at least 3, got {n_out}")
+    n = len(valid)
+    if n_out >= n:
+        return valid
+
+    xv = x_num[valid]
+    yv = y[valid]
+
+    # First and last points are always kept; the rest are split into
+    # n_out - 2 buckets of (nearly) equal size.
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    starts, stops = edges[:-1], edges[1:]
+
+    # Each bucket's "next point" is the mean of the following bucket, which
+    # does not depend on earlier choices, so compute them all at once.
+    csx = np.concatenate(([0.0], np.cumsum(xv)))
+    csy = np.concatenate(([0.0], np.cumsum(yv)))
+    next_starts = np.append(stops[:-1], n - 1)
+    next_stops = np.append(stops[1:], n)
+    counts = next_stops - next_starts
+    avg_x = (csx[next_stops] - csx[next_starts]) / counts
+    avg_y = (csy[next_stops] - csy[next_starts]) / counts
+
+    out = np.empty(n_out, dtype=np.int64)
+    out[0] = 0
+    out[-1] = n - 1
+    a = 0
+    for i, (lo, hi) in enumerate(zip(starts, stops)):
+        bx = xv[lo:hi]
+        by = yv[lo:hi]
+        # Twice the triangle area; the constant factor doesn't change argmax
+        area = np.abs((xv[a] - avg_x[i]) * (by - yv[a])
+                      - (xv[a] - bx) * (avg_y[i] - yv[a]))
+        a = lo + int(np.argmax(area))
+        out[i + 1] = a
+    return valid[out]
+
+
+def minmax_indices(x, y, n_bins):
+    """
+    Indices of the min and max point in each of n_bins equal-width x bins.
+
+    Fully vectorized. Keeps every local extreme at pixel resolution, which
+    makes it the safer choice for noisy daily data where spikes matter.
+    """
+    x_num, y, valid = _as_float_arrays(x, y)
+    n = len(valid)
+    if 2 * n_bins + 2 >= n:
+        return valid
+
+    xv = x_num[valid]
+    yv = y[valid]
+    span = xv[-1] - xv[0]
+    if span <= 0:
+        return valid[[0, n - 1]]
+    bins = np.minimum(((xv - xv[0]) / span * n_bins).astype(np.int64), n_bins - 1)
+
+    # Order by (bin, y) once; the first and last entry of each bin run are
+    # that bin's min and max.
+    order = np.lexsort((yv, bins))
+    sorted_bins = bins[order]
+    first = np.flatnonzero(np.r_[True, sorted_bins[1:] != sorted_bins[:-1]])
+    last = np.r_[first[1:] - 1, n - 1]
+
+    picked = np.concatenate(([0, n - 1], order[first], order[last]))
+    return valid[np.unique(picked)]
+
+
+def _nearest_indices(x, values):
+    """Positions in sorted x closest to each of values."""
+    x_num, _, _ = _as_float_arrays(x, np.zeros(len(x)))
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        values = values.astype('datetime64[ns]').astype(np.int64)
+    values = values.astype(float)
+    pos = np.clip(np.searchsorted(x_num, values), 1, len(x_num) - 1)
+    left_closer = np.abs(values - x_num[pos - 1]) <= np.abs(x_num[pos] - values)
+    return np.where(left_closer, pos - 1, pos)
+
+
+def downsample_series(x, y, n_out, method='lttb', keep=None):
+    """
+    Reduce a sorted series to about n_out points.
+
+    Parameters
+    ----------
+    x, y : array-like
+        Series sorted by x (numbers or datetime64).
+    n_out : int
+        Target number of points.
+    method : str
+        'lttb' (shape-preserving) or 'minmax' (extreme-preserving).
+    keep : array-like, optional
+        x values that must survive, e.g. annotated inflection years.
+        The nearest sample to each is kept.
+
+    Returns
+    -------
+    x_out, y_out : ndarray
+        Missing (non-finite) points are never sampled, but each run of
+        them between two kept points leaves one behind, so the line is
+        still broken there instead of bridging the gap.
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}'. Choose from: {list(METHODS)}")
+
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if method == 'lttb':
+        idx = lttb_indices(x, y, n_out)
+    else:
+        idx = minmax_indices(x, y, max(n_out // 2, 1))
+
+    # Always keep the global peaks and anything the caller annotates
+    extras = []
+    finite_y = np.where(np.isfinite(y.astype(float)), y.astype(float), np.nan)
+    if np.isfinite(finite_y).any():
+        extras += [int(np.nanargmax(finite_y)), int(np.nanargmin(finite_y))]
+    if keep is not None and len(x) > 1:
+        extras += list(_nearest_indices(x, np.atleast_1d(keep)))
+    if extras:
+        idx = np.union1d(idx, extras)
+    idx = _with_gaps(idx, x, y)
+    return x[idx], y[idx]
+
+
+def _with_gaps(idx, x, y):
+    """idx plus the first missing point between any two kept points a gap separates."""
+    x_num, y_num, _ = _as_float_arrays(x, y)
+    missing = np.flatnonzero(~(np.isfinite(x_num) & np.isfinite(y_num)))
+    if not len(missing) or len(idx) < 2:
+        return idx
+    first = missing[np.minimum(np.searchsorted(missing, idx[:-1]), len(missing) - 1)]
+    return np.union1d(idx, first[(first > idx[:-1]) & (first < idx[1:])])
+
+
+# Short aliases matching the algorithm names
+def lttb(x, y, n_out, keep=None):
+    """Largest-Triangle-Three-Buckets downsampling. See downsample_series()."""
+    return downsample_series(x, y, n_out, method='lttb', keep=keep)
+
+
+def minmax_downsample(x, y, n_out, keep=None):
+    """Min/max-per-column downsampling. See downsample_series()."""
+    return downsample_series(x, y, n_out, method='minmax', keep=keep)
+
+
+# ============================================================
+# PIXEL TARGETING
+# ============================================================
+
+def target_points(ax, dpi=None, points_per_pixel=2):
+    """
+    How many points a line on ax can actually show when saved at dpi.
+
+    Uses the axes' current width, so call it after the figure size is set.
+    dpi defaults to savefig.dpi from the active style (300 in the kit).
+    """
+    fig = ax.figure
+    if dpi is None:
+        dpi = mpl.rcParams['savefig.dpi']
+        if dpi == 'figure':
+            dpi = fig.dpi
+    width_px = ax.bbox.width * dpi / fig.dpi
+    return max(int(width_px * points_per_pixel), 3)
+
+
+# ============================================================
+# LINE HELPERS
+# ============================================================
+
+def plot_line(ax, x, y, downsample=None, keep=None, dpi=None,
+              points_per_pixel=2, **kwargs):
+    """
+    ax.plot with an opt-in downsampling stage.
+
+    Parameters
+    ----------
+    ax : matplotlib Axes
+    x, y : array-like
+        Series sorted by x.
+    downsample : str or None
+        None draws every point (the old behavior). 'lttb' or 'minmax'
+        reduce the series to what the saved image can resolve.
+    keep : array-like, optional
+        x values to preserve exactly (annotation anchors, colour splits).
+    dpi : float, optional
+        Export resolution to target; defaults to savefig.dpi.
+    points_per_pixel : int
+        Samples kept per pixel column (2 is visually lossless for lttb).
+    **kwargs : dict
+        Passed through to ax.plot.
+
+    Returns
+    -------
+    line : matplotlib.lines.Line2D
+    """
+    if downsample is not None:
+        n_out = target_points(ax, dpi=dpi, points_per_pixel=points_per_pixel)
+        if len(x) > n_out:
+            x, y = downsample_series(x, y, n_out, method=downsample, keep=keep)
+    line, = ax.plot(x, y, **kwargs)
+    return line
+
+
+def plot_split(ax, x, y, at, colors=None, linewidths=(2.5, 3), downsample=None, **kwargs):
+    """
+    One series drawn in two colours, split at x == at (the 03 pattern).
+
+    Both halves include the split point, so the line stays joined. at is
+    typically a detected break year (austin_breaks.find_breaks).
+
+    Parameters
+    ----------
+    colors : tuple, optional
+        (before, after); defaults to the neutral gray and primary purple.
+    linewidths : tuple
+        (before, after).
+    **kwargs : dict
+        Passed through to plot_line for both halves.
+
+    Returns
+    -------
+    before, after : matplotlib.lines.Line2D
+    """
+    if colors is None:
+        colors = (PALETTE['neutral'], PALETTE['primary'])
+    x = np.asarray(x)
+    y = np.asarray(y)
+    lines = []
+    for mask, color, linewidth in zip((x <= at, x >= at), colors, linewidths):
+        lines.append(plot_line(ax, x[mask], y[mask], downsample=downsample, keep=[at],
+                               color=color, linewidth=linewidth, **kwargs))
+    return tuple(lines)
@@ -0,0 +1,272 @@
+"""
+AUSTIN PAIRS: Before/after charts from one data pipeline per story
+===================================================================
+
+graphs/ugly/NN_ugly.py and graphs/NN_*.py read and filter the same CSV,
+so rebuilding the comparison gallery parses every dataset twice. The
+paired renderer runs both scripts of a story back to back in the same
+process with pd.read_csv shared: the first read parses the file, the
+second gets a deep copy of the parsed frame (a memory copy, far cheaper
+than parsing again; a shallow copy would let one script's in-place edits
+reach the other on pandas without copy-on-write).
+
+  - the "before" script runs under Matplotlib's defaults, the "after"
+    script under whatever style it applies itself, with rcParams reset
+    in between so neither leaks into the other,
+  - with workers > 1 each story is one task in a process pool, so the
+    parsed data never crosses a process boundary,
+  - out_dir redirects the saves (austin_regression.redirected_saves)
+    so the committed PNGs stay untouched.
+
+For new charts, render_pair(prepare, before, after) takes the shared step
+literally: prepare() runs once and both builders get the same frame.
+
+USAGE:
+    python austin_pairs.py                        # every story, all cores
+    python austin_pairs.py 03 07 --out /tmp/pairs # two stories, saves redirected
+    python austin_pairs.py --gallery              # then refresh the thumbnails
+
+    from austin_pairs import run_pairs, render_pair
+    results = run_pairs(workers=4)
+
+    render_pair(lambda: load_dataset('temperature_anomaly'),
+                plain_chart, story_chart, 'out/03_{side}.png')
+
+"""
+
+import argparse
+import contextlib
+import functools
+import glob
+import io
+import os
+import runpy
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib as mpl
+
+from austin_figures import release_figure
+from austin_regression import GRAPHS_DIR, ROOT_DIR, _init_worker, redirected_saves
+from austin_styles import profile_style, style_context
+
+
+# ============================================================
+# STORIES
+# ============================================================
+
+def story_pairs(*numbers, graphs_dir=GRAPHS_DIR):
+    """
+    (number, ugly_script, polished_script) for each story with both scripts.
+
+    numbers restricts the result, e.g. story_pairs('03', '07').
+    """
+    polished = {}
+    for path in sorted(glob.glob(os.path.join(graphs_dir, '[0-9][0-9]_*.py'))):
+        polished.setdefault(os.path.basename(path)[:2], path)
+    pairs = []
+    for ugly in sorted(glob.glob(os.path.join(graphs_dir, 'ugly', '[0-9][0-9]_ugly.py'))):
+        number = os.path.basename(ugly)[:2]
+        if number in polished and (not numbers or number in numbers):
+            pairs.append((number, ugly, polished[number]))
+    return pairs
+
+
+# ============================================================
+# SHARED READS
+# ============================================================
+
+def _cache_key(args, kwargs):
+    try:
+        key = (args, tuple(sorted(kwargs.items())))
+        hash(key)
+    except TypeError:
+        return None
+    path = args[0] if args else kwargs.get('filepath_or_buffer')
+    if not isinstance(path, (str, os.PathLike)) or not os.path.isfile(path):
+        return None
+    return key + (os.path.getmtime(path),)
+
+
+@contextlib.contextmanager
+def shared_reads():
+    """
+    Parse each CSV at most once inside the block.
+
+    Later pd.read_csv calls with the same arguments get a copy of the
+    first result, so one script's edits never reach the next. Yields a
+    dict with 'parsed' and 'shared' counts.
+    """
+    import pandas as pd
+
+    read_csv = pd.read_csv
+    cache = {}
+    stats = dict(parsed=0, shared=0)
+
+    @functools.wraps(read_csv)
+    def cached_read_csv(*args, **kwargs):
+        key = _cache_key(args, kwargs)
+        if key is None:
+            stats['parsed'] += 1
+            return read_csv(*args, **kwargs)
+        if key not in cache:
+            stats['parsed'] += 1
+            cache[key] = read_csv(*args, **kwargs)
+        else:
+            stats['shared'] += 1
+        return cache[key].copy()
+
+    pd.read_csv = cached_read_csv
+    try:
+        yield stats
+    finally:
+        pd.read_csv = read_csv
+
+
+# ============================================================
+# PAIRED SCRIPTS
+# ============================================================
+
+def _run_script(script):
+    import matplotlib.pyplot as plt
+
+    mpl.rcdefaults()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            runpy.run_path(script, run_name='__main__')
+    finally:
+        plt.close('all')
+        mpl.rcdefaults()
+
+
+def render_story(number, ugly, polished, out_dir=None):
+    """
+    Run one story's before and after scripts with shared CSV reads.
+
+    Runs in the calling process, which should be on the Agg backend
+    (run_pairs sees to that).
+
+    Returns
+    -------
+    result : dict
+        'story', 'seconds', 'parsed' and 'shared' (read_csv calls that
+        parsed a file / reused one), 'saved' (written paths) and 'error'
+        (None when both scripts ran).
+    """
+    result = dict(story=number, saved=[], error=None)
+    start = time.perf_counter()
+    # Keep the scripts' own bbox options: these are the gallery images
+    redirect = (redirected_saves(out_dir, full_figure=False) if out_dir
+                else contextlib.nullcontext([]))
+    with shared_reads() as stats, redirect as saved, warnings.catch_warnings():
+        warnings.filterwarnings('ignore', message='.*non-interactive.*')
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        for script in (ugly, polished):
+            try:
+                _run_script(script)
+            except Exception as exc:
+                result['error'] = f'{os.path.basename(script)}: {type(exc).__name__}: {exc}'
+                break
+    result.update(stats, seconds=round(time.perf_counter() - start, 3),
+                  saved=[os.path.relpath(target, ROOT_DIR) for _, target in saved])
+    return result
+
+
+def run_pairs(*numbers, out_dir=None, workers=None):
+    """
+    Render every before/after story, one task per story.
+
+    Parameters
+    ----------
+    numbers : str
+        Story numbers to render (default: all).
+    out_dir : str, optional
+        Redirect every save there instead of overwriting graphs/.
+    workers : int, optional
+        Processes (default: CPU count). Each story's data stays in the
+        worker that renders both of its charts.
+
+    Returns
+    -------
+    results : list of dict
+        render_story results in story order. With one worker the stories
+        run in this process if it is already on Agg, else in a single
+        worker, so the caller's backend is never switched.
+    """
+    pairs = story_pairs(*numbers)
+    if workers is None:
+        workers = min(len(pairs), os.cpu_count() or 1)
+    if workers <= 1 and mpl.get_backend().lower() == 'agg':
+        return [render_story(*pair, out_dir=out_dir) for pair in pairs]
+    with ProcessPoolExecutor(max_workers=max(workers, 1), initializer=_init_worker) as pool:
+        futures = [pool.submit(render_story, *pair, out_dir=out_dir) for pair in pairs]
+        return [f.result() for f in futures]
+
+
+# ============================================================
+# PAIRED BUILDERS
+# ============================================================
+
+def render_pair(prepare, before, after, out, profile='notebook', **savefig_kw):
+    """
+    Prepare the data once, then export the default and the styled chart.
+
+    Parameters
+    ----------
+    prepare : callable
+        prepare() -> data. Runs exactly once.
+    before, after : callable
+        build(data) -> Figure. before runs under Matplotlib's defaults,
+        after under the kit style for profile.
+    out : str
+        Output path pattern with '{side}' ('before' / 'after').
+    **savefig_kw : dict
+        Passed to savefig (defaults: dpi=300, facecolor='white').
+
+    Returns
+    -------
+    paths : dict
+        'before' and 'after' -> written path.
+    """
+    data = prepare()
+    kwargs = dict(dpi=300, facecolor='white')
+    kwargs.update(savefig_kw)
+    contexts = {'before': lambda: style_context(mpl.rcParamsDefault),
+                'after': lambda: style_context(profile_style(profile))}
+    paths = {}
+    for side, build in (('before', before), ('after', after)):
+        path = out.format(side=side)
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        with contexts[side]():
+            fig = build(data)
+            fig.savefig(path, **kwargs)
+        release_figure(fig)
+        paths[side] = path
+    return paths
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Render before/after stories with one data pass each.')
+    parser.add_argument('stories', nargs='*', help='story numbers, e.g. 03 07 (default: all)')
+    parser.add_argument('--out', default=None, help='redirect saves here instead of graphs/')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--gallery', action='store_true', help='refresh the gallery thumbnails afterwards')
+    args = parser.parse_args()
+
+    _init_worker()
+    start = time.perf_counter()
+    results = run_pairs(*args.stories, out_dir=args.out, workers=args.workers)
+    for r in results:
+        status = f"ERROR {r['error']}" if r['error'] else 'ok'
+        print(f"{r['story']}  {r['seconds']:6.2f}s  csv parsed {r['parsed']}, "
+              f"shared {r['shared']}  {status}")
+    print(f'{len(results)} stories in {time.perf_counter() - start:.1f}s')
+
+    if args.gallery and not args.out:
+        from austin_gallery import build_gallery
+        summary = build_gallery()
+        print(f"gallery: {len(summary['built'])} thumbnails rebuilt")
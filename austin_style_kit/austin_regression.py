@@ -0,0 +1,384 @@
+"""
+AUSTIN REGRESSION: Pixel-diff checks of the gallery against its goldens
+========================================================================
+
+graphs/*.png and graphs/ugly/*.png are committed, but nothing notices
+when a style-kit change alters them. This runner re-executes every
+chart script headlessly (Agg), redirects each savefig to an output
+folder, and compares the result with its golden in graphs/goldens/:
+
+  1. byte-identical files pass without decoding,
+  2. otherwise a per-channel tolerance picks candidate pixels and a
+     CIELAB delta-E mask keeps only the ones a reader could see,
+  3. failing charts get a delta-E heatmap drawn with austin_cmap.
+
+Renders are deterministic: rcParams are reset before each script, the
+generic font families are pinned to the DejaVu fonts that ship with
+Matplotlib (whatever IBM Plex or Arial the machine has), every save
+covers the whole figure instead of a bbox-tight crop that jitters by a
+pixel, and PNG metadata (the Matplotlib version string) is stripped.
+The goldens are therefore separate from the gallery PNGs, which keep
+their tight crop and the reader's fonts.
+
+USAGE:
+    python austin_regression.py                    # every script, all cores
+    python austin_regression.py ../graphs/03_line_chart_temperature.py
+    python austin_regression.py --update           # accept renders as goldens
+
+    from austin_regression import run_regression, compare_images
+    results = run_regression(workers=8)
+    diff = compare_images('golden.png', 'new.png', heatmap='diff.png')
+
+"""
+
+import argparse
+import contextlib
+import glob
+import hashlib
+import io
+import json
+import os
+import runpy
+import shutil
+import sys
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import matplotlib as mpl
+import matplotlib.image as mimage
+from matplotlib import font_manager
+
+from austin_audit import load_rgb, srgb_to_lab
+from austin_colormaps import austin_cmap
+from austin_layout import full_bbox
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GRAPHS_DIR = os.path.join(ROOT_DIR, 'graphs')
+OUT_DIR = os.path.join(GRAPHS_DIR, 'regression')
+GOLDEN_DIR = os.path.join(GRAPHS_DIR, 'goldens')
+
+# Held for the whole render; every family resolves to a file in
+# matplotlib's own data folder, so all machines draw the same glyphs
+PINNED_FONTS = {
+    'font.sans-serif': ['DejaVu Sans'],
+    'font.serif': ['DejaVu Serif'],
+    'font.monospace': ['DejaVu Sans Mono'],
+}
+
+# 8-bit levels a channel may move before a pixel is looked at at all
+CHANNEL_TOLERANCE = 8
+
+# CIE76 delta-E above which a changed pixel is visible (2.3 is one JND)
+DELTA_E = 2.3
+
+# Share of visibly changed pixels a chart may have and still pass
+MAX_CHANGED = 1e-4
+
+# Delta-E mapped to the dark end of the heatmap
+HEATMAP_MAX = 50.0
+
+
+# ============================================================
+# COMPARISON
+# ============================================================
+
+def _file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def compare_images(golden, actual, tolerance=CHANNEL_TOLERANCE, delta_e=DELTA_E,
+                   max_changed=MAX_CHANGED, heatmap=None):
+    """
+    Compare a rendered PNG with its golden.
+
+    Parameters
+    ----------
+    golden, actual : str
+        PNG files.
+    tolerance : int
+        Per-channel difference in 8-bit levels that is ignored outright.
+    delta_e : float
+        CIELAB distance a pixel must move to count as changed.
+    max_changed : float
+        Share of changed pixels above which the comparison fails.
+    heatmap : str, optional
+        Where to write a delta-E heatmap (only when the comparison fails).
+
+    Returns
+    -------
+    result : dict
+        'status' ('pass' | 'fail'), 'reason', 'changed' (share of pixels),
+        'max_delta_e' and 'heatmap' (path or None).
+    """
+    result = dict(status='pass', reason='identical', changed=0.0,
+                  max_delta_e=0.0, heatmap=None)
+    if _file_hash(golden) == _file_hash(actual):
+        return result
+
+    a = load_rgb(golden)
+    b = load_rgb(actual)
+    if a.shape != b.shape:
+        result.update(status='fail', reason=f'size {a.shape[1]}x{a.shape[0]} -> '
+                                            f'{b.shape[1]}x{b.shape[0]}', changed=1.0)
+        return result
+
+    qa = np.rint(a * 255).astype(np.int16)
+    qb = np.rint(b * 255).astype(np.int16)
+    candidates = (np.abs(qa - qb) > tolerance).any(axis=2)
+    de = np.zeros(candidates.shape, dtype=np.float32)
+    if candidates.any():
+        # delta-E only for the few pixels that moved
+        de[candidates] = np.linalg.norm(srgb_to_lab(a[candidates]) - srgb_to_lab(b[candidates]),
+                                        axis=1)
+    changed = float((de > delta_e).mean())
+    result.update(changed=changed, max_delta_e=round(float(de.max()), 2),
+                  reason='within tolerance')
+
+    if changed > max_changed:
+        result.update(status='fail', reason=f'{changed:.3%} of pixels changed')
+        if heatmap:
+            os.makedirs(os.path.dirname(os.path.abspath(heatmap)), exist_ok=True)
+            mimage.imsave(heatmap, de, cmap=austin_cmap, vmin=0, vmax=HEATMAP_MAX,
+                          metadata={'Software': None})
+            result['heatmap'] = heatmap
+    return result
+
+
+# ============================================================
+# HEADLESS RENDERING
+# ============================================================
+
+def chart_scripts(*paths):
+    """Chart scripts to check (default: graphs/*.py and graphs/ugly/*.py)."""
+    if not paths:
+        paths = (GRAPHS_DIR, os.path.join(GRAPHS_DIR, 'ugly'))
+    scripts = []
+    for path in paths:
+        if os.path.isfile(path):
+            scripts.append(os.path.abspath(path))
+        else:
+            scripts += sorted(glob.glob(os.path.join(os.path.abspath(path), '*.py')))
+    return scripts
+
+
+@contextlib.contextmanager
+def redirected_saves(out_dir, golden_dir=GOLDEN_DIR, full_figure=True):
+    """
+    Send every Figure.savefig to out_dir; yields the (golden, output) pairs.
+
+    With full_figure each save covers the whole figure (bbox_inches is
+    overridden); otherwise the script's own options are kept. plt.show()
+    does nothing, so scripts run unattended on any backend.
+    """
+    import matplotlib.pyplot as plt
+    from matplotlib.figure import Figure
+
+    saved = []
+    original = Figure.savefig
+    show = plt.show
+
+    def savefig(fig, fname, *args, **kwargs):
+        if not isinstance(fname, (str, os.PathLike)):
+            return original(fig, fname, *args, **kwargs)
+        name = os.path.basename(os.fspath(fname))
+        target = os.path.join(out_dir, name)
+        if target.lower().endswith('.png'):
+            kwargs['metadata'] = dict(kwargs.get('metadata') or {}, Software=None)
+        if full_figure:
+            kwargs['bbox_inches'] = full_bbox(fig)
+        saved.append((os.path.join(golden_dir, name), target))
+        return original(fig, target, *args, **kwargs)
+
+    Figure.savefig = savefig
+    plt.show = lambda *args, **kwargs: None
+    try:
+        yield saved
+    finally:
+        Figure.savefig = original
+        plt.show = show
+
+
+@contextlib.contextmanager
+def pinned_fonts(fonts=PINNED_FONTS):
+    """
+    Hold the generic font families on fonts while the block runs.
+
+    Swaps the rcParams validators, so a style the script applies (or a
+    direct rcParams assignment) cannot set them to anything else.
+    """
+    validate = mpl.rcParams.validate
+    saved = {key: validate[key] for key in fonts}
+    for key, value in fonts.items():
+        validate[key] = lambda _, value=value: list(value)
+    try:
+        dict.update(mpl.rcParams, {key: list(value) for key, value in fonts.items()})
+        yield
+    finally:
+        validate.update(saved)
+
+
+def _resolved_fonts():
+    """Font file each generic family resolves to, and whether it ships with matplotlib."""
+    data = os.path.realpath(mpl.get_data_path())
+    fonts = {}
+    for family in ('sans-serif', 'serif', 'monospace'):
+        requested = mpl.rcParams[f'font.{family}'][0]
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore')
+            path = font_manager.findfont(font_manager.FontProperties(family=[family]),
+                                         fallback_to_default=True)
+        fonts[family] = dict(requested=requested, file=os.path.basename(path),
+                             bundled=os.path.realpath(path).startswith(data + os.sep))
+    return fonts
+
+
+def _init_worker():
+    mpl.use('Agg')
+    warnings.filterwarnings('ignore', message='.*non-interactive.*')
+
+
+def check_script(script, out_dir=OUT_DIR, tolerance=CHANNEL_TOLERANCE,
+                 delta_e=DELTA_E, max_changed=MAX_CHANGED):
+    """
+    Re-render one chart script and compare everything it saves.
+
+    Runs in the calling process, which should be on the Agg backend
+    (run_regression sees to that).
+
+    Returns
+    -------
+    result : dict
+        'script', 'seconds', 'fonts', 'status' (worst of its images:
+        'error' > 'fail' > 'new' > 'pass') and 'images' (one dict per
+        saved file with 'golden', 'output' plus compare_images fields).
+    """
+    import matplotlib.pyplot as plt
+
+    name = os.path.splitext(os.path.basename(script))[0]
+    result = dict(script=os.path.relpath(script, ROOT_DIR), images=[])
+    start = time.perf_counter()
+    try:
+        with pinned_fonts(), redirected_saves(os.path.join(out_dir, 'render')) as saved, \
+                contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+            warnings.filterwarnings('ignore', message='.*findfont.*')
+            mpl.rcdefaults()
+            os.makedirs(os.path.join(out_dir, 'render'), exist_ok=True)
+            runpy.run_path(script, run_name='__main__')
+            result['fonts'] = _resolved_fonts()
+        unpinned = [f for f, font in result['fonts'].items() if not font['bundled']]
+        if unpinned:
+            raise RuntimeError(f"{', '.join(unpinned)} resolved outside matplotlib's fonts: "
+                               f"{[result['fonts'][f]['file'] for f in unpinned]}")
+    except Exception as exc:
+        result.update(status='error', error=f'{type(exc).__name__}: {exc}',
+                      seconds=round(time.perf_counter() - start, 3))
+        return result
+    finally:
+        plt.close('all')
+        mpl.rcdefaults()
+    result['seconds'] = round(time.perf_counter() - start, 3)
+
+    for golden, output in saved:
+        image = dict(golden=os.path.relpath(golden, ROOT_DIR),
+                     output=os.path.relpath(output, ROOT_DIR))
+        if not os.path.exists(golden):
+            image.update(status='new', reason='no golden image')
+        else:
+            stem = os.path.splitext(os.path.basename(output))[0]
+            image.update(compare_images(golden, output, tolerance, delta_e, max_changed,
+                                        heatmap=os.path.join(out_dir, 'diff', f'{stem}_diff.png')))
+            if image['heatmap']:
+                image['heatmap'] = os.path.relpath(image['heatmap'], ROOT_DIR)
+        result['images'].append(image)
+
+    statuses = {image['status'] for image in result['images']}
+    result['status'] = next((s for s in ('fail', 'new') if s in statuses), 'pass')
+    if not result['images']:
+        result.update(status='error', error=f'{name} saved no images')
+    return result
+
+
+def run_regression(*scripts, out_dir=OUT_DIR, workers=None, **compare_kw):
+    """
+    Check chart scripts in parallel and write out_dir/manifest.json.
+
+    Each script runs in a pool worker with fresh rcParams; results come
+    back in script order, so the manifest is stable between runs. With
+    one worker the scripts run in this process if it is already on Agg
+    (other backends measure text differently), else in a single worker,
+    so the caller's backend is never switched.
+    """
+    scripts = chart_scripts(*scripts)
+    if workers is None:
+        workers = min(len(scripts), os.cpu_count() or 1)
+    if workers <= 1 and mpl.get_backend().lower() == 'agg':
+        results = [check_script(s, out_dir, **compare_kw) for s in scripts]
+    else:
+        with ProcessPoolExecutor(max_workers=max(workers, 1), initializer=_init_worker) as pool:
+            futures = [pool.submit(check_script, s, out_dir, **compare_kw) for s in scripts]
+            results = [f.result() for f in futures]
+
+    manifest = dict(matplotlib=mpl.__version__, results=results)
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    return results
+
+
+def update_goldens(results):
+    """Copy the renders of failing and new images over their goldens."""
+    updated = []
+    for result in results:
+        for image in result['images']:
+            if image['status'] in ('fail', 'new'):
+                os.makedirs(os.path.dirname(os.path.join(ROOT_DIR, image['golden'])), exist_ok=True)
+                shutil.copyfile(os.path.join(ROOT_DIR, image['output']),
+                                os.path.join(ROOT_DIR, image['golden']))
+                updated.append(image['golden'])
+    return updated
+
+
+def format_result(result):
+    """Human-readable lines for one script."""
+    lines = [f"[{result['status'].upper()}] {result['script']}  ({result['seconds']:.1f}s)"]
+    if result['status'] == 'error':
+        lines.append(f"  {result['error']}")
+    for image in result['images']:
+        if image['status'] != 'pass':
+            line = f"  {image['golden']}: {image['reason']}"
+            if image.get('heatmap'):
+                line += f"  -> {image['heatmap']}"
+            lines.append(line)
+    return lines
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Pixel-diff the gallery against its golden PNGs.')
+    parser.add_argument('scripts', nargs='*', help='chart scripts or folders (default: graphs/ and graphs/ugly/)')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--out', default=OUT_DIR, help='renders, diffs and manifest.json go here')
+    parser.add_argument('--tolerance', type=int, default=CHANNEL_TOLERANCE)
+    parser.add_argument('--delta-e', type=float, default=DELTA_E)
+    parser.add_argument('--max-changed', type=float, default=MAX_CHANGED)
+    parser.add_argument('--update', action='store_true', help='accept the renders as new goldens')
+    args = parser.parse_args()
+
+    _init_worker()
+    start = time.perf_counter()
+    results = run_regression(*args.scripts, out_dir=args.out, workers=args.workers,
+                             tolerance=args.tolerance, delta_e=args.delta_e,
+                             max_changed=args.max_changed)
+    for result in results:
+        print('\n'.join(format_result(result)))
+    failed = [r for r in results if r['status'] in ('fail', 'error')]
+    print(f'\n{len(results) - len(failed)}/{len(results)} passed in {time.perf_counter() - start:.1f}s')
+
+    if args.update:
+        for path in update_goldens(results):
+            print(f'Updated: {path}')
+    else:
+        sys.exit(1 if failed else 0)
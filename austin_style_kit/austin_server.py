@@ -0,0 +1,386 @@
+"""
+AUSTIN SERVER: Local HTTP chart service with a byte cache and ETags
+====================================================================
+
+Embed kit charts in internal pages with parameters in the URL:
+
+    <img src="http://localhost:8050/chart/07_dual_line.png?country=Japan&year=2000">
+
+Charts are spec templates (austin_specs) whose strings may contain
+{param} placeholders, with defaults for every parameter. A request:
+
+  1. is normalized to (chart, format, dpi, parameters) and looked up in
+     an in-memory LRU cache of encoded bytes, bounded by total size,
+  2. on a miss, is rendered once even when many clients ask at the same
+     moment: later requests for the same key wait for the first render
+     instead of starting their own,
+  3. is answered with a content-hash ETag, so browsers that already
+     have the bytes get a 304 with no body.
+
+A repeat request costs a dictionary lookup. Renders run one at a time
+in the server process (Matplotlib's rcParams are global), or in a pool
+of worker processes with --workers.
+
+USAGE:
+    python austin_server.py                          # graphs/specs/service.json on :8050
+    python austin_server.py my_charts.json --port 9000 --cache-mb 256 --workers 4
+
+    GET /charts                         chart names and their parameters (JSON)
+    GET /chart/<name>.png?param=value   PNG (dpi=... between 50 and 300, default 150)
+    GET /chart/<name>.svg?param=value   SVG
+    GET /stats                          cache hits, misses, renders, bytes
+
+    from austin_server import ChartService, serve
+    service = ChartService.from_file('graphs/specs/service.json')
+    body, etag = service.get('07_dual_line', 'png', {'country': 'Japan'})
+
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlsplit
+
+from austin_specs import compile_spec, spec_frame
+
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SERVICE_FILE = os.path.join(ROOT_DIR, 'graphs', 'specs', 'service.json')
+
+FORMATS = {'png': 'image/png', 'svg': 'image/svg+xml'}
+DEFAULT_DPI = 150
+DPI_RANGE = (50, 300)
+
+# Total size of cached chart bytes before the least recently used go
+CACHE_BYTES = 128 * 1024 * 1024
+
+_PLACEHOLDER = re.compile(r'\{(\w+)\}')
+
+
+# ============================================================
+# TEMPLATES
+# ============================================================
+
+def _coerce(name, value, default):
+    """A query-string value converted to the type of the parameter's default."""
+    if isinstance(default, bool):
+        return value.lower() in ('1', 'true', 'yes')
+    for kind in (int, float):
+        if isinstance(default, kind):
+            try:
+                return kind(value)
+            except ValueError:
+                raise ValueError(f"Parameter '{name}' must be {kind.__name__}, got '{value}'") from None
+    return value
+
+
+def fill_template(template, params):
+    """
+    Substitute {param} placeholders anywhere in a spec template.
+
+    A string that is exactly one placeholder takes the parameter's own
+    type ("{year}" -> 2023); placeholders inside longer strings are
+    formatted in. '{:.1f}'-style format fields are left alone.
+    """
+    if isinstance(template, dict):
+        return {k: fill_template(v, params) for k, v in template.items()}
+    if isinstance(template, list):
+        return [fill_template(v, params) for v in template]
+    if isinstance(template, str):
+        whole = _PLACEHOLDER.fullmatch(template)
+        if whole and whole.group(1) in params:
+            return params[whole.group(1)]
+        return _PLACEHOLDER.sub(lambda m: str(params.get(m.group(1), m.group(0))), template)
+    return template
+
+
+# ============================================================
+# BYTE CACHE
+# ============================================================
+
+class ByteCache:
+    """
+    Thread-safe LRU of encoded charts, evicted by total size.
+
+    Values are (body, etag); entries larger than the whole budget are
+    not stored.
+    """
+
+    def __init__(self, max_bytes=CACHE_BYTES):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item
+
+    def peek(self, key):
+        """Like get, without counting or reordering."""
+        with self._lock:
+            return self._items.get(key)
+
+    def put(self, key, body, etag):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.bytes -= len(old[0])
+            self._items[key] = (body, etag)
+            self.bytes += len(body)
+            while self.bytes > self.max_bytes:
+                _, (evicted, _) = self._items.popitem(last=False)
+                self.bytes -= len(evicted)
+
+    def stats(self):
+        with self._lock:
+            return dict(entries=len(self._items), bytes=self.bytes, max_bytes=self.max_bytes,
+                        hits=self.hits, misses=self.misses)
+
+
+# ============================================================
+# RENDERING
+# ============================================================
+
+def render_bytes(spec, fmt='png', dpi=DEFAULT_DPI):
+    """Encoded bytes of one compiled spec (module-level so workers can run it)."""
+    from austin_figures import release_figure
+    from austin_specs import build_figure
+    from austin_styles import profile_style, style_context
+
+    fig = build_figure(spec)
+    buffer = io.BytesIO()
+    # Inside the spec's style, like render_spec, so draw-time rcParams match
+    with style_context(profile_style(spec['style'])):
+        fig.savefig(buffer, format=fmt, dpi=dpi, facecolor='white',
+                    metadata={'Software': None} if fmt == 'png' else {'Date': None})
+    release_figure(fig)
+    return buffer.getvalue()
+
+
+class ChartService:
+    """
+    Named spec templates behind a byte cache with request coalescing.
+
+    Parameters
+    ----------
+    charts : dict
+        name -> {'params': {name: default}, 'spec': template}.
+    cache_bytes : int
+        Size budget of the byte cache.
+    workers : int, optional
+        Render in this many processes instead of in this one.
+    """
+
+    def __init__(self, charts, cache_bytes=CACHE_BYTES, workers=None):
+        self.charts = charts
+        self.cache = ByteCache(cache_bytes)
+        self.renders = 0
+        self.coalesced = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._render_lock = threading.Lock()
+        self._pool = ProcessPoolExecutor(max_workers=workers) if workers and workers > 1 else None
+        for name, chart in charts.items():
+            # Fail at start-up, not on the first request
+            compile_spec(fill_template(chart['spec'], chart.get('params', {})))
+
+    @classmethod
+    def from_file(cls, path=SERVICE_FILE, **kwargs):
+        with open(path, encoding='utf-8') as f:
+            return cls(json.load(f), **kwargs)
+
+    def describe(self):
+        return {name: chart.get('params', {}) for name, chart in self.charts.items()}
+
+    def request_key(self, name, fmt, query):
+        """(name, fmt, dpi, sorted params) with every parameter checked and typed."""
+        if name not in self.charts:
+            raise KeyError(f"Unknown chart '{name}'. Choose from: {sorted(self.charts)}")
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format '{fmt}'. Choose from: {list(FORMATS)}")
+        defaults = self.charts[name].get('params', {})
+        query = dict(query)
+        dpi = _coerce('dpi', query.pop('dpi', DEFAULT_DPI), DEFAULT_DPI) if fmt == 'png' else 72
+        if not DPI_RANGE[0] <= dpi <= DPI_RANGE[1]:
+            raise ValueError(f'dpi must be between {DPI_RANGE[0]} and {DPI_RANGE[1]}')
+        unknown = set(query) - set(defaults)
+        if unknown:
+            raise ValueError(f"Unknown parameters {sorted(unknown)}. Choose from: {sorted(defaults)}")
+        params = dict(defaults)
+        params.update({k: _coerce(k, v, defaults[k]) for k, v in query.items()})
+        return name, fmt, dpi, tuple(sorted(params.items()))
+
+    def _render(self, key):
+        name, fmt, dpi, params = key
+        spec = compile_spec(fill_template(self.charts[name]['spec'], dict(params)))
+        if spec_frame(spec).empty:
+            raise ValueError(f"No rows in '{spec['dataset']}' for {dict(params)}")
+        if self._pool is not None:
+            return self._pool.submit(render_bytes, spec, fmt, dpi).result()
+        with self._render_lock:
+            return render_bytes(spec, fmt, dpi)
+
+    def get(self, name, fmt='png', query=()):
+        """
+        Encoded chart and its ETag, from the cache or rendered once.
+
+        Concurrent calls for the same uncached key share one render.
+        """
+        key = self.request_key(name, fmt, query)
+        item = self.cache.get(key)
+        if item is not None:
+            return item
+
+        with self._lock:
+            # Finished between the cache miss and here
+            item = self.cache.peek(key)
+            if item is not None:
+                return item
+            future = self._inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self._inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+
+        try:
+            body = self._render(key)
+            item = (body, '"' + hashlib.sha1(body).hexdigest()[:20] + '"')
+            self.cache.put(key, *item)
+            with self._lock:
+                self.renders += 1
+            future.set_result(item)
+            return item
+        except BaseException as exc:
+            future.set_exception(exc)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(key, None)
+
+    def stats(self):
+        with self._lock:
+            extra = dict(renders=self.renders, coalesced=self.coalesced,
+                         in_flight=len(self._inflight))
+        return dict(self.cache.stats(), **extra)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+
+
+# ============================================================
+# HTTP
+# ============================================================
+
+class ChartHandler(BaseHTTPRequestHandler):
+    """GET-only handler; the ChartService is on self.server.service."""
+
+    server_version = 'AustinCharts/1.0'
+    protocol_version = 'HTTP/1.1'
+    quiet = False
+
+    def _send(self, status, body=b'', content_type='text/plain; charset=utf-8', headers=None):
+        self.send_response(status)
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status != 304:
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if status != 304 and self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _json(self, payload):
+        self._send(200, json.dumps(payload, indent=2).encode('utf-8'),
+                   'application/json; charset=utf-8')
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        service = self.server.service
+        if url.path == '/charts':
+            return self._json(service.describe())
+        if url.path == '/stats':
+            return self._json(service.stats())
+
+        match = re.fullmatch(r'/chart/([\w\-]+)\.(\w+)', url.path)
+        if not match:
+            return self._send(404, b'Not found. Try /charts\n')
+        name, fmt = match.groups()
+        try:
+            body, etag = service.get(name, fmt, parse_qsl(url.query))
+        except KeyError as exc:
+            return self._send(404, f'{exc.args[0]}\n'.encode('utf-8'))
+        except ValueError as exc:
+            return self._send(400, f'{exc}\n'.encode('utf-8'))
+        except Exception as exc:
+            return self._send(500, f'{type(exc).__name__}: {exc}\n'.encode('utf-8'))
+
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if etag in [t.strip() for t in self.headers.get('If-None-Match', '').split(',')]:
+            return self._send(304, headers=headers)
+        self._send(200, body, FORMATS[fmt], headers)
+
+    do_HEAD = do_GET
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+
+def make_server(service, host='127.0.0.1', port=8050, quiet=False):
+    """A ThreadingHTTPServer bound to host:port serving service (not started)."""
+    handler = type('Handler', (ChartHandler,), {'quiet': quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def serve(path=SERVICE_FILE, host='127.0.0.1', port=8050, cache_bytes=CACHE_BYTES,
+          workers=None, quiet=False):
+    """Run the chart service until interrupted."""
+    import matplotlib
+    matplotlib.use('Agg')
+    service = ChartService.from_file(path, cache_bytes=cache_bytes, workers=workers)
+    server = make_server(service, host, port, quiet=quiet)
+    print(f'Serving {len(service.charts)} charts on http://{host}:{server.server_port}/charts')
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Serve parameterized StoryGraph charts over HTTP.')
+    parser.add_argument('charts', nargs='?', default=SERVICE_FILE, help='chart templates (JSON)')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8050)
+    parser.add_argument('--cache-mb', type=float, default=CACHE_BYTES / 2 ** 20)
+    parser.add_argument('--workers', type=int, default=None, help='render in this many processes')
+    parser.add_argument('--quiet', action='store_true', help='no request log')
+    args = parser.parse_args()
+    serve(args.charts, args.host, args.port, int(args.cache_mb * 2 ** 20), args.workers, args.quiet)
@@ -0,0 +1,577 @@
+"""
+AUSTIN SPECS: Declarative chart specs compiled to figures
+==========================================================
+
+Every graphs/ script repeats the same ~30 lines of header and footer:
+sys.path hack, plt.style.use, title at (0, 1.08), subtitle at (0, 1.03),
+add_source_note and savefig. A chart spec describes only what differs -
+dataset, filters, chart type, highlights, annotations and titles - and
+compile_spec validates it once into a hashable ChartSpec that is cheap to
+cache and to ship to worker processes.
+
+USAGE:
+    from austin_specs import (compile_spec, render_spec, render_specs,
+                              render_spec_variants, load_specs)
+
+    spec = compile_spec({
+        'dataset': 'temperature_anomaly',
+        'filters': {'Entity': 'World'},
+        'chart': 'line',
+        'x': 'Year', 'y': 'Average',
+        'highlights': [{'from': 1980, 'color': 'primary'}],
+        'annotations': [{'text': 'Acceleration begins around 1980',
+                         'at': 1980, 'xytext': [1890, 1.1]}],
+        'title': '130 years of stability, then a relentless climb',
+        'subtitle': 'Temperature anomaly (°C vs. 1850–1900 baseline)',
+        'source': 'Source: Our World in Data / HadCRUT5',
+        'output': 'graphs/03_from_spec.png',
+    })
+    render_spec(spec)
+
+    # Notebook and slide versions from one data pass
+    render_spec_variants(spec, ['notebook', 'presentation'])
+
+    # A whole spec table (JSON list, JSON Lines or YAML) across 4 processes
+    render_specs(load_specs('specs.json'), workers=4)
+
+    # Or from the command line
+    python austin_specs.py specs.json --workers 4
+
+SPEC KEYS:
+    dataset      Name in datasets/ (required)
+    chart        'line', 'barh' or 'scatter' (required)
+    x, y         Columns. y may be a list for several lines.
+    label        Entity column for barh/scatter (default: the panel's entity column)
+    filters      See austin_data.filter_frame
+    sort, top    barh ordering ('desc' or 'asc') and how many bars to keep
+    highlights   line: [{'from': x, 'to': x, 'color': c}]
+                 barh/scatter: [{'label': name, 'color': c}]
+    annotations  [{'text', 'xytext', 'xy' or 'at', 'preset', ...annotate kwargs}]
+    title, subtitle, insight, source   Laid out by austin_layout.story_header
+    value_format Format for direct bar labels, e.g. '{:.1f}t'
+    end_labels   line: label each series at its last point
+    xscale, yscale, xlim, ylim, figsize, downsample
+    style        'notebook' or 'presentation'
+    output       Where render_spec saves the PNG
+
+"""
+
+import argparse
+import copy
+import hashlib
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import matplotlib as mpl
+import matplotlib.colors as mcolors
+from matplotlib.figure import Figure
+from matplotlib.font_manager import FontProperties
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+from austin_annotations import annotate, profile_dpi, PALETTE, PRESETS, COLOR_CYCLE, SCALE_PROFILES
+from austin_data import load_dataset, filter_frame, panel_columns
+from austin_figures import release_figure
+from austin_layout import EDGE_PAD, story_header, save_story
+from austin_lines import plot_line
+from austin_styles import (PROFILE_STYLES, STYLE_FILES, held_style, load_style, profile_style,
+                           style_context)
+from austin_textmetrics import get_text_metrics
+
+
+# ============================================================
+# SPEC SCHEMA
+# ============================================================
+
+CHART_TYPES = ('line', 'barh', 'scatter')
+
+DEFAULTS = {
+    'filters': {},
+    'highlights': [],
+    'annotations': [],
+    'title': '',
+    'subtitle': '',
+    'insight': '',
+    'source': '',
+    'figsize': None,
+    'style': 'notebook',
+    'sort': 'desc',
+    'top': None,
+    'value_format': '{:,.1f}',
+    'end_labels': False,
+    'downsample': None,
+    'output': None,
+}
+
+OPTIONAL_KEYS = {'x', 'y', 'label', 'xscale', 'yscale', 'xlim', 'ylim'}
+
+# Columns each chart type needs
+REQUIRED_COLUMNS = {
+    'line': ('x', 'y'),
+    'barh': ('y',),
+    'scatter': ('x', 'y'),
+}
+
+FIGSIZES = {
+    'line': (12, 6),
+    'barh': (10, 8),
+    'scatter': (11, 7),
+}
+
+
+class ChartSpec:
+    """
+    A validated, immutable chart spec.
+
+    Stored as canonical JSON, so equal specs hash equal, pickling costs one
+    string, and .key is a stable content hash usable as a cache key.
+    """
+
+    __slots__ = ('_json', '_spec', 'key')
+
+    def __init__(self, canonical_json):
+        self._json = canonical_json
+        self._spec = json.loads(canonical_json)
+        self.key = hashlib.sha1(canonical_json.encode('utf-8')).hexdigest()[:16]
+
+    def __getitem__(self, name):
+        return self._spec[name]
+
+    def get(self, name, default=None):
+        return self._spec.get(name, default)
+
+    def to_dict(self):
+        """A mutable deep copy of the spec."""
+        return copy.deepcopy(self._spec)
+
+    def replace(self, **changes):
+        """A new compiled spec with some keys changed."""
+        spec = self.to_dict()
+        spec.update(changes)
+        return compile_spec(spec)
+
+    def __hash__(self):
+        return hash(self._json)
+
+    def __eq__(self, other):
+        return isinstance(other, ChartSpec) and self._json == other._json
+
+    def __reduce__(self):
+        return (ChartSpec, (self._json,))
+
+    def __repr__(self):
+        return f"ChartSpec({self._spec['chart']!r}, {self._spec['dataset']!r}, key={self.key!r})"
+
+
+def _check_choice(name, value, choices):
+    if value not in choices:
+        raise ValueError(f"Unknown {name} '{value}'. Choose from: {list(choices)}")
+
+
+def compile_spec(spec):
+    """
+    Validate a spec dict and freeze it into a ChartSpec.
+
+    Raises ValueError on unknown keys, chart types, styles, annotation
+    presets, highlight colours (a PALETTE name or a Matplotlib colour) or
+    missing columns. Column names are checked against the data when the
+    figure is built.
+    """
+    if isinstance(spec, ChartSpec):
+        return spec
+    if not isinstance(spec, dict):
+        raise ValueError(f"A chart spec must be a dict, got {type(spec).__name__}")
+
+    for key in ('dataset', 'chart'):
+        if key not in spec:
+            raise ValueError(f"Chart spec is missing required key '{key}'")
+    unknown = set(spec) - set(DEFAULTS) - OPTIONAL_KEYS - {'dataset', 'chart'}
+    if unknown:
+        raise ValueError(f"Unknown spec keys {sorted(unknown)}")
+
+    chart = spec['chart']
+    _check_choice('chart', chart, CHART_TYPES)
+    for key in REQUIRED_COLUMNS[chart]:
+        if key not in spec:
+            raise ValueError(f"A '{chart}' spec needs '{key}'")
+
+    out = copy.deepcopy(DEFAULTS)
+    out.update(copy.deepcopy(spec))
+    _check_choice('style', out['style'], STYLE_FILES)
+    _check_choice('sort', out['sort'], ('asc', 'desc', None))
+    if out['figsize'] is None:
+        out['figsize'] = list(FIGSIZES[chart])
+
+    for note in out['annotations']:
+        if 'text' not in note or 'xytext' not in note:
+            raise ValueError(f"Annotations need 'text' and 'xytext': {note}")
+        if 'xy' not in note and 'at' not in note:
+            raise ValueError(f"Annotations need 'xy' or 'at': {note}")
+        note.setdefault('preset', 'callout')
+        _check_choice('preset', note['preset'], PRESETS)
+    for hl in out['highlights']:
+        if 'color' not in hl:
+            raise ValueError(f"Highlights need a 'color': {hl}")
+        if hl['color'] not in PALETTE and not mcolors.is_color_like(hl['color']):
+            raise ValueError(f"Unknown color '{hl['color']}'. Choose from: {list(PALETTE)} "
+                             f"or a Matplotlib colour")
+
+    try:
+        canonical = json.dumps(out, sort_keys=True, ensure_ascii=False,
+                               separators=(',', ':'))
+    except TypeError as err:
+        raise ValueError(f"Chart specs must be plain JSON data: {err}") from None
+    return ChartSpec(canonical)
+
+
+def read_records(path):
+    """
+    Read a table of dicts: a .json list (or a single object), a .jsonl
+    file with one object per line, or a .yaml/.yml list (needs PyYAML).
+    """
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.jsonl'):
+            raw = [json.loads(line) for line in f if line.strip()]
+        elif path.endswith(('.yaml', '.yml')):
+            try:
+                import yaml
+            except ImportError:
+                raise ImportError("Reading YAML tables needs PyYAML: pip install pyyaml") from None
+            raw = yaml.safe_load(f)
+        else:
+            raw = json.load(f)
+    return [raw] if isinstance(raw, dict) else raw
+
+
+def load_specs(path):
+    """
+    Read a spec table (see read_records) and compile every spec.
+    Returns ChartSpecs.
+    """
+    return [compile_spec(item) for item in read_records(path)]
+
+
+# ============================================================
+# DATA AND COLOURS
+# ============================================================
+
+def color_of(name):
+    """Palette name ('primary') or any Matplotlib colour ('#E0E0E0')."""
+    return PALETTE.get(name, name)
+
+
+def spec_frame(spec):
+    """The filtered rows a spec plots."""
+    return filter_frame(load_dataset(spec['dataset']), spec['filters'])
+
+
+def _require(df, *columns):
+    for column in columns:
+        if column not in df.columns:
+            raise ValueError(f"Unknown column '{column}'. Choose from: {list(df.columns)}")
+
+
+def _label_column(spec, df):
+    return spec.get('label') or panel_columns(df)[0]
+
+
+# ============================================================
+# CHART BUILDERS
+# ============================================================
+# Each builder takes font, the profile's SCALE_PROFILES font factor, for
+# its fixed text sizes (end labels, bar labels and values, point names).
+
+def _resolve_xy(note, anchors):
+    if 'xy' in note:
+        return tuple(note['xy'])
+    at = note['at']
+    if at not in anchors:
+        raise ValueError(f"Annotation anchor '{at}' is not in the plotted data")
+    return anchors[at]
+
+
+def _draw_line(ax, spec, df, font=1.0):
+    x = spec['x']
+    ys = spec['y'] if isinstance(spec['y'], list) else [spec['y']]
+    _require(df, x, *ys)
+    df = df.sort_values(x)
+    xs = df[x].to_numpy()
+
+    keep = [n['at'] for n in spec['annotations'] if 'at' in n]
+    for hl in spec['highlights']:
+        keep += [hl[k] for k in ('from', 'to') if hl.get(k) is not None]
+    keep = keep or None
+
+    # Follow the active style so presentation lines come out thicker
+    linewidth = mpl.rcParams['lines.linewidth']
+    anchors = {}
+    for i, col in enumerate(ys):
+        values = df[col].to_numpy(dtype=float)
+        base = PALETTE['neutral'] if spec['highlights'] else COLOR_CYCLE[i % len(COLOR_CYCLE)]
+        plot_line(ax, xs, values, downsample=spec['downsample'], keep=keep,
+                  color=base, linewidth=linewidth)
+        for hl in spec['highlights']:
+            lo = hl.get('from', -np.inf)
+            hi = hl.get('to', np.inf)
+            mask = (xs >= lo) & (xs <= hi)
+            plot_line(ax, xs[mask], values[mask], downsample=spec['downsample'],
+                      keep=keep, color=color_of(hl['color']), linewidth=linewidth + 0.5)
+        if spec['end_labels'] and len(xs):
+            ax.text(xs[-1], values[-1], f'  {col}: {values[-1]:.0f}', fontsize=round(11 * font),
+                    fontweight='bold', color=base, va='center')
+        if i == 0:
+            anchors = {xv: (xv, yv) for xv, yv in zip(xs.tolist(), values.tolist())}
+
+    ax.tick_params(left=False, bottom=False)
+    ax.spines['bottom'].set_visible(False)
+    return anchors
+
+
+def _draw_barh(ax, spec, df, font=1.0):
+    value = spec['y']
+    label = _label_column(spec, df)
+    _require(df, value, label)
+    df = df.dropna(subset=[value])
+    if spec['sort']:
+        # barh draws bottom-up, so 'desc' means the largest bar on top
+        df = df.sort_values(value, ascending=spec['sort'] == 'desc')
+        if spec['top']:
+            df = df.tail(spec['top'])
+    elif spec['top']:
+        df = df.head(spec['top'])
+
+    labels = df[label].astype(str).tolist()
+    values = df[value].to_numpy(dtype=float)
+    highlight = {hl['label']: color_of(hl['color']) for hl in spec['highlights'] if 'label' in hl}
+    colors = [highlight.get(name, PALETTE['neutral']) for name in labels]
+
+    positions = np.arange(len(labels))
+    ax.barh(positions, values, color=colors, height=0.7)
+    ax.set_yticks(positions)
+    ax.set_yticklabels(labels, fontsize=round(11 * font))
+
+    pad = 0.01 * (np.nanmax(np.abs(values)) if len(values) else 1)
+    for i, (val, color) in enumerate(zip(values, colors)):
+        ax.text(val + pad, i, spec['value_format'].format(val), va='center',
+                fontsize=round(10 * font), color=color)
+
+    ax.spines['left'].set_visible(False)
+    ax.spines['bottom'].set_visible(False)
+    ax.tick_params(left=False, bottom=False)
+    ax.set_xticks([])
+    return {name: (val, i) for i, (name, val) in enumerate(zip(labels, values))}
+
+
+def _draw_scatter(ax, spec, df, font=1.0):
+    x, y = spec['x'], spec['y']
+    label = _label_column(spec, df)
+    _require(df, x, y, label)
+    df = df.dropna(subset=[x, y])
+
+    ax.scatter(df[x], df[y], color=PALETTE['neutral'], alpha=0.35, s=50,
+               edgecolors='none', zorder=2)
+    anchors = {name: (xv, yv) for name, xv, yv in zip(df[label], df[x], df[y])}
+    for hl in spec['highlights']:
+        name = hl.get('label')
+        if name not in anchors:
+            continue
+        color = color_of(hl['color'])
+        xv, yv = anchors[name]
+        ax.scatter([xv], [yv], color=color, s=90, edgecolors='white',
+                   linewidth=1.5, zorder=3)
+        ax.annotate(name, (xv, yv), xytext=(6, 0), textcoords='offset points',
+                    fontsize=round(9 * font), color=color, fontweight='bold', va='center')
+
+    ax.tick_params(left=False, bottom=False)
+    return anchors
+
+
+CHART_BUILDERS = {
+    'line': _draw_line,
+    'barh': _draw_barh,
+    'scatter': _draw_scatter,
+}
+
+
+# ============================================================
+# COMPILER
+# ============================================================
+
+def build_figure(spec, data=None, profile=None):
+    """
+    Turn a spec into a styled Figure (no pyplot, no global style change).
+
+    Parameters
+    ----------
+    spec : dict or ChartSpec
+    data : DataFrame, optional
+        Pre-loaded rows to plot instead of loading spec['dataset'];
+        spec['filters'] are still applied.
+    profile : str, optional
+        Scale profile ('notebook', 'presentation', 'poster', 'thumbnail')
+        for the style, annotation presets and text sizes. Defaults to
+        spec['style'].
+
+    Returns
+    -------
+    fig : matplotlib.figure.Figure
+    """
+    spec = compile_spec(spec)
+    df = spec_frame(spec) if data is None else filter_frame(data, spec['filters'])
+    profile = profile or spec['style']
+
+    font = SCALE_PROFILES[profile]['font']
+    with style_context(profile_style(profile)):
+        fig = Figure(figsize=tuple(spec['figsize']))
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        # The style already sizes tick labels for its own profile
+        # ('poster' renders with 'presentation'); scale by the rest
+        ticks = font / SCALE_PROFILES[PROFILE_STYLES[profile]]['font']
+        if ticks != 1:
+            for axis in ('x', 'y'):
+                size = FontProperties(size=mpl.rcParams[f'{axis}tick.labelsize']).get_size_in_points()
+                ax.tick_params(axis=axis, labelsize=size * ticks)
+
+        anchors = CHART_BUILDERS[spec['chart']](ax, spec, df, font)
+        # End-of-line labels and bar values sit to the right of the data
+        right = None
+        if spec['end_labels']:
+            right = 90 * font
+        elif spec['chart'] == 'barh' and ax.texts:
+            metrics = get_text_metrics()
+            right = EDGE_PAD + max(metrics.width(t.get_text(), size=t.get_fontsize())
+                                   for t in ax.texts)
+
+        for key in ('xscale', 'yscale'):
+            if spec.get(key):
+                getattr(ax, f'set_{key}')(spec[key])
+        for key in ('xlim', 'ylim'):
+            if spec.get(key):
+                getattr(ax, f'set_{key}')(*spec[key])
+        ax.set_xlabel('')
+        ax.set_ylabel('')
+
+        for note in spec['annotations']:
+            kwargs = {k: v for k, v in note.items() if k not in ('text', 'xy', 'at', 'xytext', 'preset')}
+            annotate(ax, note['text'], xy=_resolve_xy(note, anchors),
+                     xytext=tuple(note['xytext']), preset=note['preset'],
+                     profile=profile, **kwargs)
+
+        story_header(fig, spec['title'], spec['subtitle'], spec['insight'],
+                     spec['source'], ax=ax, right=right, profile=profile)
+    return fig
+
+
+def _prepare_path(path):
+    folder = os.path.dirname(path)
+    if folder:
+        os.makedirs(folder, exist_ok=True)
+    return path
+
+
+def render_spec(spec, path=None, profile=None, data=None, **savefig_kw):
+    """
+    Build a spec's figure and save it. Returns the written path.
+
+    dpi (300 by default) is the notebook resolution; the profile's
+    SCALE_PROFILES 'dpi' factor multiplies it.
+    """
+    spec = compile_spec(spec)
+    path = path or spec['output']
+    if not path:
+        raise ValueError(f"No output path for {spec!r}; pass path= or set 'output'")
+    _prepare_path(path)
+
+    profile = profile or spec['style']
+    fig = build_figure(spec, data=data, profile=profile)
+    savefig_kw['dpi'] = profile_dpi(profile, savefig_kw.get('dpi', 300))
+    with style_context(profile_style(profile)):
+        save_story(fig, path, **savefig_kw)
+    release_figure(fig)
+    return path
+
+
+def render_spec_variants(spec, profiles=('notebook', 'presentation'), out=None,
+                         **savefig_kw):
+    """
+    Export one spec at several scale profiles from a single data pass.
+
+    The dataset is loaded and filtered once and shared by every variant;
+    text measurements are shared through the process-wide metrics cache.
+    Each profile sets its own text sizes and resolution (see render_spec).
+    out is a pattern with '{profile}' (default: spec['output'] with
+    '_{profile}' before the extension).
+
+    Returns
+    -------
+    paths : dict
+        profile -> written path.
+    """
+    spec = compile_spec(spec)
+    if out is None:
+        if not spec['output']:
+            raise ValueError(f"No output path for {spec!r}; pass out= or set 'output'")
+        root, ext = os.path.splitext(spec['output'])
+        out = root + '_{profile}' + ext
+    # Filters already applied here; an empty filter dict avoids redoing them
+    data = spec_frame(spec)
+    shared = spec.replace(filters={})
+    return {profile: render_spec(shared, path=out.format(profile=profile),
+                                 profile=profile, data=data, **savefig_kw)
+            for profile in profiles}
+
+
+def _check_held_style(specs):
+    """
+    Refuse a thread pool that would deadlock on the caller's style.
+
+    Inside style_context a thread holds its style until the block ends;
+    a worker needing a different style waits for that, while the caller
+    waits for the worker's result.
+    """
+    held = held_style()
+    if held is None:
+        return
+    other = sorted({s['style'] for s in specs
+                    if load_style(profile_style(s['style'])) != held})
+    if other:
+        raise RuntimeError(
+            f"render_specs(threads=True) called inside a style_context whose style "
+            f"differs from specs with style {other}: the worker threads would wait for "
+            f"this block to end while it waits for them. Call it outside the block, "
+            f"or use threads=False (processes).")
+
+
+def render_specs(specs, workers=None, threads=False, **savefig_kw):
+    """
+    Render many specs, optionally across worker processes or threads.
+
+    Each worker loads every dataset it needs once, so group specs by
+    dataset when order doesn't matter. threads=True renders in a thread
+    pool instead: figures never touch pyplot and style_context lets specs
+    with the same style draw side by side, so there is no process start-up
+    or pickling and every thread shares one dataset cache. With threads
+    the call must not sit inside a style_context of another style (it
+    raises RuntimeError rather than deadlock).
+    """
+    specs = [compile_spec(s) for s in specs]
+    if not workers or workers <= 1 or len(specs) <= 1:
+        return [render_spec(s, **savefig_kw) for s in specs]
+    if threads:
+        _check_held_style(specs)
+    executor = ThreadPoolExecutor if threads else ProcessPoolExecutor
+    with executor(max_workers=workers) as pool:
+        futures = [pool.submit(render_spec, s, **savefig_kw) for s in specs]
+        return [f.result() for f in futures]
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Render charts from a spec table.')
+    parser.add_argument('specs', help='.json, .jsonl or .yaml spec table')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--threads', action='store_true', help='use a thread pool instead of processes')
+    args = parser.parse_args()
+    for written in render_specs(load_specs(args.specs), workers=args.workers, threads=args.threads):
+        print(f"Saved: {written}")
@@ -0,0 +1,307 @@
+"""
+AUSTIN STYLES: Pre-validated style bundles and per-figure style switching
+==========================================================================
+
+plt.style.use() with a path to my_notebook.mplstyle re-reads and
+re-validates the file into rcParams on every run. load_style validates
+each .mplstyle once, keeps the result in memory, and pickles it to disk
+keyed by the file's content hash, so later runs skip parsing entirely.
+style_context applies a bundle to just the code inside the with block
+and restores the previous rcParams afterwards, so one worker can render
+notebook and presentation variants back to back.
+
+rcParams are global to the process, so style_context also gates them
+between threads: threads using the same style render concurrently, a
+thread wanting another style waits its turn. Together with new_figure
+(a Figure on its own Agg canvas, no pyplot) that makes a thread pool a
+cheap alternative to worker processes.
+
+USAGE:
+    from austin_styles import load_style, new_figure, style_context, use_style
+
+    use_style('notebook')              # replaces plt.style.use(<path>)
+
+    with style_context('presentation'):
+        fig, ax = plt.subplots()      # built with the slide style
+        ...
+        fig.savefig('for_slides.png')
+
+    rc = load_style('notebook')        # the validated dict itself
+
+    def chart(row):                    # safe to run from many threads
+        with style_context('notebook'):
+            fig = new_figure(figsize=(12, 6))
+            ax = fig.add_subplot()
+            ...
+            fig.savefig(row.path)
+
+Names are 'notebook' and 'presentation'; any .mplstyle path or
+installed style name also works.
+
+"""
+
+import contextlib
+import hashlib
+import os
+import pickle
+import threading
+
+import matplotlib as mpl
+import matplotlib.style
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+
+STYLE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+STYLE_FILES = {
+    'notebook': os.path.join(STYLE_DIR, 'my_notebook.mplstyle'),
+    'presentation': os.path.join(STYLE_DIR, 'austin_presentation.mplstyle'),
+}
+
+NOTEBOOK_STYLE = STYLE_FILES['notebook']
+PRESENTATION_STYLE = STYLE_FILES['presentation']
+
+# Which style file each annotation scale profile renders with
+# (see austin_annotations.SCALE_PROFILES)
+PROFILE_STYLES = {
+    'notebook': 'notebook',
+    'presentation': 'presentation',
+    'poster': 'presentation',
+    'thumbnail': 'notebook',
+}
+
+CACHE_DIR = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')),
+    'austin_style_kit', 'styles',
+)
+
+_bundles = {}
+_lock = threading.Lock()
+
+
+# ============================================================
+# LOADING
+# ============================================================
+
+def profile_style(profile):
+    """Style name for a scale profile ('poster' renders with 'presentation')."""
+    if profile not in PROFILE_STYLES:
+        raise ValueError(f"Unknown profile '{profile}'. Choose from: {list(PROFILE_STYLES)}")
+    return PROFILE_STYLES[profile]
+
+
+def style_path(style):
+    """Resolve a kit style name to its .mplstyle path (paths pass through)."""
+    if style in STYLE_FILES:
+        return STYLE_FILES[style]
+    if os.path.isfile(style):
+        return os.path.abspath(style)
+    return None
+
+
+def _file_hash(path):
+    with open(path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _load_file(path):
+    """Validated rcParams for a style file, via the on-disk pickle cache."""
+    # A stat is enough to spot an edit; only a changed file is read and hashed
+    stat = os.stat(path)
+    key = (path, stat.st_mtime_ns, stat.st_size)
+    if key in _bundles:
+        return _bundles[key]
+    digest = _file_hash(path)
+
+    cache_file = os.path.join(CACHE_DIR, f'{digest}-mpl{mpl.__version__}.pkl')
+    bundle = None
+    try:
+        with open(cache_file, 'rb') as f:
+            bundle = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        pass
+
+    if bundle is None:
+        bundle = dict(mpl.rc_params_from_file(path, use_default_template=False))
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            tmp = f'{cache_file}.{os.getpid()}.tmp'
+            with open(tmp, 'wb') as f:
+                pickle.dump(bundle, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp, cache_file)
+        except OSError:
+            # Read-only home or similar: the in-memory cache still works
+            pass
+
+    _bundles[key] = bundle
+    return bundle
+
+
+def load_style(style):
+    """
+    Validated rcParams dict for a style.
+
+    Parameters
+    ----------
+    style : str, dict or None
+        'notebook', 'presentation', a .mplstyle path, an installed style
+        name, or an rcParams dict (returned as is). None gives {}.
+
+    Returns
+    -------
+    rc : dict
+        Shared between callers: copy before modifying.
+    """
+    if style is None:
+        return {}
+    if isinstance(style, dict):
+        return style
+    path = style_path(style)
+    if path is not None:
+        with _lock:
+            return _load_file(path)
+    if style in mpl.style.library:
+        return mpl.style.library[style]
+    raise ValueError(f"Unknown style '{style}'. Choose from: {list(STYLE_FILES)}")
+
+
+# ============================================================
+# APPLYING
+# ============================================================
+
+def use_style(style):
+    """Apply a style globally, like plt.style.use but from the cached bundle."""
+    mpl.rcParams.update(load_style(style))
+
+
+class _StyleGate:
+    """
+    Lets threads share the global rcParams safely.
+
+    Matplotlib reads styling from one process-wide rcParams, so two threads
+    with different styles cannot both have theirs applied. Threads asking
+    for the style that is already active go straight in and render
+    concurrently; a thread asking for a different one waits until the
+    others have left (or, when nesting, until only its own blocks remain),
+    then swaps rcParams; the previous style comes back when the last block
+    using the new one leaves. A waiting switch holds off newcomers so it
+    cannot be starved.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._levels = []         # [rc, rcParams to restore, holders], innermost last
+        self._holders = 0         # with blocks currently inside, all threads
+        self._switching = 0       # threads waiting to apply another style
+        self._dormant = 0         # blocks held by those waiting threads
+        self._local = threading.local()
+
+    def _stack(self):
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    def _joinable(self, rc):
+        if not self._levels:
+            return False
+        active = self._levels[-1][0]
+        return not rc or rc is active or rc == active
+
+    def _may_switch(self, stack):
+        if self._holders != self._dormant:
+            return False
+        return not self._levels or bool(stack) and stack[-1] is self._levels[-1]
+
+    def enter(self, rc, validated=False):
+        stack = self._stack()
+        with self._cond:
+            # Newcomers queue behind a pending switch; nested blocks never wait here
+            while not stack and self._switching:
+                self._cond.wait()
+            if not self._joinable(rc):
+                # Blocks of threads waiting here run no code, so only the
+                # others have to leave; of the waiting threads, the one
+                # whose style is on top goes first (this lets nested
+                # switches from different threads all get through)
+                self._switching += 1
+                self._dormant += len(stack)
+                try:
+                    while not self._may_switch(stack):
+                        self._cond.wait()
+                finally:
+                    self._switching -= 1
+                    self._dormant -= len(stack)
+            if self._joinable(rc):
+                level = self._levels[-1]
+            else:
+                orig = dict(mpl.rcParams.copy())
+                orig.pop('backend', None)
+                try:
+                    if validated:
+                        dict.update(mpl.rcParams, rc)
+                    else:
+                        mpl.rcParams.update(rc)
+                except Exception:
+                    dict.update(mpl.rcParams, orig)
+                    raise
+                level = [rc, orig, 0]
+                self._levels.append(level)
+            level[2] += 1
+            self._holders += 1
+            stack.append(level)
+
+    def exit(self):
+        stack = self._stack()
+        with self._cond:
+            stack.pop()[2] -= 1
+            self._holders -= 1
+            # A style is undone when its last holder leaves, whichever thread that is
+            while self._levels and not self._levels[-1][2]:
+                dict.update(mpl.rcParams, self._levels.pop()[1])
+            self._cond.notify_all()
+
+
+_gate = _StyleGate()
+
+
+@contextlib.contextmanager
+def style_context(style):
+    """
+    Apply a style for the duration of a with block only.
+
+    Artists read most rcParams when they are created and some when they are
+    drawn, so keep both building and saving a figure inside the block.
+    Safe to use from several threads: blocks with the same style run
+    concurrently, a different style waits for them to finish. So a thread
+    must not wait on another thread (e.g. future.result()) from inside a
+    block when that thread needs a different style: neither can go on.
+    held_style() tells a caller what it is holding.
+    """
+    # Bundles and installed styles hold validated values; only a plain
+    # dict from the caller goes through rcParams validation
+    validated = not isinstance(style, dict) or isinstance(style, mpl.RcParams)
+    _gate.enter(load_style(style), validated)
+    try:
+        yield
+    finally:
+        _gate.exit()
+
+
+def held_style():
+    """The rcParams bundle of this thread's innermost style_context, or None."""
+    stack = _gate._stack()
+    return stack[-1][0] if stack else None
+
+
+def new_figure(**fig_kw):
+    """
+    A Figure with its own Agg canvas, never registered with pyplot.
+
+    Nothing global refers to it, so it can be built and saved from any
+    thread and is freed as soon as it goes out of scope. Build it inside
+    style_context to style it.
+    """
+    fig = Figure(**fig_kw)
+    FigureCanvasAgg(fig)
+    return fig
@@ -0,0 +1,272 @@
+"""
+AUSTIN SYNTH: Synthetic entity-year panels at production size
+==============================================================
+
+The bundled datasets top out around 26k rows. synthesize_panel grows any
+of them 10x, 100x or 1000x while keeping the exact schema (column names,
+dtypes, entity/year layout), so every script and helper can be
+benchmarked and memory-profiled without outside data.
+
+Each synthetic entity is a sibling of a real one ("Russia #7"):
+
+  - its series follows the template's shape, shifted by an entity-level
+    factor and an AR(1) wobble sized from the real year-to-year changes,
+    then clipped to the column's observed range,
+  - it inherits the template's gaps (late starts, missing years) and
+    adds short runs of dropped rows and blank cells at the 'missing' rate,
+  - text columns (codes, regions) are copied, codes get a '_7' suffix.
+
+The original entities stay in the result unchanged, so filters such as
+{'Entity': 'World'} keep working. steps_per_year > 1 interpolates every
+series onto a finer time grid (Year becomes float).
+
+USAGE:
+    from austin_synth import synthesize_panel, synthetic_dataset
+
+    big = synthetic_dataset('life_expectancy_gender', scale=100)   # ~1.9M rows
+    df = synthesize_panel(my_panel, scale=10, steps_per_year=4, missing=0.05)
+
+    # Write CSVs to datasets/synthetic/ for tools that read files
+    python austin_synth.py co2_per_capita renewables_share --scale 10 100
+
+"""
+
+import argparse
+import math
+import os
+
+import numpy as np
+import pandas as pd
+
+from austin_data import DATASET_DIR, list_datasets, load_dataset, panel_columns
+
+
+SYNTHETIC_DIR = os.path.join(DATASET_DIR, 'synthetic')
+SCALES = (10, 100, 1000)
+
+# Spread of the entity-level shift, as a share of the template's level
+LEVEL_SPREAD = 0.15
+# Lag-one autocorrelation of the added wobble, and its size relative to
+# the column's typical year-to-year change
+AR_PHI = 0.8
+AR_SIZE = 0.5
+# Missing rows and cells come in runs of this many time steps
+MISSING_RUN = 3
+
+# Cells generated per block, to keep memory flat at 1000x
+BLOCK_CELLS = 2_000_000
+
+
+# ============================================================
+# WIDE LAYOUT
+# ============================================================
+
+def _to_wide(df, entity, year):
+    """Entity x time arrays for every column, plus the row-presence mask."""
+    names, e_idx = np.unique(df[entity].to_numpy(dtype=object), return_inverse=True)
+    years, t_idx = np.unique(df[year].to_numpy(), return_inverse=True)
+    present = np.zeros((len(names), len(years)), dtype=bool)
+    present[e_idx, t_idx] = True
+
+    wide = {}
+    for column in df.columns:
+        if column in (entity, year):
+            continue
+        values = df[column].to_numpy()
+        if pd.api.types.is_numeric_dtype(df[column]):
+            grid = np.full(present.shape, np.nan)
+            grid[e_idx, t_idx] = values.astype(float)
+        else:
+            grid = np.full(present.shape, None, dtype=object)
+            grid[e_idx, t_idx] = df[column].astype(object).where(df[column].notna(), None).to_numpy()
+        wide[column] = grid
+    return names, years, present, wide
+
+
+def _fine_grid(years, steps_per_year):
+    """Positions on the original year axis for the finer time grid."""
+    if steps_per_year == 1:
+        return np.arange(len(years), dtype=float)
+    return np.arange(0, len(years) - 1 + 1e-9, 1 / steps_per_year)
+
+
+def _interpolate(grid, pos):
+    """Linear interpolation of entity x time arrays at fractional positions."""
+    i0 = np.floor(pos).astype(int)
+    i1 = np.minimum(i0 + 1, grid.shape[1] - 1)
+    w = pos - i0
+    if grid.dtype == bool:
+        return grid[:, i0] & np.where(w > 0, grid[:, i1], True)
+    if grid.dtype == object:
+        return grid[:, i0]
+    # Exact steps keep their value even when the next step is missing
+    return np.where(w > 0, grid[:, i0] * (1 - w) + grid[:, i1] * w, grid[:, i0])
+
+
+# ============================================================
+# NOISE
+# ============================================================
+
+def _runs(rng, shape, rate, length=MISSING_RUN):
+    """Boolean mask with about `rate` of cells set, in runs along time."""
+    if rate <= 0:
+        return np.zeros(shape, dtype=bool)
+    starts = rng.random(shape) < rate / length
+    mask = starts.copy()
+    for shift in range(1, length):
+        mask[:, shift:] |= starts[:, :-shift]
+    return mask
+
+
+def _wobble(rng, shape, size):
+    """AR(1) noise along time, vectorized across entities."""
+    eps = rng.normal(0, size * math.sqrt(1 - AR_PHI ** 2), shape)
+    out = np.empty(shape)
+    out[:, 0] = rng.normal(0, size, shape[0])
+    for t in range(1, shape[1]):
+        out[:, t] = AR_PHI * out[:, t - 1] + eps[:, t]
+    return out
+
+
+def _column_stats(grid):
+    """(min, max, typical year-to-year change) of a numeric wide array."""
+    lo, hi = np.nanmin(grid), np.nanmax(grid)
+    steps = np.abs(np.diff(grid, axis=1))
+    step = np.nanmedian(steps) if np.isfinite(steps).any() else 0.0
+    if not step:
+        step = 0.01 * (hi - lo)
+    return lo, hi, step
+
+
+# ============================================================
+# GENERATOR
+# ============================================================
+
+def synthesize_panel(df, scale=10, steps_per_year=1, missing=0.02, seed=0):
+    """
+    A statistically similar panel about scale times as large.
+
+    Parameters
+    ----------
+    df : DataFrame
+        Entity-year panel (see austin_data.panel_columns).
+    scale : int
+        Target size relative to df. Entities are multiplied by
+        ceil(scale / steps_per_year).
+    steps_per_year : int
+        Time steps per original year step. Above 1 the year column is float.
+    missing : float
+        Extra share of dropped rows and of blank numeric cells in the
+        synthetic entities, on top of the gaps they inherit.
+    seed : int
+        Same seed, same panel.
+
+    Returns
+    -------
+    DataFrame
+        Same columns and dtypes as df (year becomes float if steps_per_year > 1).
+        The original entities come first; each entity's rows are in year order.
+    """
+    entity, year = panel_columns(df)
+    if scale < 1 or steps_per_year < 1:
+        raise ValueError('scale and steps_per_year must be >= 1')
+    rng = np.random.default_rng(seed)
+    names, years, present, wide = _to_wide(df, entity, year)
+    pos = _fine_grid(years, steps_per_year)
+    fine_years = np.interp(pos, np.arange(len(years)), years.astype(float))
+    if steps_per_year == 1:
+        fine_years = years
+    present = _interpolate(present, pos)
+    wide = {c: _interpolate(g, pos) for c, g in wide.items()}
+
+    numeric = [c for c in wide if wide[c].dtype != object]
+    stats = {c: _column_stats(wide[c]) for c in numeric}
+    codes = [c for c in wide if c.lower() == 'code']
+    copies = math.ceil(scale / steps_per_year)
+    n, t = present.shape
+    per_block = max(1, BLOCK_CELLS // max(n * t, 1))
+
+    frames = []
+    for first in range(0, copies, per_block):
+        ks = np.arange(first, min(first + per_block, copies))
+        tmpl = np.tile(np.arange(n), len(ks))
+        k = np.repeat(ks, n)
+        synthetic = (k > 0)[:, None]
+
+        keep = present[tmpl] & ~(synthetic & _runs(rng, (len(tmpl), t), missing))
+        e_rows, t_rows = np.nonzero(keep)
+        base = tmpl[e_rows]
+        # Names and code suffixes per entity, then broadcast to its rows
+        labels = np.array([f'{names[e]} #{i}' if i else names[e] for e, i in zip(tmpl, k)],
+                          dtype=object)
+        code_suffix = np.array([f'_{i}' if i else '' for i in k], dtype=object)
+        block = {entity: labels[e_rows], year: fine_years[t_rows]}
+
+        for column, grid in wide.items():
+            if column in numeric:
+                lo, hi, step = stats[column]
+                values = grid[tmpl]
+                if lo >= 0:
+                    level = np.exp(rng.normal(0, LEVEL_SPREAD, len(tmpl)))[:, None]
+                    values = values * np.where(synthetic, level, 1)
+                else:
+                    shift = rng.normal(0, LEVEL_SPREAD * (hi - lo) / 4, len(tmpl))[:, None]
+                    values = values + np.where(synthetic, shift, 0)
+                values = values + np.where(synthetic, _wobble(rng, values.shape, AR_SIZE * step), 0)
+                values = np.clip(values, lo, hi)
+                if df[column].isna().any():
+                    values[synthetic[:, 0][:, None] & _runs(rng, values.shape, missing)] = np.nan
+                block[column] = values[e_rows, t_rows]
+            else:
+                values = grid[base, t_rows]
+                if column in codes:
+                    values = values.copy()
+                    has = values != None  # noqa: E711 (elementwise on object arrays)
+                    values[has] = values[has] + code_suffix[e_rows[has]]
+                block[column] = values
+        frames.append(pd.DataFrame(block))
+
+    out = pd.concat(frames, ignore_index=True)[list(df.columns)]
+    for column in df.columns:
+        if column == year and steps_per_year > 1:
+            continue
+        if pd.api.types.is_integer_dtype(df[column]) and column != year:
+            out[column] = np.rint(out[column])
+        out[column] = out[column].astype(df[column].dtype)
+    return out
+
+
+def synthetic_dataset(name, scale=10, **kwargs):
+    """synthesize_panel of a bundled dataset. See synthesize_panel."""
+    return synthesize_panel(load_dataset(name), scale=scale, **kwargs)
+
+
+def write_synthetic(name, scale=10, out_dir=SYNTHETIC_DIR, **kwargs):
+    """
+    Write a synthetic dataset to out_dir/<name>_x<scale>.csv.
+
+    austin_data.load_dataset accepts the returned path directly.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(name))[0]
+    path = os.path.join(out_dir, f'{stem}_x{scale}.csv')
+    synthetic_dataset(name, scale=scale, **kwargs).to_csv(path, index=False)
+    return path
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write synthetic, enlarged copies of the datasets.')
+    parser.add_argument('datasets', nargs='*', help='dataset names (default: all)')
+    parser.add_argument('--scale', type=int, nargs='+', default=list(SCALES))
+    parser.add_argument('--steps-per-year', type=int, default=1)
+    parser.add_argument('--missing', type=float, default=0.02)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', default=SYNTHETIC_DIR)
+    args = parser.parse_args()
+
+    for name in args.datasets or list_datasets():
+        for scale in args.scale:
+            path = write_synthetic(name, scale, out_dir=args.out,
+                                   steps_per_year=args.steps_per_year,
+                                   missing=args.missing, seed=args.seed)
+            print(f'Saved: {path}')
@@ -0,0 +1,233 @@
+"""
+AUSTIN TEXT METRICS: Cached text extents for layout decisions
+==============================================================
+
+Label nudging, title wrapping and overlap checks all need to know how big
+a string will be. Asking Matplotlib for a Text bbox forces a renderer pass
+per call. This service measures strings straight through the Agg
+renderer's font engine, caches width / height / descent keyed by
+(string, font, size, weight, dpi), and persists the cache to disk so the
+next run measures nothing at all.
+
+USAGE:
+    from austin_textmetrics import measure_text, measure_many, get_text_metrics
+
+    w, h, d = measure_text('Qatar', size=11, weight='bold')   # pixels at 72 dpi = points
+
+    # Measure thousands of labels in one batch (only cache misses hit FreeType)
+    sizes = measure_many(df['Entity'], size=9)
+
+    # Persist for the next run (also done automatically at exit)
+    get_text_metrics().save()
+
+The font in the key is the resolved font FILE (e.g. IBMPlexSans-Bold.otf),
+not the family name, so a cache written on one machine is never reused for
+a different font on another.
+
+"""
+
+import atexit
+import json
+import os
+import threading
+
+import matplotlib as mpl
+from matplotlib import font_manager
+from matplotlib.backends.backend_agg import RendererAgg
+from matplotlib.figure import Figure
+
+
+CACHE_PATH = os.path.join(
+    os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')),
+    'austin_style_kit', 'text_metrics.json',
+)
+CACHE_VERSION = 1
+
+def _is_math(text):
+    unescaped = text.replace(r'\$', '')
+    return unescaped.count('$') >= 2 and unescaped.count('$') % 2 == 0
+
+
+class TextMetrics:
+    """
+    Width, height and descent of strings, cached in memory and on disk.
+
+    Parameters
+    ----------
+    path : str or None
+        JSON file the cache is loaded from and saved to. None keeps the
+        cache in memory only.
+    autosave : bool
+        Save new measurements when the interpreter exits.
+    """
+
+    def __init__(self, path=CACHE_PATH, autosave=True):
+        self.path = path
+        self._cache = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._probes = {}
+        self._fonts = {}
+        self.hits = 0
+        self.misses = 0
+        if path:
+            self.load()
+            if autosave:
+                atexit.register(self.save)
+
+    # --- persistence -------------------------------------------------
+
+    def load(self):
+        """Merge the on-disk cache into memory (missing/corrupt files are ignored)."""
+        try:
+            with open(self.path, encoding='utf-8') as f:
+                payload = json.load(f)
+        except (OSError, ValueError):
+            return
+        if payload.get('version') != CACHE_VERSION or payload.get('matplotlib') != mpl.__version__:
+            return
+        with self._lock:
+            for key, value in payload.get('metrics', {}).items():
+                self._cache.setdefault(key, tuple(value))
+
+    def save(self):
+        """Write the cache if anything new was measured."""
+        if not self.path or not self._dirty:
+            return
+        with self._lock:
+            payload = {
+                'version': CACHE_VERSION,
+                'matplotlib': mpl.__version__,
+                'metrics': {k: list(v) for k, v in self._cache.items()},
+            }
+            self._dirty = False
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = f'{self.path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+        os.replace(tmp, self.path)
+
+    def clear(self):
+        """Forget every measurement (the file is rewritten on the next save)."""
+        with self._lock:
+            self._cache.clear()
+            self._dirty = True
+
+    def __len__(self):
+        return len(self._cache)
+
+    # --- measuring ---------------------------------------------------
+
+    def _font(self, family, size, weight, style):
+        """FontProperties plus the font file it resolves to (memoized)."""
+        key = (family, size, weight, style)
+        if key not in self._fonts:
+            prop = font_manager.FontProperties(family=family, size=size,
+                                               weight=weight, style=style)
+            font_file = os.path.basename(font_manager.findfont(prop))
+            self._fonts[key] = (prop, font_file)
+        return self._fonts[key]
+
+    def _probe(self, dpi):
+        """An off-screen renderer and Text at dpi, reused for every measurement."""
+        if dpi not in self._probes:
+            fig = Figure(dpi=dpi)
+            self._probes[dpi] = (RendererAgg(1, 1, dpi), fig.text(0, 0, ''))
+        return self._probes[dpi]
+
+    def _measure(self, text, prop, dpi):
+        # Text.get_window_extent with an explicit renderer runs Matplotlib's
+        # own line layout (so multi-line and mathtext match exactly) without
+        # drawing anything.
+        renderer, probe = self._probe(dpi)
+        probe.set_text(text)
+        probe.set_fontproperties(prop)
+        bbox = probe.get_window_extent(renderer=renderer)
+        last = text.split('\n')[-1] or ' '
+        _, _, descent = renderer.get_text_width_height_descent(last, prop, ismath=_is_math(last))
+        return bbox.width, bbox.height, descent
+
+    def measure_many(self, texts, size=None, weight='normal', family=None,
+                     style='normal', dpi=72):
+        """
+        Measure many strings with the same font in one batch.
+
+        Parameters
+        ----------
+        texts : iterable of str
+        size : float, optional
+            Font size in points; defaults to font.size of the active style.
+        weight, style : str
+            Font weight ('normal', 'bold', ...) and style ('italic', ...).
+        family : str or list, optional
+            Defaults to font.family of the active style.
+        dpi : float
+            Resolution to measure at. At 72 dpi pixels equal points.
+
+        Returns
+        -------
+        sizes : list of (width, height, descent) tuples in pixels
+        """
+        size = mpl.rcParams['font.size'] if size is None else float(size)
+        if family is None:
+            family = mpl.rcParams['font.family']
+        if not isinstance(family, str):
+            family = tuple(family)
+        prop, font_file = self._font(family, size, weight, style)
+        prefix = f'{font_file}|{size:g}|{weight}|{style}|{dpi:g}|'
+
+        texts = [str(t) for t in texts]
+        results = []
+        with self._lock:
+            for text in texts:
+                key = prefix + text
+                value = self._cache.get(key)
+                if value is None:
+                    value = tuple(float(v) for v in self._measure(text, prop, dpi))
+                    self._cache[key] = value
+                    self._dirty = True
+                    self.misses += 1
+                else:
+                    self.hits += 1
+                results.append(value)
+        return results
+
+    def measure(self, text, size=None, weight='normal', family=None,
+                style='normal', dpi=72):
+        """(width, height, descent) of one string, in pixels at dpi."""
+        return self.measure_many([text], size=size, weight=weight, family=family,
+                                 style=style, dpi=dpi)[0]
+
+    def width(self, text, **kwargs):
+        """Width of one string in pixels (points at the default 72 dpi)."""
+        return self.measure(text, **kwargs)[0]
+
+
+# ============================================================
+# SHARED SERVICE
+# ============================================================
+
+_shared = None
+
+
+def get_text_metrics():
+    """The process-wide TextMetrics, created on first use."""
+    global _shared
+    if _shared is None:
+        _shared = TextMetrics()
+    return _shared
+
+
+def measure_text(text, **kwargs):
+    """(width, height, descent) via the shared cache. See TextMetrics.measure."""
+    return get_text_metrics().measure(text, **kwargs)
+
+
+def measure_many(texts, **kwargs):
+    """Batch measurement via the shared cache. See TextMetrics.measure_many."""
+    return get_text_metrics().measure_many(texts, **kwargs)
+
+
+def text_fits(text, max_width, **kwargs):
+    """True if text is no wider than max_width (same units as dpi gives)."""
+    return get_text_metrics().width(text, **kwargs) <= max_width
@@ -0,0 +1,377 @@
+"""
+AUSTIN TRENDS: Trend lines with confidence bands for many groups at once
+========================================================================
+
+05 draws one dashed trend from np.polyfit on log GDP and reads its
+"+2 beyond $20,000" anchor off the coefficients. fit_trends() does the
+same for every group of a frame (every owid_region, every continent)
+without a Python loop over the groups: the rows are sorted by group and
+padded into a groups x rows array, every group's normal equations come
+from one set of sums, and one batched solve fits them all.
+
+  - 'linear'     y = a + b x (with logx=True, 05's curve y = a + b log x),
+  - 'loglinear'  log y = a + b x, i.e. constant growth (GDP over years),
+  - 'loess'      local-linear smoothing with tricube weights over the
+                 nearest span of each group's points.
+
+Every fit comes back on a grid of x values with a confidence band for the
+fitted mean, shaped for fill_between, and plot_trends() draws them.
+
+USAGE:
+    from austin_trends import fit_trends, plot_trends, trend_at
+
+    # 05's dashed curve, but one per region
+    trends = fit_trends(data, 'GDP per capita', 'Life satisfaction',
+                        by='World region according to OWID', logx=True)
+    plot_trends(ax, trends, band=True)
+    trend_at(trends, 20000)                 # each region's value at $20K
+
+    # Growth rates per region
+    growth = fit_trends('gdp_per_capita', 'year', 'ny_gdp_pcap_pp_kd',
+                        by='owid_region', model='loglinear')
+    growth['coef'][:, 1]                    # log growth per year
+
+    python austin_trends.py gdp_per_capita year ny_gdp_pcap_pp_kd --by owid_region --model loess
+
+The band is for the fitted trend, not for individual points. Its width
+uses Student's t with the residual degrees of freedom; for 'loess' the
+degrees of freedom are Cleveland's approximation for local-linear fits.
+
+"""
+
+import argparse
+import statistics
+import time
+
+import numpy as np
+import pandas as pd
+
+from austin_data import load_dataset
+
+
+MODELS = ('linear', 'loglinear', 'loess')
+
+# Points on each group's fitted curve
+GRID_POINTS = 200
+# Share of a group's points in each local fit of 'loess'
+SPAN = 0.5
+# Groups need at least this many points to get a trend
+MIN_POINTS = 5
+# 'loess' weight arrays are built for this many (group, grid, row) cells at a time
+CHUNK_CELLS = 4_000_000
+
+
+# ============================================================
+# PADDED GROUPS
+# ============================================================
+
+def _padded(x, y, groups):
+    """
+    Rows sorted by group and padded into (groups, longest group) arrays.
+
+    Returns labels, x, y and a boolean mask of real (not padding) cells.
+    """
+    codes, labels = pd.factorize(groups, sort=True)
+    order = np.argsort(codes, kind='stable')
+    codes = codes[order]
+    counts = np.bincount(codes, minlength=len(labels))
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    slot = np.arange(len(codes)) - starts[codes]
+    shape = (len(labels), counts.max() if len(counts) else 0)
+    px, py = np.zeros(shape), np.zeros(shape)
+    mask = np.zeros(shape, dtype=bool)
+    px[codes, slot] = x[order]
+    py[codes, slot] = y[order]
+    mask[codes, slot] = True
+    return np.asarray(labels, dtype=object), px, py, mask
+
+
+def _t_quantile(level, dof):
+    """
+    Two-sided Student's t quantile (Cornish-Fisher expansion around the normal).
+
+    Accurate to about 1e-3 for dof >= 5, which is plenty for a drawn band.
+    """
+    z = statistics.NormalDist().inv_cdf(0.5 + level / 2)
+    dof = np.maximum(np.asarray(dof, dtype=float), 1.0)
+    return (z + (z ** 3 + z) / (4 * dof) + (5 * z ** 5 + 16 * z ** 3 + 3 * z) / (96 * dof ** 2)
+            + (3 * z ** 7 + 19 * z ** 5 + 17 * z ** 3 - 15 * z) / (384 * dof ** 3))
+
+
+def _grid(px, mask, points):
+    """points evenly spaced x values over each group's own range: (groups, points)."""
+    low = np.where(mask, px, np.inf).min(axis=1)
+    high = np.where(mask, px, -np.inf).max(axis=1)
+    steps = np.linspace(0.0, 1.0, points)
+    return low[:, None] + (high - low)[:, None] * steps[None, :]
+
+
+# ============================================================
+# FITS
+# ============================================================
+
+def _fit_linear(px, py, mask, grid, level):
+    """Least squares y = a + b x for every group from one batched solve."""
+    w = mask.astype(float)
+    X = np.stack([np.ones_like(px), px], axis=-1)                   # (G, N, 2)
+    gram = np.einsum('gn,gnp,gnq->gpq', w, X, X)
+    rhs = np.einsum('gn,gnp,gn->gp', w, X, py)
+    n = w.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        inverse = np.linalg.pinv(gram)
+        coef = np.einsum('gpq,gq->gp', inverse, rhs)
+        residual = np.where(mask, py - np.einsum('gnp,gp->gn', X, coef), 0.0)
+        dof = n - 2
+        sigma2 = np.sum(residual ** 2, axis=1) / dof
+        G = np.stack([np.ones_like(grid), grid], axis=-1)          # (G, M, 2)
+        fit = np.einsum('gmp,gp->gm', G, coef)
+        se = np.sqrt(sigma2[:, None] * np.einsum('gmp,gpq,gmq->gm', G, inverse, G))
+    half = _t_quantile(level, dof)[:, None] * se
+    return coef, fit, fit - half, fit + half, dof
+
+
+def _fit_loess(px, py, mask, grid, level, span):
+    """Local-linear tricube fits at every grid point of every group."""
+    n = mask.sum(axis=1)
+    k = np.clip(np.ceil(span * n).astype(int), 2, None)
+    G, M = grid.shape
+    fit = np.empty((G, M))
+    spread = np.empty((G, M))
+    rows = max(1, CHUNK_CELLS // max(G * px.shape[1], 1))
+    for lo in range(0, M, rows):
+        x0 = grid[:, lo:lo + rows, None]                              # (G, m, 1)
+        u = px[:, None, :] - x0                                       # (G, m, N)
+        distance = np.where(mask[:, None, :], np.abs(u), np.inf)
+        # Bandwidth: distance to the k-th nearest point of the group
+        h = np.take_along_axis(np.sort(distance, axis=-1),
+                               (k - 1)[:, None, None].repeat(x0.shape[1], axis=1), axis=-1)
+        h = np.where(h > 0, h, 1.0) * 1.0001
+        w = np.clip(1 - (distance / h) ** 3, 0, None) ** 3
+        s0, s1, s2 = w.sum(-1), (w * u).sum(-1), (w * u * u).sum(-1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            det = s0 * s2 - s1 ** 2
+            # Equivalent kernel: fit = sum(l * y), variance factor = sum(l ** 2)
+            weights = w * (s2[..., None] - s1[..., None] * u) / det[..., None]
+        fit[:, lo:lo + rows] = np.einsum('gmn,gn->gm', weights, np.where(mask, py, 0.0))
+        spread[:, lo:lo + rows] = np.sqrt(np.sum(weights ** 2, axis=-1))
+
+    # Residuals at the data points, read off the (evenly spaced) fitted grid
+    position = (px - grid[:, :1]) / np.where(np.ptp(grid, axis=1) > 0, np.ptp(grid, axis=1), 1)[:, None]
+    index = np.clip(position * (M - 1), 0, M - 1)
+    left = np.floor(index).astype(int).clip(0, M - 2 if M > 1 else 0)
+    frac = index - left
+    right = np.minimum(left + 1, M - 1)
+    smooth = (np.take_along_axis(fit, left, axis=1) * (1 - frac)
+              + np.take_along_axis(fit, right, axis=1) * frac)
+    residual = np.where(mask, py - smooth, 0.0)
+    # Cleveland's equivalent number of parameters for local-linear tricube fits
+    dof = n - 2.2 / span
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sigma = np.sqrt(np.sum(residual ** 2, axis=1) / dof)
+    half = _t_quantile(level, dof)[:, None] * sigma[:, None] * spread
+    return None, fit, fit - half, fit + half, dof
+
+
+def fit_trends(df_or_name, x, y, by=None, model='linear', logx=False, level=0.95,
+               points=GRID_POINTS, span=SPAN, min_points=MIN_POINTS):
+    """
+    Fit one trend per group, all groups in one batched computation.
+
+    Parameters
+    ----------
+    df_or_name : DataFrame or str
+        Data, or a dataset name for austin_data.load_dataset.
+    x, y : str
+        Columns.
+    by : str, optional
+        Group column; one trend for the whole frame when omitted.
+    model : str
+        'linear', 'loglinear' (fit log y) or 'loess'.
+    logx : bool
+        Fit on log x (05's log-GDP curve); the grid is then evenly spaced
+        in log x, which looks even on a log axis.
+    level : float
+        Confidence level of the band.
+    points : int
+        Grid points per curve.
+    span : float
+        Share of each group's points in every local fit ('loess').
+    min_points : int
+        Smaller groups are left out (with by omitted, a frame this small
+        gives no trend at all).
+
+    Returns
+    -------
+    trends : dict
+        'groups' (labels), 'x', 'fit', 'lower', 'upper' (arrays of shape
+        groups x points, in data units), 'coef' (intercept and slope per
+        group on the fitted scale, None for 'loess'), 'n', 'dof', 'model',
+        'logx'.
+    """
+    if model not in MODELS:
+        raise ValueError(f"Unknown model '{model}'. Choose from: {list(MODELS)}")
+    df = load_dataset(df_or_name) if isinstance(df_or_name, str) else df_or_name
+    columns = [x, y] + ([by] if by is not None else [])
+    missing = [c for c in columns if c not in df.columns]
+    if missing:
+        raise ValueError(f"Column '{missing[0]}' not found. Choose from: {list(df.columns)}")
+
+    xs = pd.to_numeric(df[x], errors='coerce').to_numpy(dtype=float)
+    ys = pd.to_numeric(df[y], errors='coerce').to_numpy(dtype=float)
+    labels = df[by].to_numpy(dtype=object) if by is not None else np.zeros(len(df), dtype=object)
+    keep = np.isfinite(xs) & np.isfinite(ys) & pd.notna(labels)
+    if logx:
+        keep &= xs > 0
+    if model == 'loglinear':
+        keep &= ys > 0
+    xs, ys, labels = xs[keep], ys[keep], labels[keep]
+    if logx:
+        xs = np.log(xs)
+    if model == 'loglinear':
+        ys = np.log(ys)
+
+    groups, px, py, mask = _padded(xs, ys, labels)
+    n = mask.sum(axis=1)
+    big = n >= min_points
+    groups, px, py, mask, n = groups[big], px[big], py[big], mask[big], n[big]
+    grid = _grid(px, mask, points)
+    if model == 'loess':
+        coef, fit, lower, upper, dof = _fit_loess(px, py, mask, grid, level, span)
+    else:
+        coef, fit, lower, upper, dof = _fit_linear(px, py, mask, grid, level)
+
+    if model == 'loglinear':
+        fit, lower, upper = np.exp(fit), np.exp(lower), np.exp(upper)
+    if logx:
+        grid = np.exp(grid)
+    # One unnamed group when by is omitted, none if it was too small to fit
+    names = list(groups) if by is not None else [y] * len(groups)
+    return dict(groups=names, x=grid, fit=fit,
+                lower=lower, upper=upper, coef=coef, n=n, dof=dof, model=model, logx=logx)
+
+
+def trend_at(trends, x):
+    """
+    Each group's fitted value at x (05's trend_at_20k), as a Series.
+
+    Exact for the parametric models; read off the grid for 'loess'.
+    Groups whose data does not reach x get NaN.
+    """
+    values = []
+    for i in range(len(trends['groups'])):
+        grid = trends['x'][i]
+        if not grid[0] <= x <= grid[-1]:
+            values.append(np.nan)
+        elif trends['coef'] is not None:
+            a, b = trends['coef'][i]
+            value = a + b * (np.log(x) if trends['logx'] else x)
+            values.append(np.exp(value) if trends['model'] == 'loglinear' else value)
+        elif trends['logx']:
+            values.append(np.interp(np.log(x), np.log(grid), trends['fit'][i]))
+        else:
+            values.append(np.interp(x, grid, trends['fit'][i]))
+    return pd.Series(values, index=trends['groups'], dtype=float)
+
+
+def trend_frame(trends):
+    """Curves and bands as a long DataFrame: group, x, fit, lower, upper."""
+    G, M = trends['x'].shape
+    return pd.DataFrame({
+        'group': np.repeat(np.asarray(trends['groups'], dtype=object), M),
+        'x': trends['x'].ravel(), 'fit': trends['fit'].ravel(),
+        'lower': trends['lower'].ravel(), 'upper': trends['upper'].ravel()})
+
+
+# ============================================================
+# DRAWING
+# ============================================================
+
+def plot_trends(ax, trends, colors=None, band=True, band_alpha=0.15, **kwargs):
+    """
+    One line per group plus its confidence band.
+
+    Parameters
+    ----------
+    colors : dict or list, optional
+        Colour per group (name -> colour, or in group order); defaults to
+        the kit's colour cycle.
+    band : bool
+        Draw the confidence band with fill_between.
+    **kwargs : dict
+        Passed to ax.plot, e.g. linestyle='--', alpha=0.4 for 05's look.
+
+    Returns
+    -------
+    lines : dict
+        Group -> Line2D.
+    """
+    from austin_annotations import COLOR_CYCLE
+
+    lines = {}
+    for i, group in enumerate(trends['groups']):
+        if isinstance(colors, dict):
+            color = colors.get(group, COLOR_CYCLE[i % len(COLOR_CYCLE)])
+        elif colors is not None:
+            color = colors[i % len(colors)]
+        else:
+            color = COLOR_CYCLE[i % len(COLOR_CYCLE)]
+        x = trends['x'][i]
+        if band:
+            ax.fill_between(x, trends['lower'][i], trends['upper'][i], color=color,
+                            alpha=band_alpha, linewidth=0, zorder=1)
+        kwargs.setdefault('linewidth', 2)
+        lines[group], = ax.plot(x, trends['fit'][i], color=color, label=str(group), **kwargs)
+    return lines
+
+
+def _synthetic(groups=50, rows=40_000, seed=0):
+    rng = np.random.default_rng(seed)
+    group = rng.integers(0, groups, rows)
+    x = rng.uniform(0, 10, rows)
+    y = rng.normal(0, 1, groups)[group] + rng.normal(1, 0.3, groups)[group] * x + rng.normal(0, 1, rows)
+    return pd.DataFrame({'group': group, 'x': x, 'y': y})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fit trends with confidence bands per group.')
+    parser.add_argument('dataset', nargs='?', default='gdp_per_capita')
+    parser.add_argument('x', nargs='?', default='year')
+    parser.add_argument('y', nargs='?', default='ny_gdp_pcap_pp_kd')
+    parser.add_argument('--by', default=None, help="group column, e.g. 'owid_region'")
+    parser.add_argument('--model', choices=MODELS, default='linear')
+    parser.add_argument('--logx', action='store_true')
+    parser.add_argument('--at', type=float, default=None, help='print each trend at this x')
+    parser.add_argument('--out', default=None, help='save a chart of the trends')
+    parser.add_argument('--bench', action='store_true', help='time 50 synthetic groups instead')
+    args = parser.parse_args()
+
+    if args.bench:
+        data = _synthetic()
+        for model in MODELS:
+            start = time.perf_counter()
+            fit_trends(data, 'x', 'y', by='group', model=model)
+            print(f'{model:<10} 50 groups x 40,000 rows: {(time.perf_counter() - start) * 1000:.0f} ms')
+    else:
+        start = time.perf_counter()
+        trends = fit_trends(args.dataset, args.x, args.y, by=args.by, model=args.model,
+                            logx=args.logx)
+        elapsed = time.perf_counter() - start
+        for i, group in enumerate(trends['groups']):
+            slope = f"  slope {trends['coef'][i][1]:.4g}" if trends['coef'] is not None else ''
+            print(f"{str(group):<24} n={trends['n'][i]:<6}{slope}")
+        if args.at is not None:
+            print(trend_at(trends, args.at).to_string())
+        print(f"{len(trends['groups'])} trends in {elapsed * 1000:.0f} ms")
+        if args.out:
+            import matplotlib
+            matplotlib.use('Agg')
+            from austin_styles import new_figure, style_context
+            with style_context('notebook'):
+                fig = new_figure(figsize=(12, 6))
+                ax = fig.add_subplot()
+                plot_trends(ax, trends)
+                if args.logx:
+                    ax.set_xscale('log')
+                ax.legend(frameon=False)
+                fig.savefig(args.out, dpi=150, bbox_inches='tight', facecolor='white')
+            print(f'Saved: {args.out}')
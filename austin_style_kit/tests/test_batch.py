@@ -0,0 +1,49 @@
+"""SmallMultiples decks built from the documented template."""
+
+import os
+import sys
+
+KIT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, KIT_DIR)
+
+import matplotlib
+matplotlib.use('Agg')
+
+from austin_annotations import PALETTE
+from austin_batch import SmallMultiples, update_fill_between
+from austin_data import load_dataset
+
+WOMEN = 'Life expectancy of women'
+MEN = 'Life expectancy of men'
+
+
+def build(fig, ax):
+    gap = ax.fill_between([0, 1], [0, 0], [0, 0], color=PALETTE['primary'], alpha=0.08)
+    women, = ax.plot([], [], color=PALETTE['neutral'])
+    men, = ax.plot([], [], color=PALETTE['primary'], linewidth=3)
+    title = ax.text(0, 1.08, '', transform=ax.transAxes, fontsize=14, fontweight='bold')
+    return dict(gap=gap, women=women, men=men, title=title)
+
+
+def update(h, ax, key, frame):
+    h['women'].set_data(frame['Year'], frame[WOMEN])
+    h['men'].set_data(frame['Year'], frame[MEN])
+    update_fill_between(h['gap'], frame['Year'], frame[MEN], frame[WOMEN])
+    h['title'].set_text(f'Life expectancy gap, {key}')
+
+
+def test_render_rescales_to_each_entity(tmp_path):
+    df = load_dataset('life_expectancy_gender')
+    deck = SmallMultiples(build, update, style='notebook')
+    try:
+        for country in ('Russia', 'Japan'):
+            frame = df[df['Entity'] == country].dropna(subset=[WOMEN, MEN])
+            deck.render(country, frame, str(tmp_path / f'{country}.png'))
+            x0, x1 = deck.ax.get_xlim()
+            y0, y1 = deck.ax.get_ylim()
+            assert x0 <= frame['Year'].min() and x1 >= frame['Year'].max()
+            assert y0 <= frame[MEN].min() and y1 >= frame[WOMEN].max()
+            # Not the whole 0-100 range either: the limits follow this entity
+            assert y0 > 0.5 * frame[MEN].min()
+    finally:
+        deck.close()
@@ -0,0 +1,24 @@
+"""Break search on series with a known break."""
+
+import os
+import sys
+
+import numpy as np
+
+KIT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, KIT_DIR)
+
+from austin_breaks import find_breaks
+
+
+def test_hinge_is_recovered_exactly():
+    years = np.arange(1950, 2021)
+    rising = 1 + 0.1 * (years - 1950) + 0.5 * np.maximum(0, years - 1990)
+    values = np.vstack([rising, -rising])
+    values[1, 5] = np.nan                  # a gap does not move the break
+
+    breaks = find_breaks(values, years)
+    assert list(breaks['year']) == [1990, 1990]
+    np.testing.assert_allclose(breaks['slope_before'], [0.1, -0.1], atol=1e-9)
+    np.testing.assert_allclose(breaks['change'], [0.5, -0.5], atol=1e-9)
+    np.testing.assert_allclose(breaks['gain'], [1.0, 1.0], atol=1e-9)
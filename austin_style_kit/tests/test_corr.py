@@ -0,0 +1,28 @@
+"""Pairwise-complete correlations and the clustered order."""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+KIT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, KIT_DIR)
+
+from austin_corr import cluster_order, corr_matrix
+
+
+def test_pearson_matches_pandas_with_missing_values():
+    rng = np.random.default_rng(0)
+    values = rng.normal(size=(200, 6)) @ rng.normal(size=(6, 6)) + 1e3
+    values[rng.random(values.shape) < 0.2] = np.nan
+    r, n = corr_matrix(values)
+    frame = pd.DataFrame(values)
+    np.testing.assert_allclose(r, frame.corr().to_numpy(), rtol=0, atol=1e-12)
+    present = frame.notna().astype(int)
+    np.testing.assert_array_equal(n, (present.T @ present).to_numpy())
+
+
+def test_cluster_order_of_nothing_is_empty():
+    assert cluster_order([]) == []
+    assert cluster_order(np.empty((0, 0))) == []
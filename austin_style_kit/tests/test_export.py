@@ -0,0 +1,31 @@
+"""Rasterized PNG export: background handling."""
+
+import os
+import sys
+
+import matplotlib
+import matplotlib.image as mimage
+from matplotlib.figure import Figure
+
+matplotlib.use('Agg')
+
+KIT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, KIT_DIR)
+
+from austin_export import rasterize, save_png
+
+
+def _figure():
+    fig = Figure(figsize=(2, 1))
+    fig.add_subplot().plot([0, 1])
+    return fig
+
+
+def test_background_is_white_unless_transparent(tmp_path):
+    fig = _figure()
+    assert rasterize(fig, dpi=50)[..., 3].min() == 255
+    assert rasterize(fig, dpi=50, transparent=True)[0, 0, 3] == 0
+    assert list(rasterize(fig, dpi=50, transparent=True, facecolor='black')[0, 0]) == [0, 0, 0, 255]
+
+    path = save_png(fig, str(tmp_path / 'clear.png'), dpi=50, transparent=True)
+    assert mimage.imread(path)[0, 0, 3] == 0
@@ -0,0 +1,19 @@
+"""KPI numbers against the values the gallery charts quote."""
+
+import os
+import sys
+
+KIT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, KIT_DIR)
+
+from austin_kpi import evaluate_metrics
+
+
+def test_qatar_emits_764_times_dr_congo():
+    cards = evaluate_metrics([
+        {'dataset': 'co2_per_capita', 'entity': 'Qatar', 'metric': 'multiple',
+         'column': 'CO₂ emissions per capita', 'other': 'Democratic Republic of Congo'},
+    ])
+    assert len(cards) == 1
+    assert round(cards['value'].iloc[0]) == 764
+    assert cards['number'].iloc[0] == '764x'
@@ -0,0 +1,52 @@
+"""Spec validation at compile time (and so at service start-up), and profile variants."""
+
+import os
+import sys
+
+import matplotlib
+import matplotlib.image as mimage
+import pytest
+
+matplotlib.use('Agg')
+
+KIT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, KIT_DIR)
+
+from austin_server import ChartService
+from austin_specs import build_figure, compile_spec, render_spec_variants
+
+LINE = {'dataset': 'temperature_anomaly', 'chart': 'line', 'x': 'Year', 'y': 'Average',
+        'filters': {'Entity': 'World'}}
+
+
+def test_unknown_preset_fails_to_compile():
+    spec = dict(LINE, annotations=[{'text': 'Warming', 'xy': [1980, 0.2],
+                                    'xytext': [1950, 0.8], 'preset': 'bogus'}])
+    with pytest.raises(ValueError, match="preset 'bogus'"):
+        compile_spec(spec)
+
+
+def test_highlight_colour_is_checked():
+    compile_spec(dict(LINE, highlights=[{'from': 1980, 'color': 'primary'}]))
+    compile_spec(dict(LINE, highlights=[{'from': 1980, 'color': '#E0E0E0'}]))
+    with pytest.raises(ValueError, match="color 'primry'"):
+        compile_spec(dict(LINE, highlights=[{'from': 1980, 'color': 'primry'}]))
+
+
+def test_service_rejects_bad_preset_at_start_up():
+    spec = dict(LINE, annotations=[{'text': 'x', 'at': 1980, 'xytext': [1950, 0.8],
+                                    'preset': 'bogus'}])
+    with pytest.raises(ValueError):
+        ChartService({'temperature': {'params': {}, 'spec': spec}})
+
+
+def test_profiles_change_pixel_size_and_text(tmp_path):
+    paths = render_spec_variants(LINE, ['notebook', 'thumbnail'], out=str(tmp_path / '{profile}.png'))
+    notebook, thumbnail = (mimage.imread(paths[p]).shape for p in ('notebook', 'thumbnail'))
+    assert (thumbnail[0] * 4, thumbnail[1] * 4) == notebook[:2]
+
+    sizes = {}
+    for profile in ('notebook', 'thumbnail', 'presentation', 'poster'):
+        ax = build_figure(LINE, profile=profile).axes[0]
+        sizes[profile] = ax.xaxis.get_ticklabels()[0].get_fontsize()
+    assert sizes['thumbnail'] < sizes['notebook'] < sizes['presentation'] < sizes['poster']
@@ -0,0 +1,77 @@
+"""Thread pools started from inside style_context."""
+
+import os
+import sys
+import threading
+
+import pytest
+
+KIT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+ROOT_DIR = os.path.dirname(KIT_DIR)
+sys.path.insert(0, KIT_DIR)
+
+import matplotlib
+matplotlib.use('Agg')
+
+from austin_specs import load_specs, render_specs
+from austin_styles import held_style, load_style, style_context
+
+EXAMPLES = os.path.join(ROOT_DIR, 'graphs', 'specs', 'examples.json')
+
+# Generous: a render takes well under a second, a deadlock never returns
+TIMEOUT = 60
+
+
+def _specs(tmp_path, count=2):
+    specs = load_specs(EXAMPLES)[:count]
+    return [s.replace(output=str(tmp_path / f'{i}.png')) for i, s in enumerate(specs)]
+
+
+def _run(target):
+    """Run target in a thread; fail instead of hanging if it never returns."""
+    outcome = {}
+
+    def call():
+        try:
+            outcome['value'] = target()
+        except BaseException as exc:
+            outcome['error'] = exc
+
+    thread = threading.Thread(target=call, daemon=True)
+    thread.start()
+    thread.join(TIMEOUT)
+    assert not thread.is_alive(), 'deadlocked'
+    if 'error' in outcome:
+        raise outcome['error']
+    return outcome['value']
+
+
+def test_held_style_tracks_nesting():
+    assert held_style() is None
+    with style_context('presentation'):
+        assert held_style() is load_style('presentation')
+        with style_context(None):
+            assert held_style() is load_style('presentation')
+    assert held_style() is None
+
+
+def test_threaded_render_inside_other_style_raises(tmp_path):
+    specs = _specs(tmp_path)
+
+    def render():
+        with style_context('presentation'):
+            return render_specs(specs, workers=2, threads=True)
+
+    with pytest.raises(RuntimeError, match='style_context'):
+        _run(render)
+
+
+def test_threaded_render_inside_same_style_runs(tmp_path):
+    specs = _specs(tmp_path)
+
+    def render():
+        with style_context('notebook'):
+            return render_specs(specs, workers=2, threads=True)
+
+    paths = _run(render)
+    assert all(os.path.getsize(p) for p in paths)
@@ -0,0 +1,32 @@
+"""Batched trend fits against one fit per group."""
+
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+KIT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, KIT_DIR)
+
+from austin_trends import fit_trends, trend_at
+
+
+def test_linear_coefficients_match_polyfit():
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({'group': np.repeat(['a', 'b', 'c'], [30, 12, 25])})
+    df['x'] = rng.uniform(0, 50, len(df))
+    df['y'] = df['group'].map({'a': 2.0, 'b': -1.0, 'c': 0.1}) * df['x'] + rng.normal(size=len(df))
+
+    trends = fit_trends(df, 'x', 'y', by='group')
+    assert trends['groups'] == ['a', 'b', 'c']
+    for group, (intercept, slope) in zip(trends['groups'], trends['coef']):
+        rows = df[df['group'] == group]
+        np.testing.assert_allclose([slope, intercept], np.polyfit(rows['x'], rows['y'], 1),
+                                   rtol=1e-9, atol=1e-9)
+
+
+def test_too_few_points_gives_no_trend():
+    trends = fit_trends(pd.DataFrame({'x': [1, 2], 'y': [1.0, 2.0]}), 'x', 'y')
+    assert trends['groups'] == []
+    assert trend_at(trends, 1.5).empty